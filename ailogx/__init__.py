@@ -1,3 +1,10 @@
-from .core import LLMLogger
-
 __all__ = ["LLMLogger"]
+
+
+def __getattr__(name):
+    # Imported on first use, so the CLIs (which only read logs) skip the logger stack.
+    if name == "LLMLogger":
+        from .core import LLMLogger
+
+        return LLMLogger
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
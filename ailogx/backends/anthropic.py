@@ -1,8 +1,17 @@
 # ailogx/backends/anthropic.py
 import os
-from anthropic import Anthropic
 
-client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+_client = None
+
+
+def get_client():
+    """The Anthropic client, created (and the SDK imported) on first use."""
+    global _client
+    if _client is None:
+        from anthropic import Anthropic
+
+        _client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    return _client
 
 class Model:
     def __init__(self):
@@ -15,7 +24,7 @@ class Model:
         return self._call_llm(self._get_repair_prompt(), prompt)
     
     def suggest_response(self, prompt: str) -> str:
-        response = client.messages.create(
+        response = get_client().messages.create(
             model=self.model,
             max_tokens=4096,
             system="You are a log Q&A assistant. Help users answer questions from logs.\nStructure your response clearly:\n✓ Summary\n📊 Key Metrics\n🔍 Root Cause\n💡 Suggestion",
@@ -28,7 +37,7 @@ class Model:
 
 
     def _call_llm(self, system_prompt, user_input) -> str:
-        response = client.messages.create(
+        response = get_client().messages.create(
             model=self.model,
             max_tokens=4096,
             system=system_prompt,
@@ -1,8 +1,17 @@
 # ailogx/backends/groq.py
 import os
-from groq import Groq
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+_client = None
+
+
+def get_client():
+    """The Groq client, created (and the SDK imported) on first use."""
+    global _client
+    if _client is None:
+        from groq import Groq
+
+        _client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
 
 class Model:
     def __init__(self):
@@ -15,7 +24,7 @@ class Model:
         return self._call_llm(self._get_repair_prompt(), prompt)
     
     def suggest_response(self, prompt: str) -> str:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": (
@@ -30,7 +39,7 @@ class Model:
 
 
     def _call_llm(self, system_prompt, user_input) -> str:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": system_prompt},
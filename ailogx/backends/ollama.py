@@ -1,8 +1,17 @@
 import os
 import subprocess
-from ollama import Client
 
-client = Client(host='http://localhost:11434')
+_client = None
+
+
+def get_client():
+    """The Ollama client, created (and the SDK imported) on first use."""
+    global _client
+    if _client is None:
+        from ollama import Client
+
+        _client = Client(host='http://localhost:11434')
+    return _client
 
 class Model:
     def __init__(self):
@@ -15,7 +24,7 @@ class Model:
         return self._call_llm(self._get_repair_prompt(), prompt)
 
     def suggest_response(self, prompt: str, model: str = "llama-3.3-70b-versatile") -> str:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": (
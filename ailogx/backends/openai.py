@@ -1,7 +1,16 @@
 import os
-import openai
 
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_client = None
+
+
+def get_client():
+    """The OpenAI client, created (and the SDK imported) on first use."""
+    global _client
+    if _client is None:
+        import openai
+
+        _client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
 
 class Model:
     def __init__(self):
@@ -14,7 +23,7 @@ class Model:
         return self._call_llm(self._get_repair_prompt(), prompt)
     
     def suggest_response(self, prompt: str) -> str:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": (
@@ -29,7 +38,7 @@ class Model:
 
 
     def _call_llm(self, system_prompt, user_input) -> str:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": system_prompt},
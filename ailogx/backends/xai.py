@@ -1,12 +1,21 @@
 # ailogx/backends/xai.py
 import os
-import openai
 
-# xAI uses OpenAI-compatible API
-client = openai.OpenAI(
-    api_key=os.getenv("XAI_API_KEY"),
-    base_url="https://api.x.ai/v1"
-)
+_client = None
+
+
+def get_client():
+    """The xAI client, created (and the SDK imported) on first use."""
+    global _client
+    if _client is None:
+        import openai
+
+        # xAI uses OpenAI-compatible API
+        _client = openai.OpenAI(
+            api_key=os.getenv("XAI_API_KEY"),
+            base_url="https://api.x.ai/v1"
+        )
+    return _client
 
 class Model:
     def __init__(self):
@@ -19,7 +28,7 @@ class Model:
         return self._call_llm(self._get_repair_prompt(), prompt)
     
     def suggest_response(self, prompt: str) -> str:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": (
@@ -34,7 +43,7 @@ class Model:
 
 
     def _call_llm(self, system_prompt, user_input) -> str:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": system_prompt},
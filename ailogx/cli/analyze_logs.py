@@ -1,10 +1,11 @@
 # llm_logger/cli/analyze_logs.py
 import argparse
+from itertools import islice
 from ailogx.analyzers.groq_analyzer import GroqAnalyzer
 from ailogx.analyzers.ollama_analyzer import OllamaAnalyzer
 from ailogx.analyzers.openai_analyzer import OpenAIAnalyzer
 from ailogx.formatters.structured import to_llm_format
-from ailogx.utils import load_jsonl
+from ailogx.utils.reader import iter_logs
 
 def get_analyzer(engine):
     if engine == "groq":
@@ -22,8 +23,8 @@ if __name__ == "__main__":
     parser.add_argument("--prompt", default="Summarize the behavior, decisions, and errors from this log.")
     args = parser.parse_args()
 
-    logs = load_jsonl(args.logfile)
-    text = to_llm_format(logs[:1000])
+    logs = list(islice(iter_logs(args.logfile), 1000))
+    text = to_llm_format(logs)
     analyzer = get_analyzer(args.engine)
 
     print("\n===== LLM Summary =====")
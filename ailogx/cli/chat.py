@@ -1,13 +1,20 @@
 import os
-import json
 import argparse
 import hashlib
 from ailogx.backends.registry import get_analyzer
 from ailogx.utils.cache import get_cached_response, save_response_to_cache
+from ailogx.utils import reader
+from ailogx.utils.parallel import RecordFilter
+from ailogx.utils.preprocess import as_table
+from ailogx.summarizer.templates import DEFAULT_TEMPLATES_PATH, PROMPT_NOTE, TemplateMiner, iter_compressed
+from ailogx.tracebacks import iter_collapsed
+from ailogx.formatters.compact import FORMATS, encode_records
+
+FILTER_COMMANDS = "/smart, /level L1,L2, /since TS, /until TS, /trace ID, /reset"
 
 def load_logs(log_file):
-    with open(log_file) as f:
-        return [json.loads(line) for line in f if line.strip()]
+    """Load a JSONL file, a .gz file or a directory of per-process shards."""
+    return reader.load_logs(log_file)
 
 def format_terminal_response(raw: str):
     lines = raw.strip().splitlines()
@@ -22,9 +29,19 @@ def format_terminal_response(raw: str):
 
     return "\n".join(formatted) if formatted else raw
 
-def chat_query(logs, query):
+def join_logs(logs, miner=None, prompt_format="json"):
+    """
+    Prompt text for `logs` in `prompt_format` (see formatters.compact); with a
+    TemplateMiner, repeated messages are sent once per template.
+    """
+    logs = iter_collapsed(logs)
+    if miner is None:
+        return encode_records(logs, prompt_format)
+    return PROMPT_NOTE + encode_records(iter_compressed(logs, miner), prompt_format)
+
+def chat_query(logs, query, miner=None, prompt_format="json"):
     # print(f"logs = {logs}, query = {query}")
-    joined_logs = "\n".join(json.dumps(log) for log in logs)
+    joined_logs = join_logs(logs, miner, prompt_format)
     cache_key = f"{hashlib.sha1((joined_logs + query).encode()).hexdigest()}"
     cached = get_cached_response(cache_key)
     if cached:
@@ -47,12 +64,33 @@ def chat_query(logs, query):
 
     return result
 
-def chat_loop(logs):
+def apply_filter_command(table, view, command):
+    """Narrow `view` (a LogTable) by one chat filter command; /reset goes back to `table`."""
+    name, _, arg = command[1:].partition(" ")
+    arg = arg.strip()
+    if name == "reset":
+        return table
+    if name == "smart":
+        return view.filter(RecordFilter(smart=True))
+    if name == "level" and arg:
+        return view.filter(RecordFilter(levels=arg.split(",")))
+    if name == "since" and arg:
+        return view.filter(RecordFilter(since=arg))
+    if name == "until" and arg:
+        return view.filter(RecordFilter(until=arg))
+    if name == "trace" and arg:
+        return view.filter(RecordFilter(trace_id=arg))
+    raise ValueError(f"Unknown filter command {command!r} (try {FILTER_COMMANDS})")
+
+def chat_loop(logs, miner=None, prompt_format="json"):
     analyzer = get_analyzer()
-    joined_logs = "\n".join(json.dumps(log) for log in logs)
+    table = view = as_table(logs)
+    joined_logs = join_logs(logs, miner, prompt_format)
     history = []
     print(f"joined = {joined_logs}")
     print("\n🧠 AILogX Terminal\n")
+    if table is not None:
+        print(f"🔎 {len(table)} records. Filter with {FILTER_COMMANDS}\n")
 
     while True:
         question = input("➤ ").strip()
@@ -62,6 +100,20 @@ def chat_loop(logs):
             print("👋 Exiting AILogX Chat.")
             break
 
+        if question.startswith("/"):
+            # Filter commands narrow the records the next questions are about.
+            if table is None:
+                print("⚠️ Filtering needs numpy (pip install 'ailogx[columnar]')")
+                continue
+            try:
+                view = apply_filter_command(table, view, question)
+            except ValueError as e:
+                print(f"❌ {e}")
+                continue
+            joined_logs = join_logs(view, miner, prompt_format)
+            print(f"🔎 {len(view)} records")
+            continue
+
         print("AI is analyzing...")
         print(f"joined = {joined_logs}")
         prompt = (
@@ -91,19 +143,35 @@ def chat_loop(logs):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("logfile", help="Path to log file")
+    parser.add_argument("logfile", help="Path to log file or shard directory")
     parser.add_argument("query", nargs="?", help="Query to ask (optional in interactive mode)")
     parser.add_argument("--interactive", action="store_true", help="Run in interactive terminal mode")
+    parser.add_argument("--templates", nargs="?", const=str(DEFAULT_TEMPLATES_PATH),
+                        help="Send repeated messages once per template (table kept in this file)")
+    parser.add_argument("--prompt-format", choices=FORMATS, default="json",
+                        help="Record encoding in prompts: json, compact or table")
     args = parser.parse_args()
+    miner = TemplateMiner.load(args.templates) if args.templates else None
+
+    # Streamed: the prompt is built straight from the reader, no record list.
+    logs = reader.iter_logs(args.logfile)
+    if args.interactive:
+        # Interactive sessions keep a columnar table so /filters are instant.
+        try:
+            from ailogx.utils.columnar import LogTable
 
-    logs = load_logs(args.logfile)
+            logs = LogTable.from_path(args.logfile)
+        except ImportError:
+            pass
     # print(f"logs = {logs}, query = {args.query}")
     if args.interactive:
-        chat_loop(logs)
+        chat_loop(logs, miner, args.prompt_format)
     elif args.query:
-        print(chat_query(logs, args.query))
+        print(chat_query(logs, args.query, miner, args.prompt_format))
     else:
         print("❌ Please provide either a query or --interactive")
+    if miner is not None:
+        miner.save(args.templates)
 
 if __name__ == "__main__":
     main()
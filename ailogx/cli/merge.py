@@ -0,0 +1,40 @@
+# ailogx/cli/merge.py
+import argparse
+import sys
+from pathlib import Path
+
+from ailogx.utils.reader import iter_merged_lines, shard_paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge per-process log shards into one timestamp-ordered JSONL stream."
+    )
+    parser.add_argument("inputs", nargs="+", help="Shard directories and/or shard files")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    paths = []
+    for item in args.inputs:
+        item = Path(item)
+        paths.extend(shard_paths(item) if item.is_dir() else [item])
+
+    if not paths:
+        print("❌ No shard files found", file=sys.stderr)
+        sys.exit(1)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+    try:
+        for line in iter_merged_lines(paths):
+            out.write(line)
+            count += 1
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"✅ Merged {count} records from {len(paths)} shards", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
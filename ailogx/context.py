@@ -0,0 +1,142 @@
+# ailogx/context.py
+"""
+Trace and span propagation via contextvars.
+
+One module-level LLMLogger can serve many concurrent requests: the active span
+lives in a ContextVar, so every thread and asyncio task sees its own trace_id /
+span_id / parent_span_id. asyncio tasks inherit the context automatically; for
+thread pools, submit work through `contextvars.copy_context().run`.
+
+    from ailogx.context import trace
+
+    with trace():                       # new trace per request
+        log.llm_info("handling request")
+        with log.function_span("load_user"):  # child span
+            ...
+"""
+import contextvars
+import sys
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent", "name")
+
+    def __init__(self, trace_id: str, span_id: str, parent: Optional["Span"] = None,
+                 name: Optional[str] = None):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent = parent
+        self.name = name
+
+    @property
+    def parent_span_id(self) -> Optional[str]:
+        return self.parent.span_id if self.parent is not None else None
+
+    def __repr__(self):
+        return f"Span(trace_id={self.trace_id!r}, span_id={self.span_id!r}, name={self.name!r})"
+
+
+_current_span = contextvars.ContextVar("ailogx_current_span", default=None)
+_open_groups = contextvars.ContextVar("ailogx_open_groups", default=())  # ((span, token), ...)
+
+
+def new_trace_id() -> str:
+    return str(uuid.uuid4())
+
+
+def new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def start_span(name: Optional[str] = None, trace_id: Optional[str] = None):
+    """
+    Open a child of the current span, or the root of a new trace if none is
+    active (or `trace_id` is given), and make it current. Returns
+    `(span, token)`; pass the token to `end_span`.
+    """
+    parent = None if trace_id is not None else _current_span.get()
+    if parent is not None:
+        span = Span(parent.trace_id, new_span_id(), parent, name)
+    else:
+        span = Span(trace_id or new_trace_id(), new_span_id(), None, name)
+    return span, _current_span.set(span)
+
+
+def use_span(span: Span):
+    """
+    Make an already opened span current again, e.g. around each resume of a
+    generator. Returns a token for `end_span`.
+    """
+    return _current_span.set(span)
+
+
+def end_span(token):
+    _current_span.reset(token)
+
+
+def open_group(name: str) -> Span:
+    """
+    Start a span for `start_group`. Groups are not context managers, so the
+    token is kept on a per-context stack of open groups for `close_group`.
+    """
+    span, token = start_span(name)
+    _open_groups.set(_open_groups.get() + ((span, token),))
+    return span
+
+
+def close_group(name: str) -> Optional[Span]:
+    """
+    End the innermost open group called `name`, first ending any groups
+    opened inside it that were left open. Returns None (and changes nothing)
+    if no group of that name is open in this context.
+    """
+    groups = _open_groups.get()
+    for i in range(len(groups) - 1, -1, -1):
+        if groups[i][0].name == name:
+            break
+    else:
+        print(f"⚠️ ailogx: end_group({name!r}) has no matching start_group", file=sys.stderr)
+        return None
+    if i < len(groups) - 1:
+        unclosed = ", ".join(repr(span.name) for span, _ in groups[i + 1:])
+        print(f"⚠️ ailogx: end_group({name!r}) also ends unclosed groups {unclosed}",
+              file=sys.stderr)
+    for span, token in reversed(groups[i:]):
+        try:
+            end_span(token)
+        except ValueError:  # opened in another context (e.g. the task's parent)
+            _current_span.set(span.parent)
+    _open_groups.set(groups[:i])
+    return groups[i][0]
+
+
+@contextmanager
+def trace(trace_id: Optional[str] = None, name: str = "trace"):
+    """Run the block under a new trace (or the given `trace_id`)."""
+    span, token = start_span(name, trace_id=trace_id or new_trace_id())
+    try:
+        yield span
+    finally:
+        end_span(token)
+
+
+@contextmanager
+def span(name: str):
+    """Run the block in a child span of the current one."""
+    child, token = start_span(name)
+    try:
+        yield child
+    finally:
+        end_span(token)
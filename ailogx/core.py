@@ -2,66 +2,398 @@
 """
 LLM-Friendly Logging Library (Core Module)
 """
+import atexit
 import json
+import os
+import sys
+import threading
 import time
 import uuid
-import inspect
+import weakref
 import logging
 import traceback
-from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, List, Optional
+
+# sinks registers its atexit hook before writer does, so at exit the writers
+# drain first and pending gzip jobs are awaited last.
+from .context import close_group, current_span, end_span, open_group, start_span
+from .payload import resolve_payload, truncate_payload
+from .sampling import SamplingPolicy
+from .serialization import RecordEncoder, TimestampCache, safe_dumps
+from .sinks import FileSink, ShardedFileSink
+from .spans import SpanAggregator
+from .writer import SEVERITY_RANK, BackgroundWriter
+
+CALLSITE_MODES = ("never", "errors", "always")
+SPAN_MODES = ("records", "aggregate")
+ERROR_LEVELS = frozenset({"error_reasoning", "function_exit_error", "error", "critical"})
+
+# Frames from these files are never reported as the call site (the stdlib
+# logging machinery sits between LLMLogHandler and the real caller).
+_SKIPPED_SOURCES = {logging.addLevelName.__code__.co_filename}
+
+# code object -> (file, function); filled lazily, one entry per call site function.
+_code_sites = {}
+
+_live_loggers = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all_loggers():
+    # Registered after the writer's drain hook, so it runs first: pending
+    # summaries are queued before the writers stop.
+    for logger in list(_live_loggers):
+        try:
+            logger.flush()
+        except Exception as e:
+            print(f"⚠️ ailogx failed to flush logger {logger.name!r} at exit: {e}", file=sys.stderr)
+
+
+def _reset_locks_after_fork():
+    for logger in list(_live_loggers):
+        logger._write_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_locks_after_fork)
 
 
 class LLMLogger:
-    def __init__(self, name: str, log_path: str = "./llm_logs.jsonl"):
+    def __init__(self, name: str, log_path: str = "./llm_logs.jsonl", *,
+                 async_mode: bool = False, max_queue: int = 10000,
+                 batch_size: int = 256, flush_interval: float = 0.5,
+                 overflow: str = "block", capture_callsite: str = "always",
+                 sink=None, timestamp_resolution: str = "us",
+                 json_backend: str = "auto",
+                 sampling: Optional[SamplingPolicy] = None,
+                 shard_dir: Optional[str] = None, log_format: str = "jsonl",
+                 min_level: Optional[str] = None, payload_budget: Optional[int] = None,
+                 payload_max_depth: int = 6, span_mode: str = "records",
+                 span_stats_interval: float = 10.0,
+                 span_outlier_ms: Optional[float] = None,
+                 dedupe_tracebacks: bool = False):
+        """
+        Records are written through `sink` (default: a `FileSink` on
+        `log_path`, which keeps a buffered handle open between records; they
+        reach the file when its buffer fills, on flush/close and at exit). Pass a
+        configured `FileSink` for buffering, fsync and rotation settings; a
+        sink passed in is shared, so `close()` leaves it open. With
+        `shard_dir`, each process writes its own `ShardedFileSink` file in that
+        directory, named after the `log_path` stem. `log_format="segment"`
+        writes compact binary `.alxs` segments (see `ailogx.segment`) instead
+        of JSONL.
+
+        With `async_mode=True`, `_log` only enqueues the record and a background
+        thread writes batches of up to `batch_size` records, at least every
+        `flush_interval` seconds. Payloads are copied (as plain JSON values)
+        when the record is queued, so later changes to them are not logged. `overflow` decides what happens when
+        `max_queue` records are waiting: "block", "drop_oldest" or
+        "drop_low_severity".
+
+        `capture_callsite` controls whether file/line/function are recorded:
+        "always", only for error levels ("errors"), or "never".
+
+        `timestamp_resolution` ("s", "ms" or "us") bounds how often the
+        timestamp string is re-formatted; `json_backend` picks "orjson",
+        "stdlib" or "auto" (orjson when installed).
+
+        `sampling` (a `SamplingPolicy`) thins out high-volume levels and call
+        sites; suppressed records are reported as periodic summary records.
+        `min_level` drops levels less severe than the given one (by
+        `writer.SEVERITY_RANK`), before any work is done for the record.
+
+        `inputs`/`outputs` may be `payload.Lazy(fn)` wrappers, evaluated only
+        for records that pass the level and sampling checks (plain callables
+        are logged by repr, never called). With
+        `payload_budget`, each of them is truncated to roughly that many bytes
+        of JSON (and `payload_max_depth` levels), keeping type, length and a
+        head sample under a `__truncated__` marker.
+
+        With `span_mode="aggregate"`, `function_span`/`log_span` durations are
+        folded into per-name histograms (see `ailogx.spans`) and written as
+        `span_stats` records every `span_stats_interval` seconds and on
+        flush/close. Only spans that raised or took longer than
+        `span_outlier_ms` are written individually.
+
+        With `dedupe_tracebacks`, tracebacks are fingerprinted (see
+        `ailogx.tracebacks`): the full text is written once per fingerprint
+        per output file, and later records carry only `traceback_id` and
+        the final `exception` line.
+        """
+        if capture_callsite not in CALLSITE_MODES:
+            raise ValueError(f"Unsupported capture_callsite mode: {capture_callsite}")
+        if span_mode not in SPAN_MODES:
+            raise ValueError(f"Unsupported span_mode: {span_mode}")
         self.name = name
-        self.log_path = Path(log_path)
+        self.capture_callsite = capture_callsite
         self.context_id = str(uuid.uuid4())
+        self.sampling = sampling
+        self.min_level = min_level
+        self._min_rank = SEVERITY_RANK[min_level] if min_level else None
+        self.payload_budget = payload_budget
+        self.payload_max_depth = payload_max_depth
+        self.span_mode = span_mode
+        self._spans = (SpanAggregator(span_stats_interval, span_outlier_ms)
+                       if span_mode == "aggregate" else None)
+        # Held from traceback dedup through the sink write: sync callers, the
+        # async writer and an LLMLogHandler's writer may all write batches.
+        self._write_lock = threading.Lock()
+        self._tracebacks = None
+        if dedupe_tracebacks:
+            from .tracebacks import TracebackDeduper
 
-        self.log_path.parent.mkdir(parents=True, exist_ok=True)
-        self.log_path.touch(exist_ok=True)
+            self._tracebacks = TracebackDeduper()
+        self._clock = TimestampCache(timestamp_resolution)
+        self._encoder = RecordEncoder(
+            {"logger": self.name, "context_id": self.context_id},
+            backend=json_backend,
+        )
 
-    def _get_caller_info(self):
-        frame = inspect.currentframe()
-        outer = inspect.getouterframes(frame)[3]  # go 3 frames up
+        self._owns_sink = sink is None
+        if sink is None:
+            if log_format == "segment":
+                if shard_dir is not None:
+                    raise ValueError("shard_dir is only supported for JSONL output")
+                from .segment import SegmentSink
+                sink = SegmentSink(log_path)
+            elif log_format != "jsonl":
+                raise ValueError(f"Unsupported log_format: {log_format}")
+            elif shard_dir is not None:
+                sink = ShardedFileSink(shard_dir, prefix=Path(log_path).stem)
+            else:
+                sink = FileSink(log_path)
+        self.sink = sink
+        self._log_path = Path(log_path)
+
+        self._writer = None
+        if async_mode:
+            self._writer = BackgroundWriter(
+                self._write_batch,
+                max_queue=max_queue,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                overflow=overflow,
+                name=f"ailogx-writer-{name}",
+                on_tick=(self._due_records if sampling is not None or self._spans is not None
+                         else None),
+            )
+        _live_loggers.add(self)
+
+    @property
+    def log_path(self) -> Path:
+        """The file currently being written (changes on fork for sharded sinks)."""
+        return Path(getattr(self.sink, "path", self._log_path))
+
+    def _get_caller_info(self, stacklevel: int = 1):
+        """
+        Walk up only as far as the caller of the public logging method.
+        Frame 0 is this method, 1 is `_log`, 2 is e.g. `llm_info`, so the
+        caller is frame 3; `stacklevel` > 1 skips that many wrapper frames.
+        """
+        try:
+            frame = sys._getframe(2 + stacklevel)
+        except ValueError:
+            return {}
+        while frame is not None and frame.f_code.co_filename in _SKIPPED_SOURCES:
+            frame = frame.f_back
+        if frame is None:
+            return {}
+
+        code = frame.f_code
+        site = _code_sites.get(code)
+        if site is None:
+            site = _code_sites[code] = (code.co_filename, code.co_name)
         return {
-            "file": outer.filename,
-            "line": outer.lineno,
-            "function": outer.function
+            "file": site[0],
+            "line": frame.f_lineno,
+            "function": site[1]
         }
 
     def _get_traceback(self, exc: Optional[BaseException]) -> Optional[str]:
-        return traceback.format_exc() if exc else None
+        if exc is None:
+            return None
+        return "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
 
     def _log(self, level: str, message: str, *, inputs=None, outputs=None,
-             reason=None, summary=None, exception: Exception = None):
-        now = datetime.utcnow().isoformat() + "Z"
-        caller_info = self._get_caller_info()
+             reason=None, summary=None, exception: Exception = None,
+             extra: Optional[dict] = None, stacklevel: int = 1,
+             site: Optional[dict] = None, created: Optional[float] = None, emit=None,
+             lazy_outputs: bool = True):
+        """
+        `site`/`created` supply a known call site and creation time (e.g. from
+        a stdlib LogRecord) instead of inspecting the stack and the clock;
+        `emit` replaces `_emit` for the finished record. With
+        `lazy_outputs=False`, `outputs` is logged as is even if it is a `Lazy`.
+        """
+        if self._min_rank is not None and SEVERITY_RANK.get(level, 1) < self._min_rank:
+            return
+        mode = self.capture_callsite
+        want_site = mode == "always" or (mode == "errors" and level in ERROR_LEVELS)
+        sampling = self.sampling
+        if sampling is not None and level not in sampling.always_keep:
+            if site is None:
+                site = self._get_caller_info(stacklevel) if want_site or sampling.needs_site else {}
+            if not sampling.allow(level, site):
+                if sampling.summaries_due():
+                    self._emit_sampling_summaries()
+                return
+            caller_info = site if want_site else {}
+        elif want_site:
+            caller_info = site if site is not None else self._get_caller_info(stacklevel)
+        else:
+            caller_info = {}
+
+        now = self._clock.now() if created is None else self._clock.format(created)
 
+        # logger/context_id live in the pre-encoded envelope. Outside of any
+        # span the logger's context_id doubles as the trace id, as before.
         log_entry = {
             "timestamp": now,
             "level": level,
-            "logger": self.name,
             "message": message,
-            "context_id": self.context_id,
-            "trace_id" : self.context_id,
-            **caller_info
         }
+        span = current_span()
+        if span is None:
+            log_entry["trace_id"] = self.context_id
+        else:
+            log_entry["trace_id"] = span.trace_id
+            log_entry["span_id"] = span.span_id
+            if span.parent is not None:
+                log_entry["parent_span_id"] = span.parent.span_id
+        log_entry.update(caller_info)
+        if extra:
+            log_entry.update(extra)
 
-        if inputs is not None:
-            log_entry["inputs"] = inputs
-        if outputs is not None:
-            log_entry["outputs"] = outputs
+        # Flat fields go before the nested payloads so projected reads
+        # (reader.project_line) can find them without a full decode.
         if reason is not None:
             log_entry["reason"] = reason
         if summary is not None:
             log_entry["summary"] = summary
+        if inputs is not None:
+            log_entry["inputs"] = self._snapshot(resolve_payload(inputs))
+        if outputs is not None:
+            log_entry["outputs"] = self._snapshot(
+                resolve_payload(outputs) if lazy_outputs else outputs)
         if exception:
             log_entry["traceback"] = self._get_traceback(exception)
 
-        with open(self.log_path, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        (emit or self._emit)(log_entry)
+        if sampling is not None and sampling.summaries_due():
+            self._emit_sampling_summaries()
+        if self._spans is not None and self._spans.stats_due():
+            self._emit_span_stats()
+
+    def _snapshot(self, value):
+        """
+        In async mode, a JSON-plain copy of a payload: the record is encoded
+        later on the writer thread, and must show the payload as it was now.
+        """
+        if self._writer is None or value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return json.loads(safe_dumps(value, self._encoder.dumps))
+
+    def _emit(self, log_entry: dict):
+        if self._writer is not None:
+            self._writer.put(log_entry)
+        else:
+            self._write_batch([log_entry])
+
+    def _sampling_summaries(self) -> List[dict]:
+        now = self._clock.now()
+        return [{"timestamp": now, **summary} for summary in self.sampling.drain_summaries()]
+
+    def _emit_sampling_summaries(self):
+        for summary in self._sampling_summaries():
+            self._emit(summary)
+
+    def _due_records(self) -> List[dict]:
+        """Periodic records whose interval has elapsed; the async writer's tick."""
+        records = []
+        if self.sampling is not None and self.sampling.summaries_due():
+            records += self._sampling_summaries()
+        if self._spans is not None and self._spans.stats_due():
+            records += self._span_stats()
+        return records
+
+    def _span_stats(self) -> List[dict]:
+        now = self._clock.now()
+        return [{"timestamp": now, **stats} for stats in self._spans.drain_stats()]
+
+    def _emit_span_stats(self):
+        for stats in self._span_stats():
+            self._emit(stats)
+
+    def _apply_payload_budget(self, entry: dict) -> dict:
+        for key in ("inputs", "outputs"):
+            if key in entry:
+                entry[key] = truncate_payload(entry[key], self.payload_budget,
+                                              self.payload_max_depth, self._encoder.dumps)
+        return entry
+
+    def _write_batch(self, entries: List[dict]):
+        # Runs on the writer thread in async mode, so truncation stays off the
+        # request path there.
+        if self.payload_budget:
+            entries = [self._apply_payload_budget(entry) for entry in entries]
+        with self._write_lock:
+            self._write_entries(entries)
+
+    def _write_entries(self, entries: List[dict]):
+        if hasattr(self.sink, "write_records"):
+            # record-oriented sinks (segments) do their own encoding
+            if self._tracebacks is not None:
+                self._tracebacks.start(getattr(self.sink, "generation", 0))
+                entries = self._tracebacks.apply(entries)
+            full_record = self._encoder.full_record
+            self.sink.write_records([full_record(entry) for entry in entries])
+            return
+        encode = self._encoder.encode
+        if self._tracebacks is None:
+            self.sink.write("".join(encode(entry) for entry in entries), len(entries))
+        else:
+            self.sink.write(self._encode_deduped(entries), len(entries))
+
+    def _encode_deduped(self, entries: List[dict]) -> str:
+        tracebacks = self._tracebacks
+        encode = self._encoder.encode
+        tracebacks.start(getattr(self.sink, "generation", 0))
+        data = "".join(encode(entry) for entry in tracebacks.apply(entries))
+        rotate_if_due = getattr(self.sink, "rotate_if_due", None)
+        if rotate_if_due is not None and rotate_if_due(len(data.encode("utf-8"))):
+            # This batch opens a new file: it must carry its own traceback texts.
+            tracebacks.start(self.sink.generation)
+            data = "".join(encode(entry) for entry in tracebacks.apply(entries))
+        return data
+
+    @property
+    def dropped(self) -> int:
+        """Records discarded by the async overflow policy or lost to failed writes."""
+        return self._writer.dropped if self._writer is not None else 0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every record logged so far is on disk."""
+        if self.sampling is not None:
+            self._emit_sampling_summaries()
+        if self._spans is not None:
+            self._emit_span_stats()
+        if self._writer is not None and not self._writer.flush(timeout):
+            return False
+        self.sink.flush()
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Drain pending records, stop the background writer and close the sink."""
+        if self.sampling is not None:
+            self._emit_sampling_summaries()
+        if self._spans is not None:
+            self._emit_span_stats()
+        if self._writer is not None:
+            self._writer.close(timeout)
+        if self._owns_sink:
+            self.sink.close()
+        _live_loggers.discard(self)
 
     def llm_info(self, message: str, **kwargs):
         self._log("info", message, **kwargs)
@@ -78,39 +410,89 @@ class LLMLogger:
     def llm_expected(self, message: str, **kwargs):
         self._log("expected_behavior", message, **kwargs)
 
-    def start_group(self, name: str, reason: Optional[str] = None):
-        self._log("group_start", f"Start group: {name}", reason=reason)
+    def start_group(self, name: str, reason: Optional[str] = None, stacklevel: int = 1):
+        # A top-level group starts a new trace; nested groups are child spans.
+        open_group(name)
+        self._log("group_start", f"Start group: {name}", reason=reason, stacklevel=stacklevel)
 
-    def end_group(self, name: str):
-        self._log("group_end", f"End group: {name}")
+    def end_group(self, name: str, stacklevel: int = 1):
+        self._log("group_end", f"End group: {name}", stacklevel=stacklevel)
+        close_group(name)
 
-    def function_span(self, name: str, reason: Optional[str] = None):
-        return _FunctionSpanLogger(self, name, reason)
+    def function_span(self, name: str, reason: Optional[str] = None, stacklevel: int = 1):
+        return _FunctionSpanLogger(self, name, reason, stacklevel)
+
+    def log_span(self, name: str, duration_ns: int, *, error: Optional[BaseException] = None,
+                 inputs=None, outputs=None, reason: Optional[str] = None, stacklevel: int = 1,
+                 lazy_outputs: bool = True, **fields):
+        """
+        Write one record for a finished span: `function_span` on success,
+        `function_exit_error` (with traceback) if `error` is set. Replaces the
+        entry/exit pair when the caller measured the duration itself.
+        `lazy_outputs=False` logs `outputs` without resolving a `Lazy` (for
+        return values, which are data, not payload thunks).
+
+        In aggregate span mode the duration only feeds the span histograms,
+        unless the span raised or is an outlier.
+        """
+        spans = self._spans
+        if spans is not None:
+            if not spans.record(name, duration_ns, error is not None):
+                if spans.stats_due():
+                    self._emit_span_stats()
+                return
+            if error is None:
+                fields["outlier"] = True
+        duration_ms = duration_ns / 1e6
+        extra = {"span_name": name, "duration_ms": round(duration_ms, 3), **fields}
+        if error is None:
+            self._log("function_span", f"{name} finished in {duration_ms:.2f}ms",
+                      inputs=inputs, outputs=outputs, reason=reason, extra=extra,
+                      stacklevel=stacklevel, lazy_outputs=lazy_outputs)
+        else:
+            self._log("function_exit_error",
+                      f"{name} raised {type(error).__name__} after {duration_ms:.2f}ms",
+                      inputs=inputs, reason=reason or str(error), exception=error,
+                      extra=extra, stacklevel=stacklevel)
 
 
 class _FunctionSpanLogger:
-    def __init__(self, logger: LLMLogger, name: str, reason: Optional[str] = None):
+    def __init__(self, logger: LLMLogger, name: str, reason: Optional[str] = None,
+                 stacklevel: int = 1):
         self.logger = logger
         self.name = name
         self.reason = reason
+        self.stacklevel = stacklevel
 
     def __enter__(self):
-        self.start_time = time.time()
-        self.logger._log("function_entry", f"Entering function: {self.name}", reason=self.reason)
+        self.span, self._token = start_span(self.name)
+        if self.logger._spans is None:
+            self.logger._log("function_entry", f"Entering function: {self.name}",
+                             reason=self.reason, stacklevel=self.stacklevel)
+        self.start_ns = time.perf_counter_ns()
         return self
 
     def __exit__(self, exc_type, exc_value, tb):
-        elapsed = time.time() - self.start_time
-        message = f"Exiting function: {self.name} after {elapsed:.2f}s"
-        if exc_type:
-            self.logger._log(
-                "function_exit_error",
-                message,
-                reason=str(exc_value),
-                exception=exc_value
-            )
-        else:
-            self.logger._log("function_exit", message)
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        try:
+            if self.logger._spans is not None:
+                # one frame deeper: log_span sits between us and _log
+                self.logger.log_span(self.name, duration_ns, error=exc_value,
+                                     reason=self.reason, stacklevel=self.stacklevel + 1)
+                return
+            message = f"Exiting function: {self.name} after {duration_ns / 1e9:.2f}s"
+            if exc_type:
+                self.logger._log(
+                    "function_exit_error",
+                    message,
+                    reason=str(exc_value),
+                    exception=exc_value,
+                    stacklevel=self.stacklevel
+                )
+            else:
+                self.logger._log("function_exit", message, stacklevel=self.stacklevel)
+        finally:
+            end_span(self._token)
 
 
 # === Test Harness Simulation ===
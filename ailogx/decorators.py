@@ -1,23 +1,209 @@
 # llm_logger/decorators.py
-from functools import wraps
 import inspect
+import time
+from functools import wraps
+from typing import Optional
+
+from .context import end_span, start_span, use_span
 from .core import LLMLogger
+from .payload import Lazy
+
+CAPTURE_POLICIES = ("none", "names", "repr", "full")
+
+_default_logger = None
+
+
+def get_default_logger() -> LLMLogger:
+    """The shared "decorated" logger, created on first use rather than at import."""
+    global _default_logger
+    if _default_logger is None:
+        _default_logger = LLMLogger("decorated")
+    return _default_logger
+
+
+def __getattr__(name):
+    # Backwards compatibility for `from ailogx.decorators import llmlogger`.
+    if name == "llmlogger":
+        return get_default_logger()
+    raise AttributeError(name)
+
+
+def _make_capture(func, capture: str, max_repr: int):
+    """
+    Precompute everything that depends only on the signature, and return
+    `capture(args, kwargs)` producing the `inputs` payload (or None).
+    """
+    if capture not in CAPTURE_POLICIES:
+        raise ValueError(f"Unsupported capture policy: {capture}")
+    if capture == "none":
+        return lambda args, kwargs: None
+
+    params = inspect.signature(func).parameters.values()
+    positional = tuple(
+        p.name for p in params
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+    )
+    var_positional = next((p.name for p in params if p.kind == p.VAR_POSITIONAL), None)
+    n_positional = len(positional)
+
+    def bind(args, kwargs):
+        bound = dict(zip(positional, args))
+        if len(args) > n_positional and var_positional:
+            bound[var_positional] = args[n_positional:]
+        bound.update(kwargs)
+        return bound
+
+    if capture == "names":
+        return lambda args, kwargs: list(positional[:len(args)]) + list(kwargs)
+
+    if capture == "repr":
+        def capture_repr(args, kwargs):
+            # Lazy: only rendered if the record is actually written.
+            return Lazy(lambda: {k: _short_repr(v, max_repr) for k, v in bind(args, kwargs).items()})
+        return capture_repr
+
+    return bind
+
+
+def _short_repr(value, limit: int) -> str:
+    try:
+        text = repr(value)
+    except Exception:
+        text = f"<{type(value).__name__}>"
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def llm_logged(reason=None, *, logger: Optional[LLMLogger] = None, capture: str = "names",
+               capture_output: bool = True, max_repr: int = 200):
+    """
+    Log one `function_span` record per call (duration, inputs per `capture`,
+    return value) or one `function_exit_error` record if it raises.
 
-llmlogger = LLMLogger("decorated")
+    Works on plain functions, coroutines, generators and async generators.
+    `capture`: "none", "names" (argument names only), "repr" (truncated
+    reprs) or "full" (the values). Usable as `@llm_logged` or
+    `@llm_logged(reason=..., logger=...)`.
+    """
+    if callable(reason):
+        return llm_logged()(reason)
 
-def llm_logged(reason=None):
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            inputs = dict(zip(inspect.signature(func).parameters, args))
-            inputs.update(kwargs)
-            with llmlogger.function_span(func.__name__, reason=reason):
+        name = func.__qualname__
+        capture_inputs = _make_capture(func, capture, max_repr)
+
+        def log(start, inputs, error=None, outputs=None, span=None, **fields):
+            duration = time.perf_counter_ns() - start
+            target = logger or get_default_logger()
+            token = use_span(span) if span is not None else None
+            try:
+                target.log_span(name, duration, error=error, inputs=inputs,
+                                outputs=outputs if capture_output else None,
+                                reason=reason, stacklevel=3, lazy_outputs=False, **fields)
+            finally:
+                if token is not None:
+                    end_span(token)
+
+        # Generators: the span is opened on the first resume and is current
+        # only while the generator body runs, not while the consumer holds it.
+        if inspect.isasyncgenfunction(func):
+            @wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                inputs = capture_inputs(args, kwargs)
+                span, token = start_span(name)
+                end_span(token)
+                start = time.perf_counter_ns()
+                items = 0
+                agen = func(*args, **kwargs)
                 try:
-                    output = func(*args, **kwargs)
-                    llmlogger.llm_info(f"{func.__name__} returned", outputs=output)
-                    return output
+                    while True:
+                        token = use_span(span)
+                        try:
+                            item = await agen.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            end_span(token)
+                        items += 1
+                        yield item
                 except Exception as e:
-                    llmlogger.llm_error(f"{func.__name__} raised exception", reason=str(e))
+                    log(start, inputs, error=e, span=span, items=items)
                     raise
+                else:
+                    log(start, inputs, span=span, items=items)
+            return async_gen_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def gen_wrapper(*args, **kwargs):
+                inputs = capture_inputs(args, kwargs)
+                span, token = start_span(name)
+                end_span(token)
+                start = time.perf_counter_ns()
+                items = 0
+                gen = func(*args, **kwargs)
+
+                def resume(method, *arg):
+                    token = use_span(span)
+                    try:
+                        return method(*arg)
+                    finally:
+                        end_span(token)
+
+                try:
+                    # forward send()/throw() like `yield from`, but count items
+                    item = resume(next, gen)
+                    while True:
+                        items += 1
+                        try:
+                            sent = yield item
+                        except GeneratorExit:
+                            resume(gen.close)
+                            log(start, inputs, span=span, items=items, closed_early=True)
+                            raise
+                        except BaseException as e:
+                            item = resume(gen.throw, e)
+                        else:
+                            item = resume(gen.send, sent) if sent is not None else resume(next, gen)
+                except StopIteration as stop:
+                    log(start, inputs, outputs=stop.value, span=span, items=items)
+                    return stop.value
+                except Exception as e:
+                    log(start, inputs, error=e, span=span, items=items)
+                    raise
+            return gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                inputs = capture_inputs(args, kwargs)
+                _, token = start_span(name)
+                start = time.perf_counter_ns()
+                try:
+                    output = await func(*args, **kwargs)
+                except Exception as e:
+                    log(start, inputs, error=e)
+                    raise
+                else:
+                    log(start, inputs, outputs=output)
+                    return output
+                finally:
+                    end_span(token)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            inputs = capture_inputs(args, kwargs)
+            _, token = start_span(name)
+            start = time.perf_counter_ns()
+            try:
+                output = func(*args, **kwargs)
+            except Exception as e:
+                log(start, inputs, error=e)
+                raise
+            else:
+                log(start, inputs, outputs=output)
+                return output
+            finally:
+                end_span(token)
         return wrapper
     return decorator
@@ -0,0 +1,164 @@
+# ailogx/follow.py
+"""
+Incremental reading of a growing JSONL log.
+
+A `Checkpoint` remembers the inode and byte offset up to which a log has been
+processed (plus an optional rolling summary). `read_new` returns only the
+complete lines appended since then and the advanced checkpoint:
+
+- same inode, larger file: read from the offset;
+- same inode but smaller, or with different leading bytes: the file was
+  truncated (and maybe refilled), start again at 0;
+- new inode: the file was rotated. The rest of the old file is read from the
+  rotated copy (found by inode, or the newest `.gz` archive of the same stem
+  written after the checkpoint), then the new file from 0.
+
+`follow` is the `tail -f` variant: it polls the file and calls back with a
+window of records every N records or N seconds.
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from ailogx.utils.reader import ReadStats, open_log, parse_line
+
+CHECKPOINT_SUFFIX = ".ailogx-checkpoint.json"
+_HEAD_BYTES = 4096
+
+
+def checkpoint_path_for(log_path) -> Path:
+    return Path(str(log_path) + CHECKPOINT_SUFFIX)
+
+
+def _head_digest(path, offset: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(min(offset, _HEAD_BYTES))).hexdigest()
+
+
+class Checkpoint:
+    def __init__(self, inode: Optional[int] = None, offset: int = 0,
+                 rolling_summary: Optional[str] = None, updated: float = 0.0,
+                 head: Optional[str] = None):
+        self.inode = inode
+        self.offset = offset
+        self.head = head
+        self.rolling_summary = rolling_summary
+        self.updated = updated
+
+    @classmethod
+    def load(cls, path) -> "Checkpoint":
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        return cls(data.get("inode"), data.get("offset", 0),
+                   data.get("rolling_summary"), data.get("updated", 0.0), data.get("head"))
+
+    def save(self, path):
+        tmp = Path(str(path) + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"inode": self.inode, "offset": self.offset, "head": self.head,
+                       "rolling_summary": self.rolling_summary,
+                       "updated": self.updated}, f)
+        os.replace(tmp, path)
+
+
+def _read_tail(path, offset: int, stats: ReadStats) -> Tuple[List[dict], int]:
+    """Records from the complete lines after `offset`, and the offset after the last one."""
+    records = []
+    with open_log(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # still being written; pick it up next time
+            offset += len(raw)
+            if raw.strip():
+                record = parse_line(raw.decode("utf-8", errors="replace"), stats)
+                if record is not None:
+                    records.append(record)
+    return records, offset
+
+
+def _rotated_copy(log_path: Path, checkpoint: Checkpoint) -> Optional[Path]:
+    """Where the checkpointed file went after rotation, if it can be found."""
+    stem = log_path.name.split(".", 1)[0]
+    siblings = [p for p in log_path.parent.glob(f"{stem}.*")
+                if p.is_file() and p != log_path and not p.name.endswith(CHECKPOINT_SUFFIX)]
+    for p in siblings:
+        if p.stat().st_ino == checkpoint.inode:
+            return p
+    archives = [p for p in siblings
+                if p.name.endswith(".gz") and p.stat().st_mtime >= checkpoint.updated]
+    return max(archives, key=lambda p: p.stat().st_mtime) if archives else None
+
+
+def read_new(log_path, checkpoint: Checkpoint,
+             stats: Optional[ReadStats] = None) -> Tuple[List[dict], Checkpoint]:
+    """Records appended since `checkpoint`, and the checkpoint to save afterwards."""
+    log_path = Path(log_path)
+    stats = stats if stats is not None else ReadStats()
+    records = []
+    st = log_path.stat()
+    offset = checkpoint.offset
+
+    if checkpoint.inode is not None and checkpoint.inode != st.st_ino:
+        rotated = _rotated_copy(log_path, checkpoint)
+        if rotated is not None:
+            records, _ = _read_tail(rotated, offset, stats)
+        offset = 0
+    elif st.st_size < offset or (checkpoint.head is not None
+                                 and _head_digest(log_path, offset) != checkpoint.head):
+        offset = 0  # truncated in place
+
+    new_records, offset = _read_tail(log_path, offset, stats)
+    records.extend(new_records)
+    return records, Checkpoint(st.st_ino, offset, checkpoint.rolling_summary, time.time(),
+                               _head_digest(log_path, offset))
+
+
+def follow(log_path, on_window: Callable[[List[dict], Checkpoint], Optional[str]],
+           checkpoint_path=None, every_records: int = 500, every_seconds: float = 60.0,
+           poll_interval: float = 1.0, stats: Optional[ReadStats] = None):
+    """
+    Poll `log_path` forever. Whenever `every_records` new records have
+    accumulated, or `every_seconds` passed with at least one, call
+    `on_window(records, checkpoint)`; its return value (if any) becomes the
+    checkpoint's rolling summary, and the checkpoint is saved.
+    """
+    checkpoint_path = checkpoint_path or checkpoint_path_for(log_path)
+    checkpoint = Checkpoint.load(checkpoint_path)
+    pending = []
+    window_start = time.monotonic()
+    while True:
+        records, checkpoint_next = read_new(log_path, checkpoint, stats)
+        pending.extend(records)
+        checkpoint = checkpoint_next
+        if pending and (len(pending) >= every_records
+                        or time.monotonic() - window_start >= every_seconds):
+            summary = on_window(pending, checkpoint)
+            if summary is not None:
+                checkpoint.rolling_summary = summary
+            checkpoint.save(checkpoint_path)
+            pending = []
+            window_start = time.monotonic()
+        elif not pending:
+            window_start = time.monotonic()
+        time.sleep(poll_interval)
+
+
+def roll_summary(analyzer, previous: Optional[str], window_summary: str) -> str:
+    """Fold the summary of a new window into the carried-forward one."""
+    if not previous:
+        return window_summary
+    prompt = (
+        "You maintain a running summary of a live application log.\n\n"
+        f"Summary so far:\n{previous}\n\n"
+        f"New activity since then:\n{window_summary}\n\n"
+        "Rewrite the summary so far to include the new activity. Keep open "
+        "errors and their likely causes; drop resolved noise."
+    )
+    return analyzer.summarize_logs(prompt).strip()
@@ -0,0 +1,225 @@
+# ailogx/formatters/compact.py
+"""
+Token-efficient prompt encodings for log records (`--prompt-format`).
+
+    json     one `json.dumps(record)` per line (the original prompt format)
+    compact  compact JSON lines (no spaces after separators) under a short
+             header
+    table    a header-once table: the column names, then one `|`-separated
+             row per record
+
+Both `compact` and `table` encode each chunk of records as a unit:
+
+- `timestamp` becomes `t`, the seconds after the chunk's first timestamp
+  (`t0` in the header);
+- long ids and paths (`ALIAS_FIELDS`) that occur more than once are replaced
+  by `@1`, `@2`, ..., defined once in an `aliases` header line;
+- fields with the same value on every record move to a `common` header line
+  and are omitted from the records.
+
+`iter_prompt_chunks` packs records into chunks of at most `max_tokens`,
+measured on the encoded text, so a smaller encoding also means fewer chunks.
+"""
+import json
+from typing import Iterable, Iterator, List, Optional
+
+from ailogx.segment import parse_timestamp
+from ailogx.utils.tokenizer import chunk_by_tokens, counter_for
+
+FORMATS = ("json", "compact", "table")
+ALIAS_FIELDS = frozenset({"context_id", "trace_id", "span_id", "parent_span_id", "file",
+                          "logger_name", "traceback_id", "group_id"})
+ALIAS_MIN_LENGTH = 12
+_MISSING = object()
+# Table columns come in this order, then any others in first-seen order.
+_COLUMN_ORDER = ("t", "level", "message", "function", "file", "line", "reason", "summary",
+                 "inputs", "outputs", "exception")
+
+FORMAT_NOTES = {
+    "compact": ("Records are compact JSON lines. \"t\" is seconds after t0, @n values are "
+                "the aliases listed above, and \"common\" fields apply to every record.\n"),
+    "table": ("Records are table rows: cells follow the columns line and are separated by |. "
+              "\"t\" is seconds after t0, @n values are the aliases listed above, and "
+              "\"common\" fields apply to every row.\n"),
+}
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _aliasable(field: str, value) -> bool:
+    return field in ALIAS_FIELDS and isinstance(value, str) and len(value) >= ALIAS_MIN_LENGTH
+
+
+class _Chunk:
+    """Records of one chunk, with the aliases, time base and common fields that encode them."""
+
+    def __init__(self, fmt: str = "compact"):
+        self.fmt = fmt
+        self.records: List[dict] = []
+        self.seen = {}  # aliasable value -> occurrences so far
+        self.common = {}  # fields every record so far shares (taken from the first)
+        self.t0 = None  # (epoch ns, original string) of the first timestamp
+        self._undo = None  # (aliasable values counted, common fields dropped, set t0)
+
+    def _relative(self, stamp) -> Optional[float]:
+        parsed = parse_timestamp(stamp)
+        if parsed is None:
+            return None
+        if self.t0 is None:
+            self.t0 = (parsed[0], stamp)
+        return round((parsed[0] - self.t0[0]) / 1e9, 3)
+
+    def _text(self, row: dict) -> str:
+        if self.fmt == "table":
+            return "|".join(_cell(value) for value in row.values())
+        return _dumps(row)
+
+    def add(self, record: dict) -> List[tuple]:
+        """
+        Adds a record. Returns what it costs the chunk as (text, times)
+        pairs: its provisional line, plus fields that stop being common and
+        so reappear on every earlier record.
+        """
+        set_t0 = self.t0 is None
+        row = {}
+        for field, value in record.items():
+            if field == "timestamp":
+                t = self._relative(value)
+                if t is not None:
+                    row["t"] = t
+                    continue
+            row[field] = value
+        first = not self.records
+        self.records.append(row)
+
+        counted, shown = [], {}
+        for field, value in row.items():
+            if _aliasable(field, value):
+                n = self.seen.get(value, 0)
+                self.seen[value] = n + 1
+                counted.append(value)
+                if n:
+                    value = "@0"  # same size as its eventual alias
+            shown[field] = value
+
+        costs = []
+        dropped = {}
+        if first:
+            self.common = {f: v for f, v in row.items()
+                           if f != "t" and not isinstance(v, (dict, list))}
+            costs.append((self._text({f: shown[f] for f in self.common}), 1))  # the header
+        else:
+            for field, value in list(self.common.items()):
+                if row.get(field, _MISSING) != value:
+                    dropped[field] = self.common.pop(field)
+            if dropped:
+                costs.append((self._text(dropped), len(self.records) - 1))
+        costs.append((self._text({f: v for f, v in shown.items() if f not in self.common}), 1))
+        self._undo = (counted, dropped, set_t0)
+        return costs
+
+    def pop(self):
+        """Takes back the record just added."""
+        self.records.pop()
+        counted, dropped, set_t0 = self._undo
+        for value in counted:
+            self.seen[value] -= 1
+        self.common.update(dropped)
+        if set_t0:
+            self.t0 = None
+
+    def render(self) -> str:
+        records = self.records
+        common = self.common if len(records) > 1 else {}
+        aliases = {}
+        for value, n in self.seen.items():
+            if n > 1:
+                aliases[value] = f"@{len(aliases) + 1}"
+
+        def show(field, value):
+            if _aliasable(field, value):
+                return aliases.get(value, value)
+            return value
+
+        header = []
+        if self.t0 is not None:
+            header.append(f"t0: {self.t0[1]}")
+        if aliases:
+            header.append("aliases: " + _dumps({alias: value for value, alias in aliases.items()}))
+        if common:
+            header.append("common: " + _dumps({f: show(f, v) for f, v in common.items()}))
+        rows = [{f: show(f, v) for f, v in r.items() if f not in common} for r in records]
+        if self.fmt == "table":
+            return "\n".join(header + _table(rows))
+        return "\n".join(header + [_dumps(row) for row in rows])
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    text = value if isinstance(value, str) else _dumps(value)
+    return text.replace("\\", "\\\\").replace("|", "\\|").replace("\n", "\\n")
+
+
+def _table(rows: List[dict]) -> List[str]:
+    present = dict.fromkeys(field for row in rows for field in row)
+    columns = [c for c in _COLUMN_ORDER if c in present]
+    columns += [c for c in present if c not in columns]
+    lines = ["columns: " + "|".join(columns)]
+    for row in rows:
+        cells = [_cell(row.get(c)) for c in columns]
+        while cells and not cells[-1]:
+            cells.pop()
+        lines.append("|".join(cells))
+    return lines
+
+
+def _as_record(log) -> dict:
+    if isinstance(log, str):  # e.g. lines from summarizer.templates
+        try:
+            log = json.loads(log)
+        except ValueError:
+            return {"message": log}
+    return log if isinstance(log, dict) else {"message": log}
+
+
+def encode_records(logs: Iterable, fmt: str = "compact") -> str:
+    """One prompt block for `logs` (dicts or JSON lines) in format `fmt`, note included."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported prompt format: {fmt}")
+    if fmt == "json":
+        return "\n".join(log if isinstance(log, str) else json.dumps(log) for log in logs)
+    chunk = _Chunk(fmt)
+    for log in logs:
+        chunk.add(_as_record(log))
+    return FORMAT_NOTES[fmt] + chunk.render()
+
+
+def iter_prompt_chunks(logs: Iterable, fmt: str = "compact", model: str = "gpt-4",
+                       max_tokens: int = 3000, counter=None) -> Iterator[str]:
+    """
+    Prompt blocks of at most about `max_tokens` tokens each (the budget
+    covers the records; the short header and note come on top). Streams.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported prompt format: {fmt}")
+    if fmt == "json":
+        for lines in chunk_by_tokens(logs, model=model, max_tokens=max_tokens, counter=counter):
+            yield "\n".join(lines)
+        return
+    count = (counter or counter_for(model)).count
+    chunk, used = _Chunk(fmt), 0
+    for log in logs:
+        record = _as_record(log)
+        tokens = sum(count(text) * times for text, times in chunk.add(record))
+        if used and used + tokens > max_tokens:
+            chunk.pop()
+            yield FORMAT_NOTES[fmt] + chunk.render()
+            chunk = _Chunk(fmt)
+            tokens = sum(count(text) * times for text, times in chunk.add(record))
+            used = 0
+        used += tokens
+    if chunk.records:
+        yield FORMAT_NOTES[fmt] + chunk.render()
@@ -1,21 +1,86 @@
 # llm_logger/handlers.py
 import logging
+from typing import Optional
+
 from .core import LLMLogger
+from .writer import BackgroundWriter
+
+
+def _llm_level(levelno: int) -> str:
+    if levelno >= logging.ERROR:
+        return "error_reasoning"
+    if levelno >= logging.WARNING:
+        return "decision_point"
+    if levelno >= logging.INFO:
+        return "context_info"
+    return "info"
+
 
 class LLMLogHandler(logging.Handler):
-    def __init__(self, llm_logger=None):
-        super().__init__()
-        self.llm_logger = llm_logger or LLMLogger("llm_bridge")
+    """
+    Bridge stdlib `logging` into an LLMLogger.
+
+    File, line, function, creation time and `exc_info` are taken from the
+    LogRecord itself, so no stack inspection happens. `emit` only builds the
+    record and enqueues it; writes happen in batches on a background thread
+    (the logger's own writer in async mode, otherwise one owned by the
+    handler). Call `flush()` or `close()` to drain it.
+    """
+
+    def __init__(self, llm_logger: Optional[LLMLogger] = None, level=logging.NOTSET, *,
+                 max_queue: int = 10000, batch_size: int = 256,
+                 flush_interval: float = 0.5, overflow: str = "block"):
+        super().__init__(level)
+        self._owns_logger = llm_logger is None
+        self.llm_logger = llm_logger or LLMLogger(
+            "llm_bridge", async_mode=True, max_queue=max_queue, batch_size=batch_size,
+            flush_interval=flush_interval, overflow=overflow,
+        )
+        self._writer = None
+        if self.llm_logger._writer is None:
+            self._writer = BackgroundWriter(
+                self.llm_logger._write_batch,
+                max_queue=max_queue,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                overflow=overflow,
+                name=f"ailogx-handler-{self.llm_logger.name}",
+            )
+        self._put = self._writer.put if self._writer is not None else None
 
     def emit(self, record):
-        msg = self.format(record)
-        level = record.levelname.lower()
-
-        if level == "error":
-            self.llm_logger.llm_error(msg)
-        elif level == "warning":
-            self.llm_logger.llm_decision(msg)
-        elif level == "info":
-            self.llm_logger.llm_context(msg)
+        try:
+            # Only run the formatter if one was configured; the traceback is
+            # recorded separately, so the plain message is enough otherwise.
+            msg = self.format(record) if self.formatter is not None else record.getMessage()
+            exception = record.exc_info[1] if record.exc_info else None
+            self.llm_logger._log(
+                _llm_level(record.levelno), msg,
+                exception=exception,
+                extra={"logger_name": record.name},
+                site={"file": record.pathname, "line": record.lineno,
+                      "function": record.funcName},
+                created=record.created,
+                emit=self._put,
+            )
+        except Exception:
+            self.handleError(record)
+
+    @property
+    def dropped(self) -> int:
+        """Records discarded by the queue's overflow policy."""
+        return self._writer.dropped if self._writer is not None else self.llm_logger.dropped
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        if self._writer is not None and not self._writer.flush(timeout):
+            return False
+        return self.llm_logger.flush(timeout)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._owns_logger:
+            self.llm_logger.close()
         else:
-            self.llm_logger.llm_info(msg)
+            self.llm_logger.flush()
+        super().close()
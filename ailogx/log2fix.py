@@ -5,6 +5,8 @@ from ailogx.indexer import index_codebase
 from ailogx.repair_context import extract_context_for_log
 from ailogx.repairer import suggest_patch, format_patch_prompt
 from ailogx.backends.registry import get_analyzer
+from ailogx.utils.reader import iter_logs
+from ailogx.formatters.compact import FORMATS
 
 def main():
     parser = argparse.ArgumentParser()
@@ -12,6 +14,8 @@ def main():
     parser.add_argument("--root", required=True, help="Root of codebase to index")
     parser.add_argument("--output", required=True, help="Dir to store patches")
     parser.add_argument("--model", default="openai", help="Backend model (openai/groq/ollama)")
+    parser.add_argument("--prompt-format", choices=FORMATS,
+                        help="Encode the failing record as json, compact or table (default: as is)")
     args = parser.parse_args()
 
     os.makedirs(args.output, exist_ok=True)
@@ -21,9 +25,9 @@ def main():
 
     # 2. Load logs
 
-    with open(args.logs) as f:
-        logs = [json.loads(l) for l in f]
+    logs = iter_logs(args.logs)
 
+    llm = None
     for i, log in enumerate(logs):
         # print(f"here log = {log}")
         if log.get("level") != "error_reasoning":
@@ -36,10 +40,10 @@ def main():
 
         # 4. Ask LLM for fix
         # patch = suggest_patch(log, context, backend=args.model)
-        llm = get_analyzer()
+        llm = llm or get_analyzer()
 
         # summary = llm.summarize_logs(f"log : {log} and context : {context}")
-        final_log = format_patch_prompt(log, context)
+        final_log = format_patch_prompt(log, context, args.prompt_format)
 
         print(f"the prompt for the llm is : {final_log}")
         fix = llm.suggest_fix(final_log)
@@ -0,0 +1,131 @@
+# ailogx/payload.py
+"""
+Payload helpers for `inputs` / `outputs`.
+
+- Lazy payloads: wrap a zero-argument callable in `Lazy` and it is only
+  evaluated if the record is actually going to be written. Any other
+  callable is a plain value: it is logged by its repr and never called.
+- Size budget: `truncate_payload` replaces deep or large structures with a
+  marker dict that keeps the type, the length and a head sample, so one big
+  DataFrame or response body cannot turn a record into megabytes.
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from .serialization import get_dumps, safe_dumps
+
+TRUNCATED = "__truncated__"
+
+
+class Lazy:
+    """A payload computed on demand: `inputs=Lazy(lambda: df.to_dict("records"))`."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __repr__(self):
+        return f"Lazy({self.fn!r})"
+
+
+def resolve_payload(value):
+    """Evaluate a `Lazy` payload; anything else is returned as is."""
+    if isinstance(value, Lazy):
+        try:
+            return value.fn()
+        except Exception as e:
+            return f"<payload evaluation failed: {type(e).__name__}: {e}>"
+    return value
+
+
+def _length(value):
+    try:
+        return len(value)
+    except Exception:
+        return None
+
+
+def _marker(value, head) -> dict:
+    marker = {TRUNCATED: True, "type": type(value).__name__}
+    length = _length(value)
+    if length is not None:
+        marker["length"] = length
+    marker["head"] = head
+    return marker
+
+
+def _estimate(value, limit: int, depth: int, max_depth: int) -> int:
+    """Rough encoded size, giving up as soon as it exceeds `limit` or `max_depth`."""
+    if isinstance(value, str):
+        return len(value) + 2
+    if value is None or isinstance(value, (bool, int, float)):
+        return 8
+    if isinstance(value, dict):
+        if depth >= max_depth:
+            return limit + 1
+        total = 2
+        for k, v in value.items():
+            total += len(str(k)) + 4 + _estimate(v, limit - total, depth + 1, max_depth)
+            if total > limit:
+                break
+        return total
+    if isinstance(value, (list, tuple, set, frozenset)):
+        if depth >= max_depth:
+            return limit + 1
+        total = 2
+        for item in value:
+            total += 2 + _estimate(item, limit - total, depth + 1, max_depth)
+            if total > limit:
+                break
+        return total
+    if isinstance(value, (datetime, date, time, Decimal, UUID)):
+        return 40
+    # Anything else is encoded via its repr or a library conversion; assume large.
+    return limit + 1
+
+
+def _shrink(value, depth: int, max_depth: int, max_items: int, max_str: int):
+    if isinstance(value, str):
+        return value if len(value) <= max_str else _marker(value, value[:max_str])
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        if depth >= max_depth:
+            return _marker(value, list(map(str, list(value)[:max_items])))
+        items = list(value.items())
+        shrunk = {str(k): _shrink(v, depth + 1, max_depth, max_items, max_str)
+                  for k, v in items[:max_items]}
+        if len(items) > max_items:
+            return _marker(value, shrunk)
+        return shrunk
+    if isinstance(value, (list, tuple, set, frozenset)):
+        if depth >= max_depth:
+            return _marker(value, [])
+        items = value if isinstance(value, (list, tuple)) else list(value)
+        shrunk = [_shrink(v, depth + 1, max_depth, max_items, max_str) for v in items[:max_items]]
+        return _marker(value, shrunk) if len(items) > max_items else shrunk
+    text = safe_dumps(value)
+    if len(text) <= max_str:
+        return value
+    return _marker(value, text[:max_str])
+
+
+def truncate_payload(value: Any, max_bytes: int, max_depth: int = 6, dumps=None) -> Any:
+    """
+    Return `value` unchanged if it fits in `max_bytes` of JSON and `max_depth`
+    levels, otherwise a shrunk copy with `__truncated__` markers.
+    """
+    if _estimate(value, max_bytes, 0, max_depth) <= max_bytes:
+        return value
+
+    dumps = dumps or get_dumps()
+    max_items, max_str = 20, max(16, max_bytes // 4)
+    while True:
+        shrunk = _shrink(value, 0, max_depth, max_items, max_str)
+        if len(safe_dumps(shrunk, dumps)) <= max_bytes or (max_items == 1 and max_str == 16):
+            return shrunk
+        max_items = max(1, max_items // 2)
+        max_str = max(16, max_str // 2)
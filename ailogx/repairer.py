@@ -1,6 +1,9 @@
 from ailogx.backends.registry import get_analyzer
+from ailogx.formatters.compact import encode_records
 
-def format_patch_prompt(log, context):
+def format_patch_prompt(log, context, prompt_format=None):
+    if prompt_format is not None:
+        log = encode_records([log], prompt_format)
     return f"""
 You are an expert code repair assistant.
 
@@ -0,0 +1,112 @@
+# ailogx/sampling.py
+"""
+Sampling policies for LLMLogger.
+
+Hot loops instrumented with llm_context/llm_info can emit millions of nearly
+identical records. A SamplingPolicy decides per record whether it is written:
+
+- per-level probabilistic sampling (`rates={"context_info": 0.01}`),
+- a token bucket per call site (file, line) (`rate_limit=50` records/sec),
+- levels in `always_keep` bypass both.
+
+Suppressed records are not lost silently: every `summary_interval` seconds the
+logger writes one `sampling_summary` record per call site with the count.
+"""
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+ALWAYS_KEEP = frozenset({"error_reasoning", "function_exit_error", "decision_point"})
+SUMMARY_LEVEL = "sampling_summary"
+
+
+class SamplingPolicy:
+    def __init__(
+        self,
+        rates: Optional[Dict[str, float]] = None,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None,
+        always_keep=ALWAYS_KEEP,
+        summary_interval: float = 10.0,
+        seed: Optional[int] = None,
+    ):
+        self.rates = dict(rates or {})
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else rate_limit
+        self.always_keep = frozenset(always_keep) | {SUMMARY_LEVEL}
+        self.summary_interval = summary_interval
+        self.next_summary = time.monotonic() + summary_interval
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets = {}     # (file, line) -> [tokens, last refill]
+        self._suppressed = {}  # (file, line, level) -> [count, reason]
+
+    @property
+    def needs_site(self) -> bool:
+        return bool(self.rate_limit)
+
+    def allow(self, level: str, site: dict) -> bool:
+        """Decide whether a record at `level` from call site `site` is kept."""
+        if level in self.always_keep:
+            return True
+
+        rate = self.rates.get(level)
+        if rate is not None and self._random.random() >= rate:
+            self._suppress(level, site, "sampled")
+            return False
+
+        if self.rate_limit:
+            key = (site.get("file"), site.get("line"))
+            now = time.monotonic()
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = [self.burst, now]
+                else:
+                    bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_limit)
+                    bucket[1] = now
+                if bucket[0] < 1:
+                    allowed = False
+                else:
+                    bucket[0] -= 1
+                    allowed = True
+            if not allowed:
+                self._suppress(level, site, "rate_limited")
+                return False
+        return True
+
+    def _suppress(self, level: str, site: dict, reason: str):
+        key = (site.get("file"), site.get("line"), level)
+        with self._lock:
+            entry = self._suppressed.get(key)
+            if entry is None:
+                self._suppressed[key] = [1, reason]
+            else:
+                entry[0] += 1
+
+    def summaries_due(self) -> bool:
+        return time.monotonic() >= self.next_summary
+
+    def drain_summaries(self) -> List[dict]:
+        """Return one summary record per call site that had suppressed records."""
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, {}
+            self.next_summary = time.monotonic() + self.summary_interval
+
+        summaries = []
+        for (file, line, level), (count, reason) in suppressed.items():
+            where = f" from {file}:{line}" if file else ""
+            record = {
+                "level": SUMMARY_LEVEL,
+                "message": f"Suppressed {count} {level} records{where}",
+                "suppressed": count,
+                "sampled_level": level,
+                "reason": reason,
+            }
+            if file:
+                record["file"] = file
+                record["line"] = line
+            summaries.append(record)
+        return summaries
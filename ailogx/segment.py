@@ -0,0 +1,482 @@
+# ailogx/segment.py
+"""
+Compact binary log segments (`.alxs`).
+
+JSONL repeats the same long strings on every line: absolute file paths, UUID
+context ids, logger and level names, and every key. A segment stores each
+string once in a per-segment dictionary and each distinct key set ("shape")
+once, then writes records as small length-prefixed frames:
+
+    header   b"ALXSEG1\\n"
+    frame    kind (1 byte) | varint payload length | payload
+      S      string definition    -> next string id
+      K      shape definition     -> varint n, n x varint key string id
+      R      record               -> level code, timestamp, shape id, values
+
+Levels are integer-coded and timestamps are stored as epoch nanoseconds (plus
+the number of fractional digits, so the ISO text round-trips exactly).
+`iter_segment` yields the same dicts `load_logs` returns for JSONL.
+"""
+import argparse
+import calendar
+import gzip
+import json
+import os
+import re
+import struct
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+from .serialization import get_dumps, safe_dumps
+from .sinks import FileSink
+
+MAGIC = b"ALXSEG1\n"
+SEGMENT_SUFFIX = ".alxs"
+
+# Code 0 = no level, 1 = level stored as a string id, 2.. = these names.
+LEVELS = [
+    "info", "decision_point", "error_reasoning", "context_info", "expected_behavior",
+    "group_start", "group_end", "function_entry", "function_exit", "function_exit_error",
+    "sampling_summary", "function_span", "span_stats",
+    "debug", "warning", "error", "critical",
+]
+_LEVEL_CODES = {name: i + 2 for i, name in enumerate(LEVELS)}
+
+# Values of these keys repeat across records and are worth a dictionary entry.
+INTERN_FIELDS = frozenset({
+    "logger", "context_id", "trace_id", "file", "function", "sampled_level",
+})
+# These are often unique: interned only from their second occurrence on, so
+# a stream of distinct messages does not fill the dictionary.
+REPEAT_FIELDS = frozenset({"message", "reason", "summary", "traceback"})
+MAX_INTERN_LEN = 1024
+DEFAULT_MAX_STRINGS = 1 << 16  # per segment; later strings are stored inline
+_MAX_SEEN_ONCE = 1 << 16  # hashes of REPEAT_FIELDS values seen once
+
+_NO_TIMESTAMP = 255
+T_STR, T_RAW, T_INT, T_FLOAT, T_TRUE, T_FALSE, T_NULL, T_JSON = range(8)
+
+_DOUBLE = struct.Struct("<d")
+_INT64 = struct.Struct("<q")
+
+
+def _varint(n: int) -> bytes:
+    if n < 0x80:
+        return bytes((n,))
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _read_varint(buf, pos: int):
+    b = buf[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result, shift = 0, 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(n: int) -> int:
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def _unzigzag(n: int) -> int:
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def _frame(kind: bytes, payload: bytes) -> bytes:
+    return kind + _varint(len(payload)) + payload
+
+
+# --- timestamps --------------------------------------------------------
+
+_epoch_seconds = {}  # "YYYY-mm-ddTHH:MM:SS" -> epoch seconds
+_iso_prefixes = {}   # epoch seconds -> "YYYY-mm-ddTHH:MM:SS"
+
+
+def parse_timestamp(ts):
+    """ISO "…:SS[.fff…]Z" -> (epoch ns, fraction digits), or None if not that shape."""
+    if not isinstance(ts, str) or len(ts) < 20 or ts[-1] != "Z" or ts[10] != "T":
+        return None
+    prefix = ts[:19]
+    sec = _epoch_seconds.get(prefix)
+    if sec is None:
+        try:
+            sec = calendar.timegm(time.strptime(prefix, "%Y-%m-%dT%H:%M:%S"))
+        except ValueError:
+            return None
+        if len(_epoch_seconds) > 100000:
+            _epoch_seconds.clear()
+        _epoch_seconds[prefix] = sec
+    frac = ts[20:-1]
+    if len(ts) == 20:
+        return sec * 1000000000, 0
+    if ts[19] != "." or not frac.isdigit() or len(frac) > 9:
+        return None
+    return sec * 1000000000 + int(frac.ljust(9, "0")), len(frac)
+
+
+def format_timestamp(ns: int, digits: int) -> str:
+    sec, frac = divmod(ns, 1000000000)
+    prefix = _iso_prefixes.get(sec)
+    if prefix is None:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        if len(_iso_prefixes) > 100000:
+            _iso_prefixes.clear()
+        _iso_prefixes[sec] = prefix
+    if not digits:
+        return prefix + "Z"
+    return f"{prefix}.{str(frac).zfill(9)[:digits]}Z"
+
+
+# --- writing -----------------------------------------------------------
+
+class SegmentEncoder:
+    """
+    Encodes records against one segment's string and shape dictionaries.
+    The string dictionary holds at most `max_strings` strings of at most
+    `MAX_INTERN_LEN` characters.
+    """
+
+    def __init__(self, max_strings: int = DEFAULT_MAX_STRINGS):
+        self.max_strings = max_strings
+        self.strings = {}
+        self.shapes = {}
+        self._seen_once = set()
+        self._dumps = get_dumps()
+
+    def load(self, strings: List[str], shapes: List[tuple]):
+        """Continue an existing segment whose dictionaries were read back."""
+        self.strings = {s: i for i, s in enumerate(strings)}
+        self.shapes = {shape: i for i, shape in enumerate(shapes)}
+
+    def _sid(self, s: str, out: bytearray) -> int:
+        sid = self.strings.get(s)
+        if sid is None:
+            sid = self.strings[s] = len(self.strings)
+            out += _frame(b"S", s.encode("utf-8"))
+        return sid
+
+    def encode(self, record: dict) -> bytes:
+        out = bytearray()
+        body = bytearray()
+
+        level = record.get("level")
+        fields = [k for k in record if k not in ("timestamp", "level")]
+        if isinstance(level, str):
+            code = _LEVEL_CODES.get(level)
+            if code is not None:
+                body += _varint(code)
+            else:
+                body += b"\x01" + _varint(self._sid(level, out))
+        else:
+            body += b"\x00"
+            if "level" in record:
+                fields.insert(0, "level")
+
+        parsed = parse_timestamp(record.get("timestamp"))
+        if parsed is None:
+            body.append(_NO_TIMESTAMP)
+            if "timestamp" in record:
+                fields.insert(0, "timestamp")
+        else:
+            body.append(parsed[1])
+            body += _INT64.pack(parsed[0])
+
+        shape = tuple(fields)
+        shape_id = self.shapes.get(shape)
+        if shape_id is None:
+            key_ids = b"".join(_varint(self._sid(k, out)) for k in shape)
+            shape_id = self.shapes[shape] = len(self.shapes)
+            out += _frame(b"K", _varint(len(shape)) + key_ids)
+        body += _varint(shape_id)
+
+        for key in shape:
+            self._value(key, record[key], body, out)
+
+        out += _frame(b"R", bytes(body))
+        return bytes(out)
+
+    def _intern(self, key, value: str) -> bool:
+        if value in self.strings:
+            return True
+        if len(value) > MAX_INTERN_LEN or len(self.strings) >= self.max_strings:
+            return False
+        if key in INTERN_FIELDS:
+            return True
+        if key not in REPEAT_FIELDS:
+            return False
+        h = hash(value)
+        if h in self._seen_once:
+            self._seen_once.discard(h)
+            return True
+        if len(self._seen_once) >= _MAX_SEEN_ONCE:
+            self._seen_once.clear()
+        self._seen_once.add(h)
+        return False
+
+    def _value(self, key, value, body: bytearray, out: bytearray):
+        if isinstance(value, str):
+            if self._intern(key, value):
+                body.append(T_STR)
+                body += _varint(self._sid(value, out))
+            else:
+                raw = value.encode("utf-8")
+                body.append(T_RAW)
+                body += _varint(len(raw)) + raw
+        elif value is True:
+            body.append(T_TRUE)
+        elif value is False:
+            body.append(T_FALSE)
+        elif value is None:
+            body.append(T_NULL)
+        elif isinstance(value, int):
+            body.append(T_INT)
+            body += _varint(_zigzag(value))
+        elif isinstance(value, float):
+            body.append(T_FLOAT)
+            body += _DOUBLE.pack(value)
+        else:
+            raw = safe_dumps(value, self._dumps).encode("utf-8")
+            body.append(T_JSON)
+            body += _varint(len(raw)) + raw
+
+
+class SegmentSink(FileSink):
+    """
+    FileSink variant that writes `.alxs` segments. Rotation starts a new
+    segment with a fresh dictionary. Use `write_records`, not `write`.
+
+    A segment has a single writer: after a fork the child leaves the
+    parent's segment alone and starts its own, `<stem>.<pid>.alxs`.
+    Reading the parent's path (`reader.iter_logs`) merges those in.
+    """
+
+    def __init__(self, path: str = "./llm_logs.alxs", max_strings: int = DEFAULT_MAX_STRINGS,
+                 **kwargs):
+        self.max_strings = max_strings
+        self._encoder = None
+        self._base_path = Path(path)
+        super().__init__(path, **kwargs)
+
+    def _after_fork(self):
+        super()._after_fork()
+        # The inherited handle and dictionary belong to the parent's segment.
+        base = self._base_path
+        self._fh = None
+        self._encoder = None
+        self._unsynced = 0
+        self.path = base.with_name(f"{base.stem}.{os.getpid()}{base.suffix}")
+        self.generation += 1
+
+    def _open(self):
+        self._encoder = SegmentEncoder(self.max_strings)
+        if self.path.exists() and self.path.stat().st_size:
+            strings, shapes, valid_end = read_dictionary(self.path)
+            self._encoder.load(strings, shapes)
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)  # drop a frame torn by a crash
+        super()._open()
+        if self._size == 0:
+            self._fh.write(MAGIC)
+            self._size = len(MAGIC)
+
+    def write(self, data: str, count: int = 1):
+        raise TypeError("SegmentSink stores records, use write_records()")
+
+    def write_records(self, records: List[dict]):
+        with self._lock:
+            if self._fh is None:
+                self._open()
+            if self._should_rotate(0):
+                self._rotate()
+            payload = b"".join(self._encoder.encode(r) for r in records)
+            self._fh.write(payload)
+            self._size += len(payload)
+            self._unsynced += len(records)
+            self._maybe_fsync()
+
+
+# --- reading -----------------------------------------------------------
+
+def _open_binary(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def forked_segment_paths(path) -> List[Path]:
+    """The `<stem>.<pid>.alxs` segments that forked children of the writer of `path` wrote."""
+    path = Path(path)
+    pattern = re.compile(re.escape(path.stem) + r"\.\d+" + re.escape(path.suffix) + "$")
+    try:
+        return sorted(p for p in path.parent.iterdir() if pattern.match(p.name) and p.is_file())
+    except OSError:
+        return []
+
+
+def is_segment(path) -> bool:
+    try:
+        with _open_binary(path) as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _iter_frames(path, chunk_size: int = 1 << 20):
+    """Yield (kind, payload, end offset); stops quietly at a torn final frame."""
+    with _open_binary(path) as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an ailogx segment")
+        offset = len(MAGIC)  # file offset of buf[0]
+        buf = b""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buf += chunk
+            pos, n = 0, len(buf)
+            while pos + 1 < n:
+                try:
+                    length, body = _read_varint(buf, pos + 1)
+                except IndexError:
+                    break
+                end = body + length
+                if end > n:
+                    break
+                yield buf[pos:pos + 1], buf[body:end], offset + end
+                pos = end
+            offset += pos
+            buf = buf[pos:]
+
+
+def read_dictionary(path):
+    """Return (strings, shapes, end of last complete frame) of a segment."""
+    strings, shapes = [], []
+    valid_end = len(MAGIC)
+    for kind, payload, end in _iter_frames(path):
+        if kind == b"S":
+            strings.append(payload.decode("utf-8"))
+        elif kind == b"K":
+            n, pos = _read_varint(payload, 0)
+            keys = []
+            for _ in range(n):
+                sid, pos = _read_varint(payload, pos)
+                keys.append(strings[sid])
+            shapes.append(tuple(keys))
+        valid_end = end
+    return strings, shapes, valid_end
+
+
+def iter_segment(path) -> Iterator[dict]:
+    """Yield records from a segment as plain dicts, like `load_logs` does."""
+    strings, shapes = [], []
+    loads = json.loads
+    for kind, payload, _ in _iter_frames(path):
+        if kind == b"R":
+            record = {}
+            code, pos = _read_varint(payload, 0)
+            level = None
+            if code == 1:
+                sid, pos = _read_varint(payload, pos)
+                level = strings[sid]
+            elif code >= 2:
+                level = LEVELS[code - 2]
+            digits = payload[pos]
+            pos += 1
+            if digits != _NO_TIMESTAMP:
+                record["timestamp"] = format_timestamp(_INT64.unpack_from(payload, pos)[0], digits)
+                pos += 8
+            if level is not None:
+                record["level"] = level
+            shape_id, pos = _read_varint(payload, pos)
+            for key in shapes[shape_id]:
+                tag = payload[pos]
+                pos += 1
+                if tag == T_STR:
+                    sid, pos = _read_varint(payload, pos)
+                    record[key] = strings[sid]
+                elif tag == T_RAW or tag == T_JSON:
+                    n, pos = _read_varint(payload, pos)
+                    text = payload[pos:pos + n].decode("utf-8")
+                    record[key] = text if tag == T_RAW else loads(text)
+                    pos += n
+                elif tag == T_INT:
+                    n, pos = _read_varint(payload, pos)
+                    record[key] = _unzigzag(n)
+                elif tag == T_FLOAT:
+                    record[key] = _DOUBLE.unpack_from(payload, pos)[0]
+                    pos += 8
+                else:
+                    record[key] = tag == T_TRUE if tag != T_NULL else None
+            yield record
+        elif kind == b"S":
+            strings.append(payload.decode("utf-8"))
+        elif kind == b"K":
+            n, pos = _read_varint(payload, 0)
+            keys = []
+            for _ in range(n):
+                sid, pos = _read_varint(payload, pos)
+                keys.append(strings[sid])
+            shapes.append(tuple(keys))
+
+
+# --- conversion --------------------------------------------------------
+
+def jsonl_to_segment(src, dst) -> int:
+    """Convert a JSONL log to a segment. Returns the number of records."""
+    from .utils.reader import iter_logs
+
+    encoder = SegmentEncoder()
+    count = 0
+    with open(dst, "wb") as out:
+        out.write(MAGIC)
+        for record in iter_logs(src):
+            out.write(encoder.encode(record))
+            count += 1
+    return count
+
+
+def segment_to_jsonl(src, dst) -> int:
+    """Convert a segment back to JSONL. Returns the number of records."""
+    count = 0
+    with open(dst, "w", encoding="utf-8") as out:
+        for record in iter_segment(src):
+            out.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert between JSONL logs and .alxs segments.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in [("to-segment", "JSONL -> segment"), ("to-jsonl", "segment -> JSONL")]:
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("src")
+        cmd.add_argument("dst")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "to-segment":
+        count = jsonl_to_segment(args.src, args.dst)
+    else:
+        count = segment_to_jsonl(args.src, args.dst)
+    elapsed = time.perf_counter() - start
+
+    src_size, dst_size = Path(args.src).stat().st_size, Path(args.dst).stat().st_size
+    print(f"✅ {count} records in {elapsed:.2f}s: {src_size:,} -> {dst_size:,} bytes "
+          f"({src_size / max(dst_size, 1):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# ailogx/serialization.py
+"""
+Record serialization for LLMLogger.
+
+The fields that never change for a logger (name, context id) are encoded once
+and prepended to every record, timestamps are formatted at most once per
+resolution tick, and orjson is used when it is installed. Values that JSON
+cannot represent (datetime, Decimal, dataclasses, sets, ...) are converted
+instead of raising out of the logging call.
+"""
+import dataclasses
+import enum
+import json
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from pathlib import PurePath
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+JSON_BACKENDS = ("auto", "orjson", "stdlib")
+TIMESTAMP_RESOLUTIONS = {"s": 1, "ms": 1000, "us": 1000000}
+
+
+def default_encoder(obj):
+    """Fallback for values the JSON encoder does not know how to handle."""
+    if isinstance(obj, (datetime, date, dt_time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (UUID, PurePath)):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8", errors="replace")
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return repr(obj)
+
+
+def _stdlib_dumps(obj) -> str:
+    return json.dumps(obj, default=default_encoder)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def _orjson_dumps(obj) -> str:
+        try:
+            return orjson.dumps(obj, default=default_encoder, option=_ORJSON_OPTIONS).decode()
+        except TypeError:
+            # e.g. integers above 64 bits; the stdlib encoder copes with those
+            return _stdlib_dumps(obj)
+else:
+    _orjson_dumps = None
+
+
+def get_dumps(backend: str = "auto"):
+    """Return a `dumps(obj) -> str` function for the requested JSON backend."""
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Unsupported JSON backend: {backend}")
+    if backend == "orjson" and _orjson_dumps is None:
+        raise ImportError("orjson is not installed")
+    if backend == "stdlib" or _orjson_dumps is None:
+        return _stdlib_dumps
+    return _orjson_dumps
+
+
+def safe_dumps(obj, dumps=None) -> str:
+    """
+    Encode `obj`, never raising. If a top-level dict cannot be encoded as a
+    whole (circular references, broken __repr__, ...), the offending values are
+    replaced by their repr.
+    """
+    dumps = dumps or get_dumps()
+    try:
+        return dumps(obj)
+    except Exception:
+        pass
+    if isinstance(obj, dict):
+        cleaned = {}
+        for key, value in obj.items():
+            try:
+                dumps(value)
+                cleaned[str(key)] = value
+            except Exception:
+                cleaned[str(key)] = _safe_repr(value)
+        return dumps(cleaned)
+    return dumps(_safe_repr(obj))
+
+
+def _safe_repr(value) -> str:
+    try:
+        return repr(value)
+    except Exception:
+        return f"<unrepresentable {type(value).__name__}>"
+
+
+class TimestampCache:
+    """
+    UTC ISO-8601 timestamps ("2025-08-04T06:18:09.946713Z") that are only
+    re-formatted when the clock moves past the configured resolution.
+    """
+
+    def __init__(self, resolution: str = "us"):
+        if resolution not in TIMESTAMP_RESOLUTIONS:
+            raise ValueError(f"Unsupported timestamp resolution: {resolution}")
+        self.resolution = resolution
+        self._scale = TIMESTAMP_RESOLUTIONS[resolution]
+        self._width = len(str(self._scale)) - 1
+        self._last = (None, "")     # (tick, formatted timestamp)
+        self._second = (None, "")   # (epoch second, "%Y-%m-%dT%H:%M:%S")
+
+    def now(self) -> str:
+        return self.format(time.time())
+
+    def format(self, t: float) -> str:
+        tick = int(t * self._scale)
+        last_tick, last = self._last
+        if tick == last_tick:
+            return last
+
+        sec, frac = divmod(tick, self._scale)
+        cached_sec, prefix = self._second
+        if sec != cached_sec:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+            self._second = (sec, prefix)
+
+        if self._width:
+            stamp = f"{prefix}.{frac:0{self._width}d}Z"
+        else:
+            stamp = f"{prefix}Z"
+        self._last = (tick, stamp)
+        return stamp
+
+
+class RecordEncoder:
+    """
+    Turns the per-record fields into a JSON line, prepending the logger's
+    static envelope which is encoded once up front.
+    """
+
+    def __init__(self, envelope: dict, backend: str = "auto"):
+        self.dumps = get_dumps(backend)
+        self.envelope = dict(envelope)
+        self._prefix = safe_dumps(self.envelope, self.dumps)[:-1]
+        self._empty = self._prefix + "}"
+        self._prefix += ", " if self.envelope else ""
+
+    def encode(self, record: dict) -> str:
+        body = safe_dumps(record, self.dumps)
+        if body == "{}":
+            return self._empty + "\n"
+        return self._prefix + body[1:] + "\n"
+
+    def full_record(self, record: dict) -> dict:
+        """The record as a reader would see it, envelope included."""
+        return {**self.envelope, **record}
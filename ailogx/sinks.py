@@ -0,0 +1,255 @@
+# ailogx/sinks.py
+"""
+Output sinks for LLMLogger.
+
+A sink keeps its file handle open between records instead of reopening the
+log for every line, and can rotate the file by size or wall-clock interval.
+Rotated segments are gzipped on a background thread so rotation never stalls
+the thread that is writing.
+"""
+import atexit
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Optional
+
+_live_sinks = weakref.WeakSet()
+
+
+class FileSink:
+    """
+    Append-only JSONL file with a persistent, buffered handle.
+
+    fsync policy: `fsync_every` records and/or every `fsync_interval_ms`
+    milliseconds; both 0 (the default) means never fsync explicitly.
+
+    Rotation: when the file would exceed `max_bytes`, or when a
+    `rotate_interval`-second wall-clock boundary is crossed, the current file
+    is renamed to `<stem>.<YYYYmmdd-HHMMSS><suffix>` and (if `compress`) gzipped
+    in the background. `generation` is bumped on every rotation.
+    """
+
+    def __init__(
+        self,
+        path: str = "./llm_logs.jsonl",
+        buffer_size: int = 64 * 1024,
+        fsync_every: int = 0,
+        fsync_interval_ms: int = 0,
+        max_bytes: int = 0,
+        rotate_interval: int = 0,
+        compress: bool = True,
+    ):
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+        self.fsync_every = fsync_every
+        self.fsync_interval_ms = fsync_interval_ms
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compress = compress
+        self.generation = 0
+
+        self._lock = threading.Lock()
+        self._fh = None
+        self._size = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._next_rollover = self._compute_rollover(time.time())
+        self._archives = None  # queue.Queue, created with the compressor thread
+        self._compressor = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._open()
+        _live_sinks.add(self)
+
+    def _open(self):
+        self._fh = open(self.path, "ab", buffering=self.buffer_size)
+        self._size = self._fh.tell()
+
+    def _compute_rollover(self, now: float) -> Optional[float]:
+        if not self.rotate_interval:
+            return None
+        return (now // self.rotate_interval + 1) * self.rotate_interval
+
+    # --- writing -------------------------------------------------------
+
+    def write(self, data: str, count: int = 1):
+        """Append `data` (one or more newline-terminated records)."""
+        payload = data.encode("utf-8")
+        with self._lock:
+            if self._fh is None:
+                self._open()
+            if self._should_rotate(len(payload)):
+                self._rotate()
+            self._fh.write(payload)
+            self._size += len(payload)
+            self._unsynced += count
+            self._maybe_fsync()
+
+    def rotate_if_due(self, incoming: int) -> bool:
+        """Rotate now if writing `incoming` bytes would; lets callers encode for the new file."""
+        with self._lock:
+            if self._fh is None:
+                self._open()
+            if not self._should_rotate(incoming):
+                return False
+            self._rotate()
+            return True
+
+    def flush(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                self._maybe_fsync()
+
+    def _maybe_fsync(self):
+        if not self._unsynced:
+            return
+        due = self.fsync_every and self._unsynced >= self.fsync_every
+        if not due and self.fsync_interval_ms:
+            due = (time.monotonic() - self._last_sync) * 1000 >= self.fsync_interval_ms
+        if due:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    # --- rotation ------------------------------------------------------
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if self.max_bytes and self._size and self._size + incoming > self.max_bytes:
+            return True
+        return self._next_rollover is not None and time.time() >= self._next_rollover
+
+    def _archive_path(self) -> Path:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        candidate = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        n = 1
+        while candidate.exists() or Path(f"{candidate}.gz").exists():
+            candidate = self.path.with_name(f"{self.path.stem}.{stamp}.{n}{self.path.suffix}")
+            n += 1
+        return candidate
+
+    def _rotate(self):
+        self._fh.flush()
+        if self._unsynced and (self.fsync_every or self.fsync_interval_ms):
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+        self._fh.close()
+
+        archive = self._archive_path()
+        os.replace(self.path, archive)
+        self._open()
+        self.generation += 1
+        self._next_rollover = self._compute_rollover(time.time())
+
+        if self.compress:
+            self._submit_archive(archive)
+
+    def _submit_archive(self, archive: Path):
+        if self._compressor is None or not self._compressor.is_alive():
+            self._archives = queue.Queue()
+            self._compressor = threading.Thread(
+                target=_compress_worker, args=(self._archives,),
+                name="ailogx-compressor", daemon=True,
+            )
+            self._compressor.start()
+        self._archives.put(archive)
+
+    def wait_for_archives(self):
+        """Block until every rotated segment has been compressed."""
+        if self._archives is not None:
+            self._archives.join()
+
+    # --- lifecycle -----------------------------------------------------
+
+    def _after_fork(self):
+        # Locks and the compressor thread are not inherited in a usable state.
+        self._lock = threading.Lock()
+        self._archives = None
+        self._compressor = None
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                if self._unsynced and (self.fsync_every or self.fsync_interval_ms):
+                    os.fsync(self._fh.fileno())
+                self._fh.close()
+                self._fh = None
+        self.wait_for_archives()
+        _live_sinks.discard(self)
+
+
+class ShardedFileSink(FileSink):
+    """
+    One file per process: `<directory>/<prefix>.<pid>.<start>.jsonl`.
+
+    Several processes (e.g. gunicorn workers) can log to the same directory
+    without tearing each other's lines. After a fork the child notices the new
+    PID and opens its own shard. Merge the shards with
+    `ailogx-merge` or read the directory directly with `load_logs`.
+    """
+
+    def __init__(self, directory: str = "./llm_logs", prefix: str = "llm_logs", **kwargs):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self._pid = os.getpid()
+        super().__init__(self._shard_path(), **kwargs)
+
+    def _shard_path(self) -> Path:
+        started = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        return self.directory / f"{self.prefix}.{self._pid}.{started}.jsonl"
+
+    def _after_fork(self):
+        super()._after_fork()
+        # The parent keeps writing its own shard; start ours.
+        self._fh = None
+        self._unsynced = 0
+        self._pid = os.getpid()
+        self.path = self._shard_path()
+        self.generation += 1
+
+
+def _compress_worker(archives: "queue.Queue[Path]"):
+    while True:
+        archive = archives.get()
+        try:
+            gz_path = Path(f"{archive}.gz")
+            with open(archive, "rb") as src, gzip.open(gz_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            archive.unlink()
+        except Exception as e:
+            print(f"⚠️ ailogx failed to compress {archive}: {e}")
+        finally:
+            archives.task_done()
+
+
+def _flush_before_fork():
+    # Empty every buffer so a forked child never re-writes the parent's data
+    # when it drops the inherited handle.
+    for sink in list(_live_sinks):
+        try:
+            sink.flush()
+        except Exception:
+            pass
+
+
+def _reset_after_fork():
+    for sink in list(_live_sinks):
+        sink._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_flush_before_fork, after_in_child=_reset_after_fork)
+
+
+@atexit.register
+def _finish_archives():
+    # Handles are flushed by their owners; only make sure no gzip is cut short.
+    for sink in list(_live_sinks):
+        sink.wait_for_archives()
@@ -0,0 +1,119 @@
+# ailogx/spans.py
+"""
+In-process span aggregation for LLMLogger (`span_mode="aggregate"`).
+
+Instead of an entry and an exit record per call, each finished span adds its
+`perf_counter_ns` duration to a per-name latency histogram. Every
+`interval` seconds the logger writes one compact `span_stats` record per span
+name (count, errors, p50/p95/p99, max): on the next logged record, on the
+async writer's tick, and for the final window on flush/close or at exit. Full records are still written for
+calls that raised and for outliers slower than `outlier_ms`.
+"""
+import threading
+import time
+from typing import List, Optional
+
+STATS_LEVEL = "span_stats"
+
+# Log-linear buckets: 8 sub-buckets per power of two, so a reported quantile
+# is within ~6% of the true value while a histogram stays a few dozen ints.
+_SUB_BITS = 3
+_SUB = 1 << _SUB_BITS
+
+
+def _bucket(ns: int) -> int:
+    if ns < _SUB:
+        return max(ns, 0)
+    exp = ns.bit_length() - 1
+    return (exp - _SUB_BITS + 1) * _SUB + ((ns >> (exp - _SUB_BITS)) & (_SUB - 1))
+
+
+def _bucket_mid(index: int) -> float:
+    if index < _SUB:
+        return float(index)
+    exp = index // _SUB + _SUB_BITS - 1
+    low = (_SUB + index % _SUB) << (exp - _SUB_BITS)
+    return low + (1 << (exp - _SUB_BITS)) / 2
+
+
+class LatencyHistogram:
+    __slots__ = ("count", "errors", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = {}
+
+    def add(self, duration_ns: int, error: bool = False):
+        self.count += 1
+        self.total_ns += duration_ns
+        if error:
+            self.errors += 1
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        index = _bucket(duration_ns)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """Approximate `q`-quantile in nanoseconds (never above the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_bucket_mid(index), self.max_ns)
+        return float(self.max_ns)
+
+
+class SpanAggregator:
+    def __init__(self, interval: float = 10.0, outlier_ms: Optional[float] = None):
+        self.interval = interval
+        self.outlier_ns = outlier_ms * 1e6 if outlier_ms is not None else None
+        self.next_flush = time.monotonic() + interval
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+        self._histograms = {}  # span name -> LatencyHistogram
+
+    def record(self, name: str, duration_ns: int, error: bool = False) -> bool:
+        """Add one finished span. Returns True if it should also be written in full."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.add(duration_ns, error)
+        return error or (self.outlier_ns is not None and duration_ns > self.outlier_ns)
+
+    def stats_due(self) -> bool:
+        return time.monotonic() >= self.next_flush
+
+    def drain_stats(self) -> List[dict]:
+        """Return one `span_stats` record per span name seen since the last drain."""
+        now = time.monotonic()
+        with self._lock:
+            histograms, self._histograms = self._histograms, {}
+            window = now - self._window_start
+            self._window_start = now
+            self.next_flush = now + self.interval
+
+        stats = []
+        for name, h in histograms.items():
+            p50, p95, p99 = (h.quantile(q) / 1e6 for q in (0.5, 0.95, 0.99))
+            stats.append({
+                "level": STATS_LEVEL,
+                "message": (f"{name}: {h.count} calls, {h.errors} errors, "
+                            f"p50 {p50:.2f}ms, p95 {p95:.2f}ms, p99 {p99:.2f}ms"),
+                "span_name": name,
+                "count": h.count,
+                "errors": h.errors,
+                "mean_ms": round(h.total_ns / h.count / 1e6, 3),
+                "p50_ms": round(p50, 3),
+                "p95_ms": round(p95, 3),
+                "p99_ms": round(p99, 3),
+                "max_ms": round(h.max_ns / 1e6, 3),
+                "window_s": round(window, 3),
+            })
+        return stats
@@ -1,25 +1,45 @@
 import os, json, argparse
 from ailogx.backends import get_analyzer
-from ailogx.utils.tokenizer import chunk_by_tokens
 from ailogx.utils.cache import get_cached_response, save_response_to_cache
-from ailogx.utils.preprocess import smart_filter, intent_filter, fast_mode
+from ailogx.utils.downsample import DownsampleReport, downsample
 # from llm_logger.backends import   # assume this is your dynamic backend loader
 from ailogx.backends.registry import get_analyzer
 from ailogx.trace.tracebuilder import trace_aware_grouping
 from ailogx.backends.registry import get_analyzer
 from ailogx.trace.trace_summarizer import summarize_by_trace
+from ailogx.utils import reader
+from ailogx.follow import Checkpoint, checkpoint_path_for, follow, read_new, roll_summary
+from ailogx.utils.logindex import open_index
+from ailogx.utils.parallel import RecordFilter, iter_logs_parallel
+from ailogx.utils.search import SearchIndex, build_search_index, cacheable, select_relevant
+from ailogx.utils.tokenizer import get_token_count
+from ailogx.summarizer.templates import DEFAULT_TEMPLATES_PATH, PROMPT_NOTE, TemplateMiner, iter_compressed
+from ailogx.tracebacks import iter_collapsed
+from ailogx.formatters.compact import FORMATS, encode_records, iter_prompt_chunks
 import sys
 
 def load_logs(path):
-    with open(path) as f:
-        return [json.loads(line) for line in f if line.strip()]
+    """Load a JSONL file, a .gz file or a directory of per-process shards."""
+    return reader.load_logs(path)
 
-def summarize_chunks(logs, model="gemma3"):
+def summarize_chunks(logs, model="gemma3", miner=None, prompt_format="json"):
+    """
+    `logs` may be any iterable (e.g. a generator pipeline); it is consumed
+    chunk by chunk. Repeated tracebacks are sent once per window, with a
+    count and time range (see ailogx.tracebacks). With a `TemplateMiner`,
+    repeated messages are folded into template lines first (see
+    summarizer.templates). `prompt_format` picks the record encoding (see
+    formatters.compact); chunks are sized on the encoded text.
+    """
     analyze = get_analyzer()
     summaries = []
+    logs = iter_collapsed(logs)
+    if miner is not None:
+        logs = iter_compressed(logs, miner)
 
-    for i, chunk in enumerate(chunk_by_tokens(logs, model=model)):
-        joined = "\n".join(json.dumps(l) for l in chunk)
+    for i, joined in enumerate(iter_prompt_chunks(logs, prompt_format, model=model)):
+        if miner is not None:
+            joined = PROMPT_NOTE + joined
         cached = get_cached_response(joined)
         if cached:
             print("[🧠] Cache hit")
@@ -37,16 +57,14 @@ def chunk_logs(logs, chunk_size=100):
         yield logs[i:i+chunk_size]
 
 
-def summarize_file(log_file):
-    with open(log_file) as f:
-        logs = [json.loads(line) for line in f if line.strip()]
+def summarize_file(log_file, prompt_format="json"):
+    logs = reader.iter_logs(log_file)
 
     analyzer = get_analyzer()
     model = os.getenv("LLM_MODEL", "gpt-4")
 
     summaries = []
-    for chunk in chunk_by_tokens(logs, model=model):
-        joined = "\n".join(chunk)
+    for joined in iter_prompt_chunks(logs, prompt_format, model=model):
 
         cached = get_cached_response(joined)
         if cached:
@@ -61,50 +79,220 @@ def summarize_file(log_file):
     return "\n\n---\n\n".join(summaries)
 
 
-def summarize_trace_aware(logs):
+def summarize_trace_aware(logs, prompt_format="json"):
     analyzer = get_analyzer()
     groups = trace_aware_grouping(logs)
     summaries = []
 
     for group in groups:
-        joined_logs = "\n".join(json.dumps(log) for log in group)
+        joined_logs = encode_records(group, prompt_format)
         result = analyzer.summarize_logs(joined_logs)
         summaries.append(result)
 
     return "\n---\n".join(summaries)
 
 
+def report_malformed(stats):
+    if stats.malformed or stats.truncated_files:
+        print(f"⚠️ Skipped {stats.malformed} malformed lines "
+              f"({stats.truncated_files} truncated files)", file=sys.stderr)
+
+
+def select_by_intent(args, logs, fallback, search_index=None, where=None):
+    """
+    The --intent-top best BM25 matches for --intent that fit in
+    --intent-budget tokens, in log order. Pass the log's cached
+    `search_index` (and the filters as `where`) or the filtered `logs`, which
+    are then indexed in memory. When nothing matches, the records from
+    `fallback()` are used instead.
+    """
+    if search_index is None:
+        search_index = SearchIndex.from_records(logs)
+    with search_index:
+        records = select_relevant(search_index, args.intent, top_n=args.intent_top,
+                                  token_budget=args.intent_budget,
+                                  count_tokens=get_token_count, where=where)
+    if not records:
+        print("⚠️  No logs matched intent keywords, returning original logs.")
+        return fallback()
+    print(f"🔍 {len(records)} records ranked for intent {args.intent!r}")
+    return records
+
+
+def reduce_logs(args, logs):
+    """--fast: stratified downsample that keeps every error and decision."""
+    report = DownsampleReport()
+    logs = downsample(logs, target=args.fast_target, target_tokens=args.fast_tokens,
+                      context=args.fast_context, report=report,
+                      count_tokens=get_token_count if args.fast_tokens else None)
+    print(f"✂️ Downsampled: {report}", file=sys.stderr)
+    return logs
+
+
+def summarize_window(records, args, record_filter, miner=None):
+    """Summarize an in-memory window of records with the CLI's filters."""
+    logs = filter(record_filter, records)
+    if args.intent:
+        logs = select_by_intent(args, logs, fallback=lambda: filter(record_filter, records))
+    if args.fast:
+        logs = reduce_logs(args, logs)
+    return summarize_chunks(logs, miner=miner, prompt_format=args.prompt_format)
+
+
+def run_incremental(args, record_filter, stats, miner=None):
+    """--since-checkpoint (one window, then exit) and --follow (keep polling)."""
+    if not os.path.isfile(args.logfile):
+        print("❌ --since-checkpoint/--follow need a single JSONL file")
+        sys.exit(1)
+    checkpoint_path = args.checkpoint or checkpoint_path_for(args.logfile)
+
+    def on_window(records, checkpoint):
+        print(f"🧠 Summarizing {len(records)} new records...")
+        summary = summarize_window(records, args, record_filter, miner)
+        if miner is not None:
+            miner.save(args.templates)
+        if args.rolling:
+            summary = roll_summary(get_analyzer(), checkpoint.rolling_summary, summary)
+        print(summary)
+        return summary if args.rolling else None
+
+    if args.follow:
+        print(f"👀 Following {args.logfile} (every {args.every_records} records "
+              f"or {args.every_seconds:g}s)")
+        try:
+            follow(args.logfile, on_window, checkpoint_path,
+                   every_records=args.every_records, every_seconds=args.every_seconds,
+                   stats=stats)
+        except KeyboardInterrupt:
+            print("👋 Stopped following.")
+        return
+
+    checkpoint = Checkpoint.load(checkpoint_path)
+    records, checkpoint = read_new(args.logfile, checkpoint, stats)
+    if records:
+        summary = on_window(records, checkpoint)
+        if summary is not None:
+            checkpoint.rolling_summary = summary
+    else:
+        print("✅ No new records since the last checkpoint")
+    checkpoint.save(checkpoint_path)
+    report_malformed(stats)
+
+
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("logfile", help="Path to log file")
+    parser.add_argument("logfile", help="Path to log file or shard directory")
     parser.add_argument("--filter", choices=["none", "smart"], default="none")
     parser.add_argument("--intent", type=str, help="Summarization intent (e.g., 'auth errors')")
-    parser.add_argument("--fast", action="store_true", help="Enable fast summarization (downsample)")
+    parser.add_argument("--intent-top", type=int, default=200,
+                        help="--intent: keep at most this many of the best-ranked records")
+    parser.add_argument("--intent-budget", type=int, default=12000,
+                        help="--intent: stop adding ranked records at this many tokens")
+    parser.add_argument("--fast", action="store_true",
+                        help="Downsample by level and call site; errors, decisions and their context are kept")
+    parser.add_argument("--fast-target", type=int, default=500,
+                        help="--fast: records to aim for (errors and decisions may exceed it)")
+    parser.add_argument("--fast-tokens", type=int, help="--fast: also stop sampling at this many tokens")
+    parser.add_argument("--fast-context", type=int, default=2,
+                        help="--fast: records kept either side of each error or decision")
     parser.add_argument("--trace", action="store_true", help="Summarize by trace ID")  
     parser.add_argument("--trace-id", help="Summarize only this trace_id")
-
+    parser.add_argument("--level", help="Comma-separated levels to keep (e.g. error_reasoning,decision_point)")
+    parser.add_argument("--since", help="Keep records at or after this ISO timestamp (prefix ok)")
+    parser.add_argument("--until", help="Keep records before this ISO timestamp (prefix ok)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parse and filter with this many processes (0 = all cores)")
+    parser.add_argument("--columnar", action="store_true",
+                        help="Load into a columnar table (needs numpy); filters run as array operations")
+    parser.add_argument("--templates", nargs="?", const=str(DEFAULT_TEMPLATES_PATH),
+                        help="Fold repeated messages into templates before prompting; the template "
+                             f"table is kept in this file (default: {DEFAULT_TEMPLATES_PATH})")
+    parser.add_argument("--prompt-format", choices=FORMATS, default="json",
+                        help="Record encoding in prompts: json lines, compact (aliases, relative "
+                             "times, shared fields once) or table (header-once rows)")
+    parser.add_argument("--since-checkpoint", action="store_true",
+                        help="Only summarize lines appended since the last checkpointed run")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep running and summarize new lines as they arrive")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <logfile>.ailogx-checkpoint.json)")
+    parser.add_argument("--rolling", action="store_true",
+                        help="Carry a rolling summary forward between windows")
+    parser.add_argument("--every-records", type=int, default=500,
+                        help="--follow: summarize after this many new records")
+    parser.add_argument("--every-seconds", type=float, default=60.0,
+                        help="--follow: summarize at least this often when there are new records")
 
     args = parser.parse_args()
 
-    logs = load_logs(args.logfile)
+    stats = reader.ReadStats()
+
+    record_filter = RecordFilter(
+        levels=args.level.split(",") if args.level else None,
+        since=args.since, until=args.until, trace_id=args.trace_id,
+        smart=args.filter == "smart",
+    )
+
+    # Learned templates persist between runs, so later runs start warm.
+    miner = TemplateMiner.load(args.templates) if args.templates else None
+
+    if args.since_checkpoint or args.follow:
+        run_incremental(args, record_filter, stats, miner)
+        return
 
-    if args.filter == "smart":
-        logs = smart_filter(logs)
+    # With a sidecar index (see `ailogx-index`), a single trace is read by
+    # offset instead of scanning the whole file.
+    index = open_index(args.logfile) if args.trace_id else None
+    if index is not None:
+        print(f"🗂️ Using index {index.index_path}")
+
+    table = None
+    if args.columnar and index is None:
+        try:
+            from ailogx.utils.columnar import LogTable
+
+            table = LogTable.from_path(args.logfile, stats)
+        except ImportError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    def source():
+        if index is not None:
+            return filter(record_filter, index.iter_trace(args.trace_id))
+        if table is not None:
+            return table.filter(record_filter) if record_filter.active else table
+        # The filter runs inside the worker processes, so only matching
+        # records are sent back.
+        return iter_logs_parallel(args.logfile, workers=args.workers or None,
+                                  record_filter=record_filter, stats=stats)
+
+    # Generator pipeline: records are read, filtered and chunked lazily.
+    logs = source()
 
     if args.intent:
-        logs = intent_filter(logs, args.intent)
+        if table is None and index is None and cacheable(args.logfile):
+            # Rank against the cached <log>.search sidecar; the other filters
+            # only run on the candidates.
+            logs = select_by_intent(args, None, source, build_search_index(args.logfile),
+                                    where=record_filter if record_filter.active else None)
+        else:
+            logs = select_by_intent(args, logs, source)
 
     if args.fast:
-        logs = fast_mode(logs)
+        logs = reduce_logs(args, logs)
 
     if args.trace:
-        logs = load_logs(args.logfile)
+        # Trace grouping needs the whole (filtered) set at once.
+        logs = list(logs)
+        report_malformed(stats)
         if not any("trace_id" in log for log in logs):
             print("⚠️ No trace_id found in logs. Skipping trace-based summarization.")
             sys.exit(1)
 
         analyzer = get_analyzer()
-        trace_summaries = summarize_by_trace(logs, analyzer, target_trace_id=args.trace_id)
+        trace_summaries = summarize_by_trace(logs, analyzer, target_trace_id=args.trace_id,
+                                             miner=miner, prompt_format=args.prompt_format)
+        if miner is not None:
+            miner.save(args.templates)
 
         for trace_id, summary in trace_summaries.items():
             print(f"\n=== Trace ID: {trace_id} ===\n{summary}\n")
@@ -112,8 +300,13 @@ def main():
         sys.exit(0)
 
 
-    print("🧠 Summarizing", len(logs), "filtered logs...")
-    print(summarize_chunks(logs))
+    print("🧠 Summarizing filtered logs...")
+    print(summarize_chunks(logs, miner=miner, prompt_format=args.prompt_format))
+    if miner is not None:
+        miner.save(args.templates)
+        print(f"🧩 {len(miner)} message templates saved to {args.templates}")
+    print(f"📥 Read {stats.records} records")
+    report_malformed(stats)
 
 
 if __name__ == "__main__":
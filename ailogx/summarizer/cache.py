@@ -4,8 +4,7 @@ import hashlib
 import os
 from pathlib import Path
 
-CACHE_DIR = Path(".cache")
-CACHE_DIR.mkdir(exist_ok=True)
+CACHE_DIR = Path(".cache")  # created on first write
 
 def hash_text(text: str) -> str:
     return hashlib.sha1(text.encode("utf-8")).hexdigest()
@@ -31,6 +30,7 @@ import time
 
 def cache_set(hash_key: str, value: str):
     # Save data
+    CACHE_DIR.mkdir(exist_ok=True)
     cache_file = CACHE_DIR / f"{hash_key}.txt"
     cache_file.write_text(value)
 
@@ -2,6 +2,8 @@
 
 from typing import List, Dict, Generator
 
+from ailogx.utils.preprocess import as_table
+
 def chunk_logs(logs: List[Dict], chunk_size: int = 500) -> Generator[List[Dict], None, None]:
     """
     Yield fixed-size chunks from a list of logs.
@@ -28,6 +30,9 @@ def score_log(log: Dict) -> int:
 
 
 def score_chunk(chunk: List[Dict]) -> int:
+    table = as_table(chunk)
+    if table is not None:
+        return int(table.scores().sum())
     return sum(score_log(log) for log in chunk)
 
 
@@ -39,6 +44,12 @@ def prioritize_chunks(
     """
     Returns the top_k chunks with highest importance scores.
     """
+    table = as_table(logs)
+    if table is not None:
+        # Score every chunk with one reduceat; only the winners are decoded.
+        scores = table.chunk_scores(chunk_size)
+        best = sorted(range(len(scores)), key=lambda i: -scores[i])[:top_k]
+        return [table[i * chunk_size:(i + 1) * chunk_size].records() for i in best]
     chunks = list(chunk_logs(logs, chunk_size))
     scored = [(score_chunk(c), c) for c in chunks]
     scored.sort(reverse=True, key=lambda x: x[0])
@@ -0,0 +1,239 @@
+# ailogx/summarizer/templates.py
+"""
+Online log-template mining (Drain) and template-compressed prompts.
+
+`TemplateMiner` learns message shapes such as "Entering layer <*>" from a
+stream. A message is split on whitespace, and tokens that look like
+numbers, hex ids, UUIDs or IPs are masked up front. The message then walks
+a fixed-depth tree: token count, then its first `depth - 2` tokens. It joins
+the most similar template in the leaf it reaches, or starts a new one. When
+a template absorbs a message that differs at some position, that position
+becomes `<*>`. The table is bounded (least-recently-used templates are
+evicted) and can be saved and loaded, so it warms up across runs.
+
+`iter_compressed` turns records into prompt lines. Within each window of
+records, records that share a template, a call site (level, file, function,
+line, reason) and a trace_id become one line, carrying the template, the
+count, the first/last timestamp and the distinct values of each `<*>`.
+Records that occur once, and records with a summary, inputs, outputs, a
+traceback or an exception (which a template line cannot carry), are passed
+through unchanged.
+"""
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+WILDCARD = "<*>"
+DEFAULT_TEMPLATES_PATH = Path(".cache") / "templates.json"
+
+_VARIABLE = re.compile(
+    r"^(?:[-+]?\d+(?:\.\d+)?(?:ms|s|%)?|0x[0-9a-fA-F]+|[0-9a-fA-F]{8,}"
+    r"|[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}|\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?)[,.;:]?$"
+)
+_GROUP_FIELDS = ("level", "file", "function", "line", "reason", "trace_id")
+_UNFOLDED_FIELDS = ("summary", "inputs", "outputs", "traceback", "traceback_id",
+                    "exception")  # never folded away
+
+
+def _tree_key(token: str) -> str:
+    return WILDCARD if any(c.isdigit() for c in token) else token
+
+
+class Template:
+    __slots__ = ("id", "tokens", "count", "leaf")
+
+    def __init__(self, template_id: int, tokens: List[str], count: int = 0):
+        self.id = template_id
+        self.tokens = tokens
+        self.count = count
+        self.leaf = None  # the tree leaf list holding this template
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+    def params(self, tokens: List[str]) -> List[str]:
+        """The values of `tokens` (same length) at this template's wildcards."""
+        return [tok for tok, tpl in zip(tokens, self.tokens) if tpl == WILDCARD]
+
+    def __repr__(self):
+        return f"Template({self.id}, {self.text!r}, count={self.count})"
+
+
+class TemplateMiner:
+    def __init__(self, depth: int = 4, similarity: float = 0.4, max_children: int = 100,
+                 max_templates: int = 5000):
+        self.depth = max(depth, 3)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self.templates: "OrderedDict[int, Template]" = OrderedDict()  # LRU order
+        self._root: Dict = {}
+        self._next_id = 1
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    @staticmethod
+    def tokenize(message: str) -> List[str]:
+        return [WILDCARD if _VARIABLE.match(tok) else tok for tok in message.split()]
+
+    def _leaf(self, tokens: List[str]) -> list:
+        """The tree leaf (list of templates) for a tokenized message, created on demand."""
+        node = self._root.setdefault(len(tokens), {})
+        path = [_tree_key(token) for token in tokens[:self.depth - 2]]
+        if not path:
+            return node.setdefault("", [])
+        for i, key in enumerate(path):
+            if key not in node and len(node) >= self.max_children:
+                key = WILDCARD
+            if key not in node:
+                node[key] = [] if i == len(path) - 1 else {}
+            node = node[key]
+        return node
+
+    def _best(self, leaf: list, tokens: List[str]) -> Optional[Template]:
+        best, best_score, best_params = None, -1.0, -1
+        for template in leaf:
+            same = params = 0
+            for tpl, tok in zip(template.tokens, tokens):
+                if tpl == WILDCARD:
+                    params += 1
+                elif tpl == tok:
+                    same += 1
+            score = same / len(tokens) if tokens else 1.0
+            if score > best_score or (score == best_score and params > best_params):
+                best, best_score, best_params = template, score, params
+        return best if best is not None and best_score >= self.similarity else None
+
+    def add(self, message) -> Tuple[Template, List[str]]:
+        """Learn from one message; returns its template and wildcard values."""
+        if not isinstance(message, str):
+            message = json.dumps(message)
+        raw = message.split()
+        tokens = self.tokenize(message)
+        leaf = self._leaf(tokens)
+        template = self._best(leaf, tokens)
+        if template is None:
+            template = Template(self._next_id, tokens)
+            self._next_id += 1
+            template.leaf = leaf
+            leaf.append(template)
+            self.templates[template.id] = template
+            if len(self.templates) > self.max_templates:
+                _, evicted = self.templates.popitem(last=False)
+                evicted.leaf.remove(evicted)
+        else:
+            template.tokens = [tpl if tpl == tok else WILDCARD
+                               for tpl, tok in zip(template.tokens, tokens)]
+            self.templates.move_to_end(template.id)
+        template.count += 1
+        return template, template.params(raw)
+
+    def save(self, path=DEFAULT_TEMPLATES_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": 1,
+            "config": {"depth": self.depth, "similarity": self.similarity,
+                       "max_children": self.max_children, "max_templates": self.max_templates},
+            "next_id": self._next_id,
+            "templates": [{"id": t.id, "template": t.tokens, "count": t.count}
+                          for t in self.templates.values()],
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_TEMPLATES_PATH, **config) -> "TemplateMiner":
+        """A miner warmed up from `path`; a fresh one if it is missing or unreadable."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(**config)
+        miner = cls(**{**data.get("config", {}), **config})
+        for entry in data.get("templates", []):
+            template = Template(entry["id"], list(entry["template"]), entry.get("count", 0))
+            leaf = miner._leaf(template.tokens)
+            template.leaf = leaf
+            leaf.append(template)
+            miner.templates[template.id] = template
+        miner._next_id = max(data.get("next_id", 1), max(miner.templates, default=0) + 1)
+        return miner
+
+
+def _group_line(template: Template, records: List[dict], values: List[List[str]],
+                max_values: int) -> str:
+    first = records[0]
+    line = {"template": template.text, "count": len(records)}
+    for field in _GROUP_FIELDS:
+        if first.get(field) is not None:
+            line[field] = first[field]
+    stamps = [r["timestamp"] for r in records if r.get("timestamp")]
+    if stamps:
+        line["first"], line["last"] = stamps[0], stamps[-1]
+    if values:
+        shown = []
+        for position in zip(*values):
+            distinct = list(dict.fromkeys(position))
+            extra = len(distinct) - max_values
+            shown.append(distinct[:max_values] + ([f"+{extra} more"] if extra > 0 else []))
+        line["values"] = shown
+    return json.dumps(line)
+
+
+def _flush(window: List[dict], miner: TemplateMiner, max_values: int) -> Iterator[str]:
+    groups: Dict[tuple, list] = {}  # first-seen order
+    for record in window:
+        message = record.get("message")
+        if message is None or any(record.get(f) is not None for f in _UNFOLDED_FIELDS):
+            groups[("record", id(record))] = [None, [record], []]
+            continue
+        template, _ = miner.add(message)
+        key = (template.id,) + tuple(json.dumps(record.get(f)) for f in _GROUP_FIELDS)
+        group = groups.setdefault(key, [template, [], []])
+        group[1].append(record)
+    for template, records, values in groups.values():
+        if template is None or len(records) == 1:
+            yield from (json.dumps(r) for r in records)
+            continue
+        # Values are read against the final (most general) template.
+        for record in records:
+            message = record["message"]
+            raw = (message if isinstance(message, str) else json.dumps(message)).split()
+            values.append(template.params(raw))
+        yield _group_line(template, records, values, max_values)
+
+
+def iter_compressed(logs: Iterable[dict], miner: Optional[TemplateMiner] = None,
+                    window: int = 1000, max_values: int = 8) -> Iterator[str]:
+    """
+    Prompt lines (JSON strings) for `logs`: repeated messages folded into
+    one template line per call site within each `window` of records.
+    Streams; memory is one window plus the miner's bounded table.
+    """
+    miner = miner if miner is not None else TemplateMiner()
+    buffer = []
+    for record in logs:
+        buffer.append(record)
+        if len(buffer) >= window:
+            yield from _flush(buffer, miner, max_values)
+            buffer = []
+    if buffer:
+        yield from _flush(buffer, miner, max_values)
+
+
+def compress_records(logs: Iterable[dict], miner: Optional[TemplateMiner] = None, **kwargs) -> List[str]:
+    return list(iter_compressed(logs, miner, **kwargs))
+
+
+PROMPT_NOTE = (
+    "Lines with a \"template\" stand for \"count\" log records with that message "
+    "shape; \"values\" lists the distinct values seen at each <*>.\n"
+)
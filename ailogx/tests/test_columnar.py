@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ailogx.summarizer.chunker import prioritize_chunks, score_chunk
+from ailogx.utils.columnar import LogTable
+from ailogx.utils.parallel import RecordFilter
+from ailogx.utils.preprocess import fast_mode, iter_fast_mode, smart_filter
+from ailogx.utils.reader import ReadStats, load_logs
+
+
+def test_log_table_fast_paths_match_record_functions(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    levels = ["info", "decision_point", "error_reasoning", "function_exit"]
+    with open(path, "w") as f:
+        for i in range(500):
+            record = {"timestamp": f"2025-08-04T06:{i // 60:02d}:{i % 60:02d}Z",
+                      "level": levels[i % 4], "message": f"m{i}",
+                      "context_id": f"ctx{i % 7}" if i < 300 else None,
+                      "file": f"f{i % 3}.py", "trace_id": f"t{i % 5}"}
+            if i % 9 == 0:
+                record["reason"] = "because"
+            f.write(json.dumps(record) + "\n")
+        f.write("not json\n")
+
+    records = load_logs(path)
+    stats = ReadStats()
+    table = LogTable.from_path(path, stats)
+    assert (len(table), stats.malformed) == (500, 1)
+    assert table.records() == records == LogTable.from_records(records).records()
+    assert table[3] == records[3] and table[10:20].records() == records[10:20]
+
+    assert smart_filter(table).records() == smart_filter(records)
+    window = RecordFilter(levels={"error_reasoning", "info"}, since="2025-08-04T06:02",
+                          until="2025-08-04T06:05", trace_id="t2")
+    assert table.filter(window).records() == [r for r in records if window(r)]
+
+    assert score_chunk(table) == score_chunk(records)
+    assert prioritize_chunks(table, 37, 4) == prioritize_chunks(records, 37, 4)
+
+    groups = table.group_by("context")
+    assert list(groups) == ["ctx0", "ctx1", "ctx2", "ctx3", "ctx4", "ctx5", "ctx6",
+                            "f0.py", "f1.py", "f2.py"]
+    assert groups["ctx3"].records() == [r for r in records if r["context_id"] == "ctx3"]
+
+    # Same as fast_mode over the dicts: small groups whole, big ones collapse
+    # to their middle record, groups in first-seen order.
+    sampled = fast_mode(table, threshold=60).records()
+    assert sampled == fast_mode(records, threshold=60)
+    assert list(iter_fast_mode(table, threshold=60)) == sampled
+
+
+def test_log_table_encodes_the_logger_column():
+    records = [{"level": "info", "logger": "app"}, {"level": "info", "logger_name": "bridge"},
+               {"level": "info"}]
+    assert LogTable.from_records(records).values("logger") == ["app", "bridge", None]
+
+
+def test_log_table_filters_unparsed_timestamps_like_record_filter():
+    records = [
+        {"timestamp": "2025-08-04T06:03:00Z", "level": "info", "logger": "app"},
+        {"timestamp": "2025-08-04T06:03:30.250", "level": "info", "logger": "app"},  # no Z
+        {"timestamp": "2025-08-04T06:03:45+00:00", "level": "info", "logger_name": "bridge"},
+        {"timestamp": "2025-08-04T07:00:00", "level": "info"},
+        {"level": "info"},
+    ]
+    table = LogTable.from_records(records)
+    for window in (RecordFilter(since="2025-08-04T06:03", until="2025-08-04T06:04"),
+                   RecordFilter(since="2025-08-04T06:03:10"),
+                   RecordFilter(until="2025-08-04T06:30")):
+        assert table.filter(window).records() == [r for r in records if window(r)]
@@ -0,0 +1,53 @@
+import json
+
+from ailogx.formatters.compact import encode_records, iter_prompt_chunks
+from ailogx.utils.tokenizer import TokenCounter, chunk_by_tokens
+
+TRACE = "fa32e835-8412-406e-b6eb-625020272e5b"
+FILE = "/srv/app/ailogx/service/auth.py"
+
+
+def make_logs(n=4):
+    return [{"timestamp": f"2025-08-04T06:18:0{i}.500000Z", "level": "info", "logger": "app",
+             "message": f"step {i}", "trace_id": TRACE, "file": FILE, "line": 10 + i}
+            for i in range(n)]
+
+
+def test_compact_hoists_common_fields_and_aliases_ids():
+    logs = make_logs()
+    logs[1]["file"] = "/srv/app/ailogx/service/other.py"
+    text = encode_records(logs, "compact")
+    lines = text.splitlines()
+
+    assert "t0: 2025-08-04T06:18:00.500000Z" in lines
+    aliases = json.loads(next(l for l in lines if l.startswith("aliases: "))[len("aliases: "):])
+    assert aliases == {"@1": TRACE, "@2": FILE}  # other.py occurs once: no alias
+    common = json.loads(next(l for l in lines if l.startswith("common: "))[len("common: "):])
+    assert common == {"level": "info", "logger": "app", "trace_id": "@1"}
+
+    rows = [json.loads(l) for l in lines if l.startswith("{")]
+    assert [r["t"] for r in rows] == [0.0, 1.0, 2.0, 3.0]
+    assert [r["file"] for r in rows] == ["@2", "/srv/app/ailogx/service/other.py", "@2", "@2"]
+    assert all("trace_id" not in r and "timestamp" not in r for r in rows)
+
+
+def test_table_writes_columns_once():
+    logs = make_logs(3)
+    logs[2]["reason"] = "a|b\nc"
+    lines = encode_records(logs, "table").splitlines()
+    columns = next(l for l in lines if l.startswith("columns: "))
+    assert columns == "columns: t|message|line|reason"
+    assert lines[-1] == "2.0|step 2|12|a\\|b\\nc"
+
+
+def test_chunks_are_sized_on_the_encoding():
+    logs = make_logs(8) * 50
+    counter = TokenCounter("llama3")
+
+    json_chunks = list(iter_prompt_chunks(logs, "json", max_tokens=300, counter=counter))
+    assert json_chunks == ["\n".join(c) for c in chunk_by_tokens(logs, max_tokens=300, counter=counter)]
+
+    compact = list(iter_prompt_chunks(logs, "compact", max_tokens=300, counter=counter))
+    assert len(compact) < len(json_chunks)
+    rows = [l for chunk in compact for l in chunk.splitlines() if l.startswith("{")]
+    assert len(rows) == len(logs)
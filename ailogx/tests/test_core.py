@@ -0,0 +1,567 @@
+import json
+
+from ailogx.core import LLMLogger
+from ailogx.payload import Lazy
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_async_logger_flushes_all_records(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("async", log_path=str(path), async_mode=True, batch_size=8)
+
+    for i in range(100):
+        logger.llm_info(f"record {i}")
+    logger.flush()
+
+    records = read_records(path)
+    assert [r["message"] for r in records] == [f"record {i}" for i in range(100)]
+    logger.close()
+
+
+def test_async_logger_drops_low_severity_first(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("async", log_path=str(path), async_mode=True, max_queue=5,
+                       batch_size=1000, flush_interval=60, overflow="drop_low_severity")
+
+    for _ in range(20):
+        logger.llm_context("noise")
+    logger.llm_error("boom")
+    logger.close()
+
+    levels = [r["level"] for r in read_records(path)]
+    assert "error_reasoning" in levels
+    assert logger.dropped > 0
+
+
+def test_async_logger_snapshots_payloads_and_counts_failed_writes(tmp_path, capsys):
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("async", log_path=str(path), async_mode=True, flush_interval=60)
+
+    state = {"step": 1, "seen": [1]}
+    logger.llm_info("checkpoint", inputs=state)
+    state["step"] = 2
+    state["seen"].append(2)
+    logger.flush()
+    assert read_records(path)[0]["inputs"] == {"step": 1, "seen": [1]}
+
+    def fail(entries):
+        raise OSError("disk full")
+
+    logger._writer.write_batch = fail
+    logger.llm_info("lost")
+    logger.llm_info("lost too")
+    logger.flush()
+    assert logger.dropped == 2
+    assert "disk full" in capsys.readouterr().err
+    logger.close()
+
+
+def test_records_put_after_close_follow_the_final_batch():
+    import threading
+    import time
+    from ailogx.writer import BackgroundWriter
+
+    written, active, overlaps = [], [0], []
+
+    def write_batch(batch):
+        active[0] += 1
+        overlaps.append(active[0] > 1)
+        time.sleep(0.01)
+        written.extend(r["n"] for r in batch)
+        active[0] -= 1
+
+    writer = BackgroundWriter(write_batch, batch_size=2, flush_interval=60)
+    for n in range(10):
+        writer.put({"n": n})
+    closing = threading.Thread(target=writer.close)
+    closing.start()
+    while not writer._closed:
+        time.sleep(0.001)
+    writer.put({"n": 10})  # late: the writer thread is still draining
+    closing.join()
+
+    assert written == list(range(11))
+    assert not any(overlaps)
+
+
+def test_callsite_reports_caller_through_wrappers(tmp_path):
+    import logging
+    from ailogx.handlers import LLMLogHandler
+
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("sites", log_path=str(path))
+    std = logging.getLogger("ailogx-test-sites")
+    handler = LLMLogHandler(logger)
+    std.addHandler(handler)
+    std.setLevel(logging.INFO)
+
+    def helper():
+        logger.llm_info("wrapped", stacklevel=2)
+
+    helper()
+    std.info("bridged")
+    with logger.function_span("span"):
+        pass
+    handler.flush()
+    std.removeHandler(handler)
+
+    records = read_records(path)
+    assert {r["function"] for r in records} == {"test_callsite_reports_caller_through_wrappers"}
+    assert all(r["file"] == __file__ for r in records)
+
+
+def test_log_handler_maps_record_metadata(tmp_path):
+    import inspect
+    import logging
+    from ailogx.handlers import LLMLogHandler
+
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("bridge", log_path=str(path))
+    handler = LLMLogHandler(logger)
+    std = logging.getLogger("ailogx-test-bridge")
+    std.addHandler(handler)
+    std.setLevel(logging.DEBUG)
+
+    std.warning("retrying %s", "fetch")
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        std.exception("failed")
+    std.critical("down")
+    std.debug("detail")
+    line = inspect.currentframe().f_lineno - 1
+    handler.close()
+    std.removeHandler(handler)
+
+    warn, err, crit, debug = read_records(path)
+    assert [r["level"] for r in (warn, err, crit, debug)] == [
+        "decision_point", "error_reasoning", "error_reasoning", "info"]
+    assert warn["message"] == "retrying fetch" and warn["logger_name"] == "ailogx-test-bridge"
+    assert all(r["file"] == __file__ for r in (warn, err, crit, debug))
+    assert {r["function"] for r in (warn, err, crit, debug)} == {"test_log_handler_maps_record_metadata"}
+    assert debug["line"] == line
+    assert "ZeroDivisionError" in err["traceback"]
+
+
+def test_callsite_capture_errors_only(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("sites", log_path=str(path), capture_callsite="errors")
+
+    logger.llm_info("plain")
+    logger.llm_error("failed")
+    logger.flush()
+
+    plain, failed = read_records(path)
+    assert "file" not in plain
+    assert failed["function"] == "test_callsite_capture_errors_only"
+
+
+def test_file_sink_rotates_and_compresses(tmp_path):
+    import gzip
+    from ailogx.sinks import FileSink
+
+    path = tmp_path / "logs.jsonl"
+    sink = FileSink(str(path), max_bytes=2000)
+    logger = LLMLogger("rotating", sink=sink, capture_callsite="never")
+
+    for i in range(100):
+        logger.llm_info(f"record {i}")
+    logger.close()
+    sink.close()
+
+    archives = sorted(tmp_path.glob("logs.*.jsonl.gz"))
+    assert sink.generation == len(archives) > 0
+    assert path.stat().st_size <= 2000
+
+    messages = []
+    for archive in archives:
+        with gzip.open(archive, "rt") as f:
+            messages += [json.loads(line)["message"] for line in f]
+    messages += [r["message"] for r in read_records(path)]
+    assert sorted(messages) == sorted(f"record {i}" for i in range(100))
+
+
+def test_unserializable_payloads_do_not_raise(tmp_path):
+    from dataclasses import dataclass
+    from datetime import datetime
+    from decimal import Decimal
+
+    @dataclass
+    class Order:
+        id: int
+        total: Decimal
+
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("payloads", log_path=str(path), timestamp_resolution="ms")
+    circular = {}
+    circular["self"] = circular
+
+    logger.llm_info("order", inputs={"at": datetime(2025, 1, 2), "order": Order(1, Decimal("9.50"))})
+    logger.llm_info("loop", outputs=circular)
+    logger.flush()
+
+    order, loop = read_records(path)
+    assert order["inputs"] == {"at": "2025-01-02T00:00:00", "order": {"id": 1, "total": "9.50"}}
+    assert order["logger"] == "payloads" and order["context_id"] == logger.context_id
+    assert order["timestamp"].endswith("Z") and len(order["timestamp"]) == len("2025-01-02T00:00:00.000Z")
+    assert isinstance(loop["outputs"], str)
+
+
+def test_sampling_rate_limits_call_sites_and_reports_suppressed(tmp_path):
+    from ailogx.sampling import SamplingPolicy
+
+    path = tmp_path / "logs.jsonl"
+    policy = SamplingPolicy(rates={"info": 0.0}, rate_limit=0.001, burst=5, summary_interval=3600)
+    logger = LLMLogger("sampled", log_path=str(path), sampling=policy)
+
+    for depth in range(100):
+        logger.llm_context(f"Entering layer {depth}")
+        logger.llm_info("noise")
+    logger.llm_error("Leaf operation failed")
+    logger.flush()
+
+    records = read_records(path)
+    levels = [r["level"] for r in records]
+    assert levels.count("context_info") == 5
+    assert "info" not in levels
+    assert "error_reasoning" in levels
+
+    summaries = {r["sampled_level"]: r for r in records if r["level"] == "sampling_summary"}
+    assert summaries["context_info"]["suppressed"] == 95
+    assert summaries["info"]["suppressed"] == 100
+
+
+def test_sampling_summaries_are_periodic_and_written_at_exit(tmp_path):
+    import os
+    import subprocess
+    import sys
+    import time
+    from pathlib import Path
+    from ailogx.sampling import SamplingPolicy
+
+    # A module-level async logger that is never closed still reports at exit.
+    path = tmp_path / "exit.jsonl"
+    script = ("from ailogx.core import LLMLogger\n"
+              "from ailogx.sampling import SamplingPolicy\n"
+              f"log = LLMLogger('app', log_path={str(path)!r}, async_mode=True,\n"
+              "                sampling=SamplingPolicy(rates={'info': 0.0}))\n"
+              "for i in range(100):\n"
+              "    log.llm_info(f'noise {i}')\n")
+    root = Path(__file__).resolve().parents[2]
+    subprocess.run([sys.executable, "-c", script], cwd=tmp_path, check=True,
+                   env={**os.environ, "PYTHONPATH": str(root)})
+    (summary,) = read_records(path)
+    assert summary["level"] == "sampling_summary" and summary["suppressed"] == 100
+
+    # The writer's tick emits due summaries with nothing else being logged.
+    path = tmp_path / "tick.jsonl"
+    logger = LLMLogger("app", log_path=str(path), async_mode=True, flush_interval=0.02,
+                       sampling=SamplingPolicy(rates={"info": 0.0}, summary_interval=0.05))
+    for i in range(10):
+        logger.llm_info(f"noise {i}")
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        logger.sink.flush()  # the sink only: logger.flush() would write the record itself
+        if path.stat().st_size:
+            break
+        time.sleep(0.02)
+    assert [r["suppressed"] for r in read_records(path)] == [10]
+    logger.close()
+
+
+def test_spans_propagate_across_threads_and_tasks(tmp_path):
+    import asyncio
+    import threading
+    from ailogx.context import trace
+
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("traced", log_path=str(path))
+
+    def handle(request_id):
+        with trace():
+            logger.llm_info(f"start {request_id}")
+            with logger.function_span(f"work {request_id}"):
+                logger.llm_info(f"inside {request_id}")
+
+    async def handle_async(request_id):
+        await asyncio.sleep(0)
+        handle(request_id)
+
+    threads = [threading.Thread(target=handle, args=(f"t{i}",)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    async def run_tasks():
+        await asyncio.gather(*(handle_async(f"a{i}") for i in range(3)))
+
+    asyncio.run(run_tasks())
+    logger.start_group("request-g")
+    logger.llm_info("in group")
+    logger.end_group("request-g")
+    logger.llm_info("outside")
+    logger.flush()
+
+    records = read_records(path)
+    by_message = {r["message"]: r for r in records}
+    for request_id in ["t0", "t1", "t2", "a0", "a1", "a2"]:
+        start = by_message[f"start {request_id}"]
+        inside = by_message[f"inside {request_id}"]
+        assert inside["trace_id"] == start["trace_id"]
+        assert inside["parent_span_id"] == start["span_id"]
+    assert len({by_message[f"start {r}"]["trace_id"] for r in ["t0", "t1", "a0", "a1"]}) == 4
+
+    assert by_message["in group"]["trace_id"] == by_message["Start group: request-g"]["trace_id"]
+    assert by_message["outside"]["trace_id"] == logger.context_id
+    assert "span_id" not in by_message["outside"]
+
+
+
+def test_end_group_restores_the_outer_span_and_reports_mismatches(tmp_path, capsys):
+    from ailogx.context import current_span, trace
+
+    logger = LLMLogger("groups", str(tmp_path / "logs.jsonl"), capture_callsite="never")
+    with trace(name="request") as request:
+        logger.start_group("outer")
+        outer = current_span()
+        logger.start_group("inner")
+        logger.end_group("innr")  # typo: nothing is ended
+        assert current_span().name == "inner"
+        assert "no matching start_group" in capsys.readouterr().err
+
+        logger.end_group("outer")  # unwinds the forgotten inner group too
+        assert current_span() is request and outer.parent is request
+        assert "also ends unclosed groups 'inner'" in capsys.readouterr().err
+
+        logger.start_group("again")
+        logger.end_group("again")
+        assert current_span() is request and capsys.readouterr().err == ""
+    assert current_span() is None
+    logger.close()
+
+def test_lazy_payloads_and_budget(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("payloads", log_path=str(path), min_level="info", payload_budget=300)
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return {"rows": list(range(10000)), "body": "x" * 5000}
+
+    logger.llm_context("filtered out", inputs=Lazy(expensive))
+    logger.llm_info("kept", outputs=Lazy(expensive))
+    logger.flush()
+
+    assert len(calls) == 1
+    (record,) = read_records(path)
+    outputs = record["outputs"]
+    assert len(json.dumps(outputs)) <= 300
+    assert outputs["rows"]["__truncated__"] is True
+    assert outputs["rows"]["type"] == "list" and outputs["rows"]["length"] == 10000
+    assert outputs["body"]["head"] == "x" * len(outputs["body"]["head"])
+
+
+def test_plain_callables_are_logged_not_called(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("payloads", log_path=str(path))
+    calls = []
+
+    def callback():
+        calls.append(1)
+        return "ran"
+
+    logger.llm_info("callbacks", inputs=callback, outputs={"hook": callback})
+    logger.close()
+
+    assert calls == []
+    (record,) = read_records(path)
+    assert "callback" in record["inputs"] and record["inputs"] != "ran"
+    assert "callback" in record["outputs"]["hook"]
+
+
+def test_llm_logged_writes_one_span_per_call(tmp_path):
+    import asyncio
+    import pytest
+    from ailogx.decorators import llm_logged
+
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("decorated", log_path=str(path))
+
+    @llm_logged(reason="add", logger=logger, capture="full")
+    def add(a, b, *rest):
+        return a + b + sum(rest)
+
+    @llm_logged(logger=logger)
+    async def fetch(key):
+        await asyncio.sleep(0)
+        return key.upper()
+
+    @llm_logged(logger=logger, capture="repr")
+    def count(n):
+        yield from range(n)
+
+    @llm_logged(logger=logger)
+    def fail():
+        raise ValueError("boom")
+
+    def caller():
+        assert add(1, 2, 3) == 6
+        assert asyncio.run(fetch("k")) == "K"
+        assert list(count(3)) == [0, 1, 2]
+        with pytest.raises(ValueError):
+            fail()
+
+    caller()
+    logger.flush()
+    add_rec, fetch_rec, count_rec, fail_rec = read_records(path)
+    assert [r["level"] for r in (add_rec, fetch_rec, count_rec)] == ["function_span"] * 3
+    assert add_rec["inputs"] == {"a": 1, "b": 2, "rest": [3]}
+    assert add_rec["outputs"] == 6 and add_rec["reason"] == "add"
+    assert fetch_rec["inputs"] == ["key"] and fetch_rec["outputs"] == "K"
+    assert count_rec["inputs"] == {"n": "3"} and count_rec["items"] == 3
+    assert all(r["duration_ms"] >= 0 for r in (add_rec, fetch_rec, count_rec))
+    assert add_rec["function"] == "caller"
+    assert count_rec["function"] == "caller"
+    assert fail_rec["level"] == "function_exit_error"
+    assert "ValueError: boom" in fail_rec["traceback"]
+
+
+def test_llm_logged_does_not_call_returned_callables(tmp_path):
+    from ailogx.decorators import llm_logged
+
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("decorated", log_path=str(path))
+    calls = []
+
+    def work():
+        calls.append(1)
+
+    @llm_logged(logger=logger)
+    def make_closure():
+        return work
+
+    @llm_logged(logger=logger)
+    def make_lazy():
+        return Lazy(work)
+
+    assert make_closure() is work
+    assert isinstance(make_lazy(), Lazy)
+    logger.close()
+
+    assert calls == []
+    closure_rec, lazy_rec = read_records(path)
+    assert "work" in closure_rec["outputs"]
+    assert lazy_rec["outputs"].startswith("Lazy(")
+
+
+def test_llm_logged_generators_run_in_their_own_span(tmp_path):
+    import asyncio
+    from ailogx.context import current_span, trace
+    from ailogx.decorators import llm_logged
+
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("decorated", log_path=str(path))
+
+    @llm_logged(logger=logger)
+    def rows(n):
+        for i in range(n):
+            logger.llm_info(f"row {i}")
+            yield i
+
+    @llm_logged(logger=logger)
+    async def arows(n):
+        for i in range(n):
+            logger.llm_info(f"arow {i}")
+            yield i
+
+    async def consume():
+        seen = []
+        async for i in arows(2):
+            seen.append((i, current_span().name))
+        return seen
+
+    with trace() as root:
+        for _ in rows(2):
+            assert current_span() is root  # the consumer is not inside the span
+        assert asyncio.run(consume()) == [(0, "trace"), (1, "trace")]
+    logger.close()
+
+    row0, row1, gen_rec, arow0, arow1, agen_rec = read_records(path)
+    for span_rec, children in ((gen_rec, (row0, row1)), (agen_rec, (arow0, arow1))):
+        assert span_rec["level"] == "function_span" and span_rec["items"] == 2
+        assert span_rec["parent_span_id"] == root.span_id
+        assert all(c["span_id"] == span_rec["span_id"] for c in children)
+        assert all(c["parent_span_id"] == root.span_id for c in children)
+
+
+def test_aggregate_span_mode_writes_stats_and_outliers(tmp_path):
+    import time
+    import pytest
+
+    path = tmp_path / "logs.jsonl"
+    logger = LLMLogger("spans", log_path=str(path), span_mode="aggregate",
+                       span_stats_interval=3600, span_outlier_ms=20)
+
+    for _ in range(200):
+        with logger.function_span("hot"):
+            pass
+    with logger.function_span("hot"):
+        time.sleep(0.03)
+    with pytest.raises(KeyError):
+        with logger.function_span("hot"):
+            raise KeyError("missing")
+    logger.log_span("external", 5_000_000)
+    logger.sink.flush()
+    assert len(read_records(path)) == 2  # outlier + error only
+
+    logger.flush()
+    outlier, error, *stats = read_records(path)
+    assert outlier["level"] == "function_span" and outlier["outlier"] is True
+    assert outlier["duration_ms"] >= 20
+    assert error["level"] == "function_exit_error" and "KeyError" in error["traceback"]
+    by_name = {s["span_name"]: s for s in stats}
+    assert {s["level"] for s in stats} == {"span_stats"}
+    hot = by_name["hot"]
+    assert hot["count"] == 202 and hot["errors"] == 1
+    assert hot["p50_ms"] <= hot["p95_ms"] <= hot["p99_ms"] <= hot["max_ms"]
+    assert hot["max_ms"] >= 20
+    assert by_name["external"]["p50_ms"] == pytest.approx(5.0, rel=0.07)
+
+
+def test_span_stats_are_periodic_and_written_at_exit(tmp_path):
+    import os
+    import subprocess
+    import sys
+    import time
+    from pathlib import Path
+
+    path = tmp_path / "exit.jsonl"
+    script = ("from ailogx.core import LLMLogger\n"
+              f"log = LLMLogger('app', log_path={str(path)!r}, async_mode=True,\n"
+              "                span_mode='aggregate')\n"
+              "for i in range(50):\n"
+              "    log.log_span('handler', 1_000_000)\n")
+    root = Path(__file__).resolve().parents[2]
+    subprocess.run([sys.executable, "-c", script], cwd=tmp_path, check=True,
+                   env={**os.environ, "PYTHONPATH": str(root)})
+    (stats,) = read_records(path)
+    assert stats["level"] == "span_stats" and stats["count"] == 50
+
+    path = tmp_path / "tick.jsonl"
+    logger = LLMLogger("app", log_path=str(path), async_mode=True, flush_interval=0.02,
+                       span_mode="aggregate", span_stats_interval=0.05)
+    for _ in range(10):
+        logger.log_span("handler", 1_000_000)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        logger.sink.flush()  # the sink only: logger.flush() would write the record itself
+        if path.stat().st_size:
+            break
+        time.sleep(0.02)
+    assert [r["count"] for r in read_records(path)] == [10]
+    logger.close()
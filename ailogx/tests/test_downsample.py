@@ -0,0 +1,33 @@
+from ailogx.utils.downsample import DownsampleReport, downsample
+
+
+def test_downsample_keeps_errors_with_context_and_stratifies():
+    logs = []
+    for i in range(5000):
+        site = ("hot.py", 10) if i % 10 else ("quiet.py", 20)
+        logs.append({"level": "context_info", "message": f"m{i}", "file": site[0], "line": site[1]})
+    logs[2500] = {"level": "error_reasoning", "message": "boom", "file": "hot.py", "line": 99}
+    logs[4999] = {"level": "decision_point", "message": "retry", "file": "hot.py", "line": 42}
+
+    report = DownsampleReport()
+    out = downsample(logs, target=100, context=3, report=report)
+    records = [r for r in out if r["level"] != "sampling_summary"]
+    messages = [r["message"] for r in records]
+
+    assert len(records) == 100 and report.kept == 100 and report.total == 5000
+    assert messages[messages.index("boom") - 3:messages.index("boom") + 4] == \
+        ["m2497", "m2498", "m2499", "boom", "m2501", "m2502", "m2503"]
+    assert messages[-4:] == ["m4996", "m4997", "m4998", "retry"]
+    assert [int(m[1:]) for m in messages if m.startswith("m")] == \
+        sorted(int(m[1:]) for m in messages if m.startswith("m"))  # log order
+    # Round-robin strata: the quiet call site gets as many slots as the hot one.
+    sampled = [r for r in records if r["level"] == "context_info"]
+    assert sum(r["file"] == "quiet.py" for r in sampled) >= 40
+
+    summaries = [r for r in out if r["level"] == "sampling_summary"]
+    assert sum(r["suppressed"] for r in summaries) == 4900
+    assert out == downsample(logs, target=100, context=3)  # seeded
+
+    # A token target limits sampling, never the errors and decisions.
+    tiny = downsample(logs, target=1000, target_tokens=10, context=0, summaries=False)
+    assert [r["message"] for r in tiny] == ["boom", "retry"]
@@ -0,0 +1,204 @@
+import gzip
+import json
+
+from ailogx.utils.preprocess import fast_mode, iter_fast_mode, iter_intent_filter, iter_smart_filter
+from ailogx.utils.reader import ReadStats, iter_logs
+
+
+def test_iter_logs_skips_and_counts_malformed_lines(tmp_path):
+    path = tmp_path / "logs.jsonl.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(json.dumps({"level": "info", "message": "a"}) + "\n")
+        f.write("not json\n")
+        f.write("[1, 2]\n")
+        f.write(json.dumps({"level": "error_reasoning", "message": "b", "reason": "x"}) + "\n")
+        f.write('{"level": "info", "mess')  # torn final write
+
+    stats = ReadStats()
+    records = iter_logs(path, stats)
+    assert next(records)["message"] == "a"  # lazy: nothing else read yet
+    assert stats.records == 1
+    assert [r["message"] for r in records] == ["b"]
+    assert (stats.records, stats.malformed) == (2, 3)
+
+
+def test_filter_stages_stream():
+    def records():
+        for i in range(10000):
+            yield {"level": "info", "file": f"f{i % 3}.py", "message": f"m{i}",
+                   "reason": "r" if i % 1000 == 0 else None}
+
+    smart = iter_smart_filter(records())
+    assert next(smart)["message"] == "m0"
+    assert sum(1 for _ in smart) == 9
+
+    sampled = list(iter_fast_mode(records(), threshold=5))
+    assert sorted(r["file"] for r in sampled) == ["f0.py", "f1.py", "f2.py"]
+    assert sampled == list(iter_fast_mode(records(), threshold=5))  # seeded
+    small = [{"file": "a"}, {"file": "a"}, {"file": "b"}]
+    assert fast_mode(small) == small
+    group = [{"file": "a", "n": n} for n in range(5)]
+    assert fast_mode(group, threshold=2) == [group[2]]  # the middle record
+
+    assert list(iter_intent_filter(iter([{"m": "x"}]), "auth", fallback=lambda: ["orig"])) == ["orig"]
+
+
+def test_parallel_loader_matches_serial_filtered_read(tmp_path):
+    from ailogx.utils.parallel import RecordFilter, iter_logs_parallel, split_ranges
+
+    path = tmp_path / "logs.jsonl"
+    levels = ["info", "decision_point", "error_reasoning"]
+    with open(path, "w") as f:
+        for i in range(3000):
+            record = {"timestamp": f"2025-08-04T06:{i // 60 % 60:02d}:{i % 60:02d}Z",
+                      "level": levels[i % 3], "message": f"m{i}"}
+            f.write(json.dumps(record) + "\n")
+            if i % 500 == 0:
+                f.write("garbage\n")
+
+    ranges = split_ranges(path, chunk_bytes=4096)
+    assert len(ranges) > 10 and ranges[-1][1] == path.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+    keep = RecordFilter(levels={"error_reasoning", "decision_point"},
+                        since="2025-08-04T06:10", until="2025-08-04T06:40")
+    expected = [r for r in iter_logs(path) if keep(r)]
+    assert 0 < len(expected) < 3000
+
+    stats = ReadStats()
+    ordered = list(iter_logs_parallel(path, workers=3, record_filter=keep,
+                                      stats=stats, chunk_bytes=4096))
+    assert ordered == expected
+    assert (stats.records, stats.malformed) == (3000, 6)
+
+    unordered = iter_logs_parallel(path, workers=3, record_filter=keep, ordered=False,
+                                   chunk_bytes=4096)
+    assert sorted(r["message"] for r in unordered) == sorted(r["message"] for r in expected)
+
+
+def test_sidecar_index_lookups_and_incremental_update(tmp_path):
+    from ailogx.utils.logindex import build_index, index_path_for
+
+    path = tmp_path / "logs.jsonl"
+
+    def write(records, mode="a"):
+        with open(path, mode) as f:
+            for r in records:
+                f.write(json.dumps(r) + "\n")
+
+    write([{"timestamp": f"2025-08-04T06:00:{i:02d}Z", "level": "info",
+            "trace_id": f"t{i % 4}", "message": f"m{i}"} for i in range(40)], "w")
+    with build_index(path) as index:
+        assert len(index) == 40
+        assert [r["message"] for r in index.iter_trace("t1")] == [f"m{i}" for i in range(1, 40, 4)]
+        assert list(index.iter_trace("missing")) == []
+        assert len(list(index.iter_lines_where(since="2025-08-04T06:00:30"))) == 10
+
+    write([{"timestamp": "2025-08-04T06:01:00Z", "level": "error_reasoning",
+            "trace_id": "t1", "message": "late"}])
+    with open(path, "a") as f:
+        f.write('{"torn": ')  # incomplete line is left for the next refresh
+    with build_index(path) as index:
+        assert len(index) == 41
+        assert [r["message"] for r in index.iter_trace("t1")][-1] == "late"
+        assert [index.record(i)["message"] for i in index.iter_lines_where(levels=["error_reasoning"])] == ["late"]
+
+    write([{"level": "info", "trace_id": "t9", "message": "rewritten"}], "w")
+    with build_index(path) as index:  # not an append: rebuilt from scratch
+        assert len(index) == 1 and index_path_for(path).exists()
+        assert [r["message"] for r in index.iter_trace("t9")] == ["rewritten"]
+
+
+def test_sidecar_index_appends_blocks_without_rewriting(tmp_path):
+    from ailogx.utils.logindex import build_index, index_path_for
+
+    path = tmp_path / "logs.jsonl"
+    with open(path, "w") as f:
+        for i in range(200):
+            f.write(json.dumps({"level": "info", "trace_id": f"t{i % 7}", "message": f"m{i}"}) + "\n")
+    build_index(path).close()
+
+    for i in range(200, 260):
+        with open(path, "a") as f:
+            f.write(json.dumps({"level": "warning", "trace_id": f"t{i % 7}", "message": f"m{i}"}) + "\n")
+        inode = index_path_for(path).stat().st_ino
+        with build_index(path) as index:
+            assert len(index) == i + 1 and len(index.blocks) <= 8
+            assert index.record(i)["message"] == f"m{i}"
+        if index_path_for(path).stat().st_ino != inode:  # compaction rewrote the file
+            break
+    else:
+        raise AssertionError("dead space was never compacted")
+
+    with build_index(path) as index, build_index(path, tmp_path / "fresh.idx", force=True) as fresh:
+        assert len(index) == len(fresh)
+        for trace in ("t0", "t3", "t6"):
+            assert list(index.iter_trace(trace)) == list(fresh.iter_trace(trace))
+        assert list(index.iter_lines_where(levels=["warning"])) == list(range(200, len(index)))
+
+
+def test_read_new_handles_append_rotation_and_truncation(tmp_path):
+    import os
+    from ailogx.follow import Checkpoint, read_new
+
+    path = tmp_path / "app.jsonl"
+
+    def append(target, *messages, tail=""):
+        with open(target, "a") as f:
+            for m in messages:
+                f.write(json.dumps({"message": m}) + "\n")
+            f.write(tail)
+
+    append(path, "a", "b", tail='{"message": "par')
+    records, cp = read_new(path, Checkpoint())
+    assert [r["message"] for r in records] == ["a", "b"]
+
+    with open(path, "a") as f:
+        f.write('tial"}\n')
+    append(path, "c")
+    records, cp = read_new(path, cp)
+    assert [r["message"] for r in records] == ["partial", "c"]
+    assert read_new(path, cp)[0] == []
+
+    append(path, "d")
+    os.rename(path, tmp_path / "app.20250804-060000.jsonl")  # rotated
+    append(path, "e")
+    records, cp = read_new(path, cp)
+    assert [r["message"] for r in records] == ["d", "e"]
+
+    cp.save(tmp_path / "cp.json")
+    cp = Checkpoint.load(tmp_path / "cp.json")
+    with open(path, "w") as f:  # truncated in place
+        f.write(json.dumps({"message": "f"}) + "\n")
+    records, cp = read_new(path, cp)
+    assert [r["message"] for r in records] == ["f"]
+
+
+def test_projected_read_matches_full_decode(tmp_path):
+    from ailogx.utils.parallel import RecordFilter
+    from ailogx.utils.preprocess import is_smart, smart_filter
+    from ailogx.utils.reader import load_logs, project_line
+
+    assert project_line('{"level": "info", "n": 3}\n', ("level", "n")) == {"level": "info", "n": 3}
+    assert project_line('{"message": "level: \\"x\\"", "level": "warn"}', ("level",)) == {"level": "warn"}
+    assert project_line('{"inputs": {"level": "x"}, "level": "info"}', ("level",)) is None
+    assert project_line('{"level": {"nested": 1}}', ("level",)) is None
+    assert project_line('{"message": "a"}', ("level",)) == {}
+    assert project_line('{"level": "in', ("level",)) is None
+
+    path = tmp_path / "logs.jsonl"
+    with open(path, "w") as f:
+        for i in range(200):
+            record = {"level": ["info", "error_reasoning"][i % 7 == 0], "message": f"m{i}"}
+            if i % 5 == 0:
+                record = {"inputs": {"level": "error_reasoning"}, **record}
+            if i % 11 == 0:
+                record["reason"] = "because"
+            f.write(json.dumps(record) + "\n")
+        f.write("garbage\n")
+
+    stats = ReadStats()
+    assert list(iter_logs(path, stats, where=is_smart)) == smart_filter(load_logs(path))
+    assert (stats.malformed, stats.rejected > 100) == (1, True)
+    errors = RecordFilter(levels={"error_reasoning"})
+    assert list(iter_logs(path, where=errors)) == [r for r in load_logs(path) if errors(r)]
@@ -0,0 +1,92 @@
+import json
+
+from ailogx.utils.preprocess import intent_filter
+from ailogx.utils.search import (SearchIndex, build_search_index, search_path_for,
+                                 select_relevant, tokenize)
+
+
+def test_tokenize_splits_identifiers_and_drops_ids():
+    assert tokenize("AuthService.validateToken failed in auth_service.py") == \
+        ["auth", "service", "validate", "token", "failed", "in", "auth", "service", "py"]
+    assert tokenize("ctx fa32e835-8412-406e-b6eb-625020272e5b deadbeef42 port 8080 code 500") == \
+        ["ctx", "port", "8080", "code", "500"]
+
+
+def test_intent_ranking_and_sidecar_cache(tmp_path):
+    records = [
+        {"level": "info", "message": "cache warmed", "file": "app/cache.py"},
+        {"level": "error_reasoning", "message": "token expired", "reason": "auth failure",
+         "file": "svc/auth_service.py", "function": "validate_token"},
+        {"level": "info", "message": "user authenticated", "file": "svc/auth_service.py"},
+        {"level": "info", "message": "request a1b2c3d4e5f6 served", "trace_id": "authx"},
+        {"level": "error_reasoning", "message": "db timeout", "reason": "pool exhausted"},
+    ]
+    path = tmp_path / "logs.jsonl"
+    with open(path, "w") as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+        f.write("garbage\n")
+
+    memory = SearchIndex.from_records(records)
+    ranked = [doc for _, doc in memory.search("auth errors")]
+    assert ranked[0] == 1 and set(ranked) == {1, 2, 4}  # never the trace_id "authx"
+
+    with build_search_index(path) as index:
+        assert search_path_for(path).exists()
+        assert index.search("auth errors") == memory.search("auth errors")
+        picked = select_relevant(index, "auth error", top_n=2)
+        assert [r["message"] for r in picked] == ["token expired", "user authenticated"]
+        only_errors = select_relevant(index, "auth", where=lambda r: r["level"] != "info")
+        assert [r["message"] for r in only_errors] == ["token expired"]
+        assert len(select_relevant(index, "auth error", token_budget=1)) == 1
+
+    with open(path, "a") as f:  # appended lines are added to the sidecar
+        f.write(json.dumps({"level": "info", "message": "auth retried"}) + "\n")
+    with build_search_index(path) as index:
+        assert len(index) == 6
+
+    assert [r["message"] for r in intent_filter(records, "auth")] == \
+        ["token expired", "user authenticated"]
+
+
+def test_sidecar_ignores_an_unterminated_final_line(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    with open(path, "w") as f:
+        f.write(json.dumps({"level": "info", "message": "auth ok"}) + "\n")
+        f.write('{"level": "info", "message": "auth hal')  # still being written
+
+    with build_search_index(path) as index:
+        assert len(index) == 1
+    sidecar_mtime = search_path_for(path).stat().st_mtime_ns
+    with build_search_index(path) as index:  # reused, not rebuilt
+        assert len(index) == 1
+    assert search_path_for(path).stat().st_mtime_ns == sidecar_mtime
+
+    with open(path, "a") as f:
+        f.write('f done"}\n')
+    with build_search_index(path) as index:
+        assert [r["message"] for r in select_relevant(index, "auth")] == ["auth ok", "auth half done"]
+
+
+def test_sidecar_is_extended_with_appended_lines(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    messages = ["auth ok", "db timeout", "auth token expired", "cache warmed"]
+    with open(path, "w") as f:
+        for m in messages[:2]:
+            f.write(json.dumps({"level": "info", "message": m}) + "\n")
+    build_search_index(path).close()
+
+    with open(path, "a") as f:
+        for m in messages[2:]:
+            f.write(json.dumps({"level": "info", "message": m}) + "\n")
+    with build_search_index(path) as extended:
+        memory = SearchIndex.from_records({"level": "info", "message": m} for m in messages)
+        assert extended.vocab == memory.vocab
+        assert extended.search("auth token") == memory.search("auth token")
+        assert [r["message"] for r in select_relevant(extended, "auth")] == ["auth ok", "auth token expired"]
+        assert extended.indexed_size == path.stat().st_size
+
+    with open(path, "w") as f:  # rewritten, not appended: rebuilt from scratch
+        f.write(json.dumps({"level": "info", "message": "fresh start"}) + "\n")
+    with build_search_index(path) as index:
+        assert index.vocab == ["fresh", "info", "start"]
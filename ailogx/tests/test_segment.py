@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from ailogx.core import LLMLogger
+from ailogx.segment import SegmentEncoder, jsonl_to_segment, segment_to_jsonl
+from ailogx.utils.reader import load_logs
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "test_log.jsonl")
+
+
+def test_jsonl_segment_round_trip(tmp_path):
+    segment = tmp_path / "logs.alxs"
+    back = tmp_path / "logs.jsonl"
+
+    assert jsonl_to_segment(FIXTURE, segment) == 5
+    assert load_logs(segment) == load_logs(FIXTURE)
+
+    segment_to_jsonl(segment, back)
+    assert load_logs(back) == load_logs(FIXTURE)
+
+
+def test_segment_logger_appends_across_reopen_and_torn_frames(tmp_path):
+    path = tmp_path / "logs.alxs"
+    logger = LLMLogger("seg", log_path=str(path), log_format="segment")
+    logger.llm_info("first", inputs={"n": 1, "price": 9.5, "ok": True})
+    logger.llm_error("failed", reason="boom")
+    logger.close()
+
+    with open(path, "ab") as f:
+        f.write(b"R\x40\x01")  # half-written frame left behind by a crash
+
+    logger = LLMLogger("seg", log_path=str(path), log_format="segment")
+    logger.llm_info("second")
+    logger.close()
+
+    records = load_logs(path)
+    assert [r["message"] for r in records] == ["first", "failed", "second"]
+    assert records[0]["inputs"] == {"n": 1, "price": 9.5, "ok": True}
+    assert records[1]["level"] == "error_reasoning" and records[1]["reason"] == "boom"
+    assert records[2]["logger"] == "seg"
+    assert json.dumps(records[0])
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+def test_forked_child_writes_its_own_segment(tmp_path):
+    path = tmp_path / "logs.alxs"
+    logger = LLMLogger("seg", log_path=str(path), log_format="segment")
+    logger.llm_info("parent before fork")
+    logger.flush()
+
+    pid = os.fork()
+    if pid == 0:
+        for i in range(20):
+            logger.llm_info(f"child {i}", reason="forked")
+        logger.close()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    logger.llm_info("parent after fork", reason="still here")
+    logger.close()
+
+    child = load_logs(tmp_path / f"logs.{pid}.alxs")
+    assert [r["message"] for r in child] == [f"child {i}" for i in range(20)]
+    assert all(r["reason"] == "forked" for r in child)
+
+    # Reading the parent's segment merges the child's in, by timestamp.
+    merged = [r["message"] for r in load_logs(path)]
+    assert merged == ["parent before fork"] + [f"child {i}" for i in range(20)] + ["parent after fork"]
+
+
+def test_segment_dictionary_skips_one_off_messages(tmp_path):
+    encoder = SegmentEncoder(max_strings=100)
+    for i in range(1000):
+        encoder.encode({"level": "info", "message": f"unique {i}", "file": "app.py"})
+    assert set(encoder.strings) == {"message", "file", "app.py"}
+
+    encoder.encode({"level": "info", "message": "retrying", "file": "app.py"})
+    encoder.encode({"level": "info", "message": "retrying", "file": "app.py"})
+    assert "retrying" in encoder.strings  # interned once it repeats
+    for i in range(1000):
+        encoder.encode({"level": "info", "file": f"f{i}.py"})
+    assert len(encoder.strings) == 100
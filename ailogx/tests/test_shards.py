@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from ailogx.core import LLMLogger
+from ailogx.utils.reader import load_logs, shard_paths
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+def test_forked_workers_write_separate_shards_that_merge_in_order(tmp_path):
+    logger = LLMLogger("workers", log_path="app.jsonl", shard_dir=str(tmp_path),
+                       async_mode=True, batch_size=4, capture_callsite="never")
+    logger.llm_info("parent before fork")
+    logger.flush()
+
+    children = []
+    for worker in range(3):
+        pid = os.fork()
+        if pid == 0:
+            for i in range(50):
+                logger.llm_info(f"worker {worker} record {i}")
+            logger.close()
+            os._exit(0)
+        children.append(pid)
+    for pid in children:
+        os.waitpid(pid, 0)
+    logger.llm_info("parent after fork")
+    logger.close()
+
+    shards = shard_paths(tmp_path)
+    assert len(shards) == 4
+    assert all(p.name.startswith("app.") for p in shards)
+
+    records = load_logs(tmp_path)
+    assert len(records) == 152
+    timestamps = [r["timestamp"].rstrip("Z") for r in records]
+    assert timestamps == sorted(timestamps)
+    for worker in range(3):
+        mine = [r["message"] for r in records if r["message"].startswith(f"worker {worker} ")]
+        assert mine == [f"worker {worker} record {i}" for i in range(50)]
@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+CLI_MODULES = ("ailogx.summarize", "ailogx.cli.chat", "ailogx.cli.merge",
+               "ailogx.utils.logindex", "ailogx.log2fix")
+HEAVY_MODULES = {"networkx", "numpy", "tiktoken", "transformers", "openai", "anthropic",
+                 "groq", "ollama", "rich", "requests"}
+IMPORT_BUDGET_MS = 500  # generous: about 60 ms on a laptop-class CPU
+
+
+def run_python(*args, cwd=ROOT):
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True,
+                          text=True, check=True)
+
+
+def test_cli_imports_skip_heavy_dependencies(tmp_path):
+    code = (f"import sys, json; import {', '.join(CLI_MODULES)}, ailogx.summarizer.cache; "
+            "print(json.dumps(sorted(sys.modules)))")
+    loaded = {name.split(".")[0] for name in json.loads(run_python("-c", code, cwd=tmp_path).stdout)}
+    assert not loaded & HEAVY_MODULES
+    assert not (tmp_path / ".cache").exists()  # cache directories are created on first write
+
+
+def test_cli_import_time_within_budget():
+    for module in CLI_MODULES[:2]:
+        result = run_python("-X", "importtime", "-c", f"import {module}")
+        line = next(line for line in result.stderr.splitlines() if line.rstrip().endswith(f"| {module}"))
+        cumulative_us = int(line.split("|")[1])
+        assert cumulative_us / 1000 < IMPORT_BUDGET_MS, f"{module}: {cumulative_us / 1000:.0f} ms"
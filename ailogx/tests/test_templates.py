@@ -0,0 +1,59 @@
+import json
+
+from ailogx.summarizer.templates import TemplateMiner, compress_records
+
+
+def test_miner_learns_templates_and_persists(tmp_path):
+    miner = TemplateMiner()
+    for i in range(5):
+        miner.add(f"Entering layer {i}")
+    template, values = miner.add("Entering layer 7")
+    assert template.text == "Entering layer <*>" and values == ["7"]
+    assert miner.add("Start group: request-1")[0].text == "Start group: request-1"
+    assert miner.add("Start group: request-2")[0].text == "Start group: <*>"
+    assert miner.add("Leaf operation failed")[0] is not template
+
+    path = tmp_path / "templates.json"
+    miner.save(path)
+    warm = TemplateMiner.load(path)
+    assert warm.add("Entering layer 42")[0].id == template.id
+    assert TemplateMiner.load(tmp_path / "missing.json").templates == {}
+
+    bounded = TemplateMiner(max_templates=3)
+    for word in ["alpha", "beta", "gamma", "delta", "epsilon"]:
+        bounded.add(f"{word} happened")
+    assert len(bounded) == 3
+
+
+def test_compressed_prompt_lines():
+    logs = [{"timestamp": f"2025-08-04T06:00:{i:02d}Z", "level": "context_info",
+             "message": f"Entering layer {i % 4}", "file": "core.py", "function": "layer"}
+            for i in range(40)]
+    logs.insert(10, {"level": "error_reasoning", "message": "Leaf operation failed",
+                     "file": "core.py", "reason": "boom"})
+    lines = [json.loads(line) for line in compress_records(logs, window=1000)]
+    assert len(lines) == 2
+    folded = lines[0]
+    assert (folded["template"], folded["count"], folded["values"]) == \
+        ("Entering layer <*>", 40, [["0", "1", "2", "3"]])
+    assert (folded["first"], folded["last"]) == ("2025-08-04T06:00:00Z", "2025-08-04T06:00:39Z")
+    assert lines[1] == logs[10]  # one-off records pass through unchanged
+    assert len(compress_records(logs, window=10)) > 2  # grouping is per window
+
+
+def test_records_with_payloads_are_not_folded():
+    logs = [{"level": "info", "message": f"Fetched user {i}", "file": "api.py",
+             "trace_id": f"t{i % 2}"} for i in range(6)]
+    logs[4]["outputs"] = {"rows": 3}
+    logs[5]["summary"] = "cache miss"
+    lines = [json.loads(line) for line in compress_records(logs)]
+    assert [(l["trace_id"], l["count"]) for l in lines if "template" in l] == [("t0", 2), ("t1", 2)]
+    assert [l for l in lines if "template" not in l] == logs[4:]
+
+
+def test_records_with_tracebacks_are_not_folded():
+    logs = [{"level": "error_reasoning", "message": "Leaf operation failed", "file": "core.py",
+             "traceback": f"Traceback (most recent call last):\nKeyError: {i}\n"}
+            for i in range(3)]
+    lines = [json.loads(line) for line in compress_records(logs)]
+    assert lines == logs
@@ -0,0 +1,39 @@
+import json
+
+from ailogx.utils.tokenizer import TokenCounter, chunk_by_tokens, estimate_tokens
+
+
+def test_estimator_counts_pieces():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Hello world, this is a test.") == 8
+    assert estimate_tokens("id 12345678") == 4  # "id", " 123", "456", "78"
+    assert estimate_tokens("internationalization") > 1
+
+
+def test_counter_memoizes_repeated_lines():
+    counter = TokenCounter("llama3")
+    calls = []
+    measure = counter._measure
+    counter._measure = lambda texts: calls.append(list(texts)) or measure(texts)
+
+    lines = ["same line"] * 5 + ["other line", "same line"]
+    assert counter.count_many(lines) == [2] * 7
+    assert counter.count("other line") == 2
+    assert calls == [["same line", "other line"]]
+
+
+def test_chunks_stay_under_budget_and_keep_order():
+    logs = [{"message": f"record {i}", "level": "info"} for i in range(500)]
+    counter = TokenCounter("claude-3-5-sonnet")
+    chunks = list(chunk_by_tokens(logs, max_tokens=200, counter=counter))
+
+    assert len(chunks) > 1
+    assert all(sum(counter.count_many(chunk)) <= 200 for chunk in chunks)
+    assert [line for chunk in chunks for line in chunk] == [json.dumps(log) for log in logs]
+
+
+def test_calibrate_scales_estimates():
+    counter = TokenCounter("gemma3")
+    texts = ["alpha beta gamma", "delta epsilon"]
+    assert counter.calibrate(texts, lambda text: 2 * estimate_tokens(text)) == 2.0
+    assert counter.count("alpha beta gamma") == 2 * estimate_tokens("alpha beta gamma")
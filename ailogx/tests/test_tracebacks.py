@@ -0,0 +1,128 @@
+import gzip
+import json
+
+from ailogx.core import LLMLogger
+from ailogx.sinks import FileSink
+from ailogx.tracebacks import collapse_tracebacks, fingerprint, normalize
+
+TB = '''Traceback (most recent call last):
+  File "{root}/app/service.py", line {line}, in handle
+    user = load(user_id)
+  File "{root}/app/db.py", line 88, in load
+    raise KeyError(f"user {{user_id}}")
+KeyError: 'user {uid}' at <Conn object at {addr}>
+'''
+
+
+def make_tb(root="/srv/a", line=10, uid=41, addr="0x7f3a2b"):
+    return TB.format(root=root, line=line, uid=uid, addr=addr)
+
+
+def test_fingerprint_ignores_paths_line_numbers_and_values():
+    assert fingerprint(make_tb()) == fingerprint(make_tb("/home/ci/b", 12, 9000, "0xdead"))
+    assert 'File "service.py", line ?' in normalize(make_tb())
+    other = make_tb().replace("in load", "in save")
+    assert fingerprint(other) != fingerprint(make_tb())
+
+
+def fail(logger, uid):
+    try:
+        {}[f"user {uid}"]
+    except KeyError as e:
+        logger.llm_error("lookup failed", exception=e)
+
+
+def test_logger_writes_each_traceback_once_per_file(tmp_path):
+    path = tmp_path / "logs.jsonl"
+    sink = FileSink(str(path), max_bytes=6000)
+    logger = LLMLogger("tb", sink=sink, dedupe_tracebacks=True, capture_callsite="never")
+    for uid in range(40):
+        fail(logger, uid)
+    logger.close()
+    sink.close()
+
+    files = [gzip.open(p, "rt") for p in sorted(tmp_path.glob("logs.*.jsonl.gz"))] + [open(path)]
+    assert len(files) > 1
+    total = 0
+    for f in files:
+        with f:
+            records = [json.loads(line) for line in f]
+        total += len(records)
+        assert len({r["traceback_id"] for r in records}) == 1
+        # every file stands alone: the first record has the text, the rest refer to it
+        assert "KeyError" in records[0]["traceback"]
+        assert all("traceback" not in r and r["exception"].startswith("KeyError") for r in records[1:])
+    assert total == 40
+
+
+
+def test_concurrent_writers_keep_traceback_text_before_references(tmp_path):
+    import logging
+    import threading
+
+    from ailogx.handlers import LLMLogHandler
+
+    path = tmp_path / "logs.jsonl"
+    sink = FileSink(str(path), max_bytes=20000)
+    logger = LLMLogger("tb", sink=sink, dedupe_tracebacks=True, capture_callsite="never")
+    handler = LLMLogHandler(logger, batch_size=4)  # its own writer thread, same logger
+    std = logging.getLogger("ailogx.test.tb")
+    std.addHandler(handler)
+    std.propagate = False
+
+    def sync_caller():
+        for uid in range(100):
+            fail(logger, uid)
+
+    def stdlib_caller():
+        for uid in range(100):
+            try:
+                {}[f"user {uid}"]
+            except KeyError:
+                std.exception("lookup failed")
+
+    threads = [threading.Thread(target=t) for t in (sync_caller, sync_caller, stdlib_caller)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    std.removeHandler(handler)
+    handler.close()
+    logger.close()
+    sink.close()
+
+    files = [gzip.open(p, "rt") for p in sorted(tmp_path.glob("logs.*.jsonl.gz"))] + [open(path)]
+    total = 0
+    for f in files:
+        with f:
+            records = [json.loads(line) for line in f]
+        total += len(records)
+        defined = set()
+        for r in records:  # a reference never precedes its text in the same file
+            if "traceback" in r:
+                defined.add(r["traceback_id"])
+            assert r["traceback_id"] in defined
+    assert total == 300
+
+def test_collapse_keeps_one_exemplar_with_count_and_range():
+    logs = [{"timestamp": f"2025-01-01T00:00:0{i}", "level": "error_reasoning",
+             "message": "lookup failed", "traceback": make_tb(uid=i)} for i in range(5)]
+    logs.insert(2, {"timestamp": "2025-01-01T00:00:02", "level": "info", "message": "ok"})
+    logs.append({"level": "error_reasoning", "message": "other", "traceback": make_tb().replace("in load", "in save")})
+
+    out = collapse_tracebacks(logs)
+    assert len(out) == len(logs)
+    exemplar = out[0]
+    assert exemplar["traceback"] == logs[0]["traceback"]
+    assert exemplar["traceback_count"] == 5
+    assert (exemplar["traceback_first"], exemplar["traceback_last"]) == (
+        "2025-01-01T00:00:00", "2025-01-01T00:00:04")
+    repeats = [r for r in out[1:] if r.get("traceback_id") == exemplar["traceback_id"]]
+    assert len(repeats) == 4 and all("traceback" not in r for r in repeats)
+    assert repeats[0]["exception"] == "KeyError: 'user 1' at <Conn object at 0x7f3a2b>"
+    assert "traceback_count" not in out[-1] and "in save" in out[-1]["traceback"]
+
+    # Records the logger already deduplicated get their text back.
+    deduped = [{"traceback_id": exemplar["traceback_id"], "exception": "KeyError: 'user 9'"}]
+    restored = collapse_tracebacks(logs[:1] + deduped, window=1)
+    assert restored[1]["traceback"] == logs[0]["traceback"]
@@ -1,10 +1,13 @@
 from ailogx.trace.tracebuilder import trace_aware_grouping
-import json
+from ailogx.summarizer.templates import PROMPT_NOTE, iter_compressed
+from ailogx.formatters.compact import encode_records
 
-def summarize_by_trace(logs, analyzer, target_trace_id=None):
+def summarize_by_trace(logs, analyzer, target_trace_id=None, miner=None, prompt_format="json"):
     """
     Groups logs by trace and summarizes each group individually using the analyzer.
     Returns a dictionary mapping trace IDs to summaries.
+    With a `TemplateMiner`, repeated messages in a trace are sent once per template.
+    `prompt_format` picks the record encoding (see formatters.compact).
     """
     trace_groups = trace_aware_grouping(logs)
     summaries = {}
@@ -31,8 +34,11 @@ def summarize_by_trace(logs, analyzer, target_trace_id=None):
             "Logs:\n"
         )
 
-        # Add log JSON lines
-        prompt += "\n".join(json.dumps(log, indent=2) for log in group)
+        # Add the records, one line each (indented JSON would double the tokens)
+        if miner is not None:
+            prompt += PROMPT_NOTE + encode_records(iter_compressed(group, miner), prompt_format)
+        else:
+            prompt += encode_records(group, prompt_format)
 
         # Optional: Add one-shot example (helps smaller models)
         prompt += (
@@ -0,0 +1,176 @@
+# ailogx/tracebacks.py
+"""
+Traceback fingerprinting and deduplication.
+
+`normalize` reduces a formatted traceback to its shape. It removes
+directories from paths, line numbers, memory addresses and, in the
+exception messages, numbers, hex ids and quoted values. `fingerprint` hashes
+that shape, so the same failure raised with different arguments, or from a
+checkout at another path, gets the same 16-hex-digit id.
+
+Two consumers:
+
+- `TracebackDeduper` (used by `LLMLogger(dedupe_tracebacks=True)`) writes
+  the full text only for the first occurrence of a fingerprint in each
+  output file. Later records carry `traceback_id` and the final
+  `exception` line instead.
+- `iter_collapsed` (used by summarize) folds repeats within a window of
+  records into one exemplar that keeps the text, plus `traceback_count`,
+  `traceback_first` and `traceback_last`. It also restores text that the
+  logger deduplicated.
+"""
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional
+
+_FILE = re.compile(r'File "(?:[^"]*[\\/])?([^"\\/]+)", line \d+')
+_ADDRESS = re.compile(r"\b0x[0-9a-fA-F]+\b")
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+_IDS = re.compile(r"[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}|\b[0-9a-fA-F]{12,}\b")
+_NUMBER = re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?")
+
+
+def _is_frame_line(line: str) -> bool:
+    return line.startswith(" ")  # frames and source lines are indented
+
+
+def normalize(text: str) -> str:
+    """The shape of a formatted traceback, without values that vary between occurrences."""
+    lines = []
+    for line in text.rstrip("\n").splitlines():
+        line = _ADDRESS.sub("0x?", line)
+        if _is_frame_line(line):
+            line = _FILE.sub(r'File "\1", line ?', line)
+        else:  # "Traceback ...", "ValueError: bad id 42", chaining notes
+            line = _IDS.sub("<id>", line)
+            line = _QUOTED.sub("<s>", line)
+            line = _NUMBER.sub("<n>", line)
+        lines.append(line.rstrip())
+    return "\n".join(lines)
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.blake2b(normalize(text).encode(), digest_size=8).hexdigest()
+
+
+def exception_line(text: str) -> str:
+    """The final "Type: message" line of a formatted traceback."""
+    for line in reversed(text.rstrip("\n").splitlines()):
+        if line and not _is_frame_line(line):
+            return line
+    return ""
+
+
+class TracebackDeduper:
+    """
+    Per-output-file traceback dedup for the logger. Call `start(generation)`
+    before each batch with the sink's file generation; a new generation
+    (the file was rotated or re-sharded) forgets what has been written, so
+    every file stays self-contained. At most `max_entries` fingerprints are
+    remembered (least recently used are forgotten and written in full again).
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.generation = None
+        self._written = OrderedDict()  # traceback text -> fingerprint
+        self._seen = OrderedDict()  # fingerprints already written to this file
+
+    def start(self, generation):
+        if generation != self.generation:
+            self.generation = generation
+            self._seen.clear()
+
+    def _fingerprint(self, text: str) -> str:
+        fp = self._written.get(text)
+        if fp is None:
+            fp = self._written[text] = fingerprint(text)
+            if len(self._written) > self.max_entries:
+                self._written.popitem(last=False)
+        return fp
+
+    def apply(self, entries: List[dict]) -> List[dict]:
+        """Entries with repeated tracebacks replaced by references (copies; inputs untouched)."""
+        out = []
+        seen = self._seen
+        for entry in entries:
+            text = entry.get("traceback")
+            if not isinstance(text, str):
+                out.append(entry)
+                continue
+            fp = self._fingerprint(text)
+            entry = dict(entry, traceback_id=fp)
+            if fp in seen:
+                seen.move_to_end(fp)
+                del entry["traceback"]
+                entry["exception"] = exception_line(text)
+            else:
+                seen[fp] = True
+                if len(seen) > self.max_entries:
+                    seen.popitem(last=False)
+            out.append(entry)
+        return out
+
+
+def _flush(window: List[dict], exemplars: dict) -> Iterator[dict]:
+    for record in window:
+        fp = record.get("traceback_id")
+        exemplar = exemplars.get(fp)
+        if exemplar is not None and exemplar["traceback_count"] == 1:
+            exemplar.pop("traceback_count")
+            exemplar.pop("traceback_first", None)
+            exemplar.pop("traceback_last", None)
+        yield record
+
+
+def iter_collapsed(logs: Iterable[dict], window: int = 1000,
+                   known: Optional[dict] = None, max_known: int = 10000) -> Iterator[dict]:
+    """
+    Stream `logs` with duplicate tracebacks collapsed per `window` records:
+    the first record with a given fingerprint keeps the text and gains
+    `traceback_count` / `traceback_first` / `traceback_last`; the others
+    keep `traceback_id` and their `exception` line only. `known` (fingerprint
+    -> text) supplies text for records the logger already deduplicated.
+    """
+    known = known if known is not None else OrderedDict()
+    buffer: List[dict] = []
+    exemplars: dict = {}
+    for record in logs:
+        text = record.get("traceback")
+        fp = record.get("traceback_id")
+        if isinstance(text, str) or fp is not None:
+            if isinstance(text, str):
+                fp = fp or fingerprint(text)
+                known[fp] = text
+                if len(known) > max_known:
+                    known.popitem(last=False)
+            else:
+                text = known.get(fp)
+            stamp = record.get("timestamp")
+            exemplar = exemplars.get(fp)
+            if exemplar is None:
+                record = dict(record, traceback_id=fp, traceback_count=1)
+                if text is not None:
+                    record["traceback"] = text
+                if stamp:
+                    record["traceback_first"] = record["traceback_last"] = stamp
+                exemplars[fp] = record
+            else:
+                exemplar["traceback_count"] += 1
+                if stamp:
+                    exemplar.setdefault("traceback_first", stamp)
+                    exemplar["traceback_last"] = stamp
+                record = {k: v for k, v in record.items() if k != "traceback"}
+                record["traceback_id"] = fp
+                if text is not None:
+                    record.setdefault("exception", exception_line(text))
+        buffer.append(record)
+        if len(buffer) >= window:
+            yield from _flush(buffer, exemplars)
+            buffer, exemplars = [], {}
+    yield from _flush(buffer, exemplars)
+
+
+def collapse_tracebacks(logs: Iterable[dict], **kwargs) -> List[dict]:
+    return list(iter_collapsed(logs, **kwargs))
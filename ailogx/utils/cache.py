@@ -1,8 +1,7 @@
 import hashlib, os, json
 from pathlib import Path
 
-CACHE_DIR = Path(".cache/llm_responses")
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_DIR = Path(".cache/llm_responses")  # created on first save
 
 def get_cache_key(text: str) -> str:
     return hashlib.sha1(text.encode()).hexdigest()
@@ -17,6 +16,7 @@ def get_cached_response(text: str) -> str | None:
 
 def save_response_to_cache(text: str, response: str):
     key = get_cache_key(text)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
     path = CACHE_DIR / f"{key}.json"
     with open(path, "w") as f:
         json.dump({"response": response}, f)
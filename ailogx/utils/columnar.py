@@ -0,0 +1,322 @@
+# ailogx/utils/columnar.py
+"""
+Columnar in-memory view of a loaded log set (requires numpy).
+
+A `LogTable` keeps one array per field that filters, grouping and scoring
+look at:
+
+    timestamps   int64 epoch ns (0 = missing or unparseable; time filters
+                 compare those rows' strings, as `RecordFilter` does)
+    level, file, function, logger, trace_id, context
+                 int32 codes into a per-column dictionary (0 = missing);
+                 `logger` falls back to the handler's `logger_name`;
+                 `context` is the fast_mode group key (context_id, else
+                 group_id, else file, else "global")
+    noted        bool, the record has a `reason` or `summary`
+
+The records themselves stay as raw JSONL bytes plus offsets (or as the dicts
+a table was built from) and are decoded only when iterated. Filters return
+a new table sharing the payload and dictionaries, so narrowing a million
+records down is a handful of mask operations:
+
+    table = LogTable.from_path("app.jsonl")
+    errors = table.filter(RecordFilter(levels={"error_reasoning"}, since="2025-08-04T06"))
+    smart_filter(table)           # also a LogTable, via the fast path
+"""
+import json
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from ailogx.segment import is_segment, parse_timestamp
+from ailogx.summarizer.chunker import score_log
+from ailogx.utils.logindex import bound_ns
+from ailogx.utils.preprocess import SMART_LEVELS, _group_key
+from ailogx.utils.reader import ReadStats, iter_logs, parse_line
+
+COLUMNS = ("level", "file", "function", "logger", "trace_id", "context")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Columnar log tables need numpy: pip install 'ailogx[columnar]'")
+
+
+class _Dictionary:
+    """Value <-> int code for one column; code 0 means missing."""
+
+    def __init__(self):
+        self.values = [None]
+        self.index = {None: 0}
+
+    def encode(self, value) -> int:
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, sort_keys=True)
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value) -> Optional[int]:
+        """Code of a value already in the column, or None."""
+        return self.index.get(value)
+
+    def lookup(self, fn, dtype) -> "np.ndarray":
+        """`fn(value)` for every code, to index with a code array."""
+        return np.array([fn(value) for value in self.values], dtype=dtype)
+
+
+class _Builder:
+    def __init__(self):
+        self.dictionaries = {name: _Dictionary() for name in COLUMNS}
+        self.codes = {name: array("i") for name in COLUMNS}
+        self.timestamps = array("q")
+        self.noted = bytearray()
+        self._fields = [(name, self.dictionaries[name], self.codes[name])
+                        for name in COLUMNS if name not in ("logger", "context")]
+        self._logger = (self.dictionaries["logger"], self.codes["logger"])
+        self._context = (self.dictionaries["context"], self.codes["context"])
+
+    def add(self, record: dict):
+        get = record.get
+        # Hot loop (once per record): the common case is one dict hit per column.
+        for name, dictionary, codes in self._fields:
+            value = get(name)
+            code = dictionary.index.get(value) if value is None or value.__class__ is str else None
+            codes.append(code if code is not None else dictionary.encode(value))
+        dictionary, codes = self._logger
+        value = get("logger")
+        codes.append(dictionary.encode(value if value is not None else get("logger_name")))
+        dictionary, codes = self._context
+        codes.append(dictionary.encode(_group_key(record)))
+        parsed = parse_timestamp(get("timestamp"))
+        self.timestamps.append(parsed[0] if parsed else 0)
+        self.noted.append(1 if get("reason") or get("summary") else 0)
+
+    def table(self, payload) -> "LogTable":
+        n = len(self.timestamps)
+        return LogTable(
+            rows=np.arange(n, dtype=np.int64),
+            timestamps=np.frombuffer(self.timestamps, dtype=np.int64),
+            codes={name: np.frombuffer(codes, dtype=np.int32) for name, codes in self.codes.items()},
+            noted=np.frombuffer(bytes(self.noted), dtype=np.bool_),
+            dictionaries=self.dictionaries,
+            payload=payload,
+        )
+
+
+class _RecordPayload:
+    def __init__(self, records: List[dict]):
+        self.records = records
+
+    def get(self, row: int) -> dict:
+        return self.records[row]
+
+
+class _RawPayload:
+    """The bytes of a JSONL file and the offsets of its well-formed lines."""
+
+    def __init__(self, data: bytes, starts, ends):
+        self.data = data
+        self.starts = starts
+        self.ends = ends
+
+    def get(self, row: int) -> dict:
+        return json.loads(self.data[self.starts[row]:self.ends[row]])
+
+
+class LogTable:
+    """A filtered view of a columnar log set; iterate it for the records."""
+
+    def __init__(self, rows, timestamps, codes: Dict[str, "np.ndarray"], noted,
+                 dictionaries: Dict[str, _Dictionary], payload):
+        self.rows = rows
+        self.timestamps = timestamps
+        self.codes = codes
+        self.noted = noted
+        self.dictionaries = dictionaries
+        self._payload = payload
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "LogTable":
+        _require_numpy()
+        records = records if isinstance(records, list) else list(records)
+        builder = _Builder()
+        for record in records:
+            builder.add(record)
+        return builder.table(_RecordPayload(records))
+
+    @classmethod
+    def from_path(cls, path, stats: Optional[ReadStats] = None) -> "LogTable":
+        """
+        Load a log. Each record is decoded once to fill the columns; plain
+        JSONL files then keep only their raw bytes and line offsets, anything
+        else (gzip, segments, shard directories) keeps the decoded dicts.
+        """
+        _require_numpy()
+        stats = stats if stats is not None else ReadStats()
+        path = str(path)
+        if not os.path.isfile(path) or path.endswith(".gz") or is_segment(path):
+            return cls.from_records(iter_logs(path, stats))
+
+        with open(path, "rb") as f:
+            data = f.read()
+        builder = _Builder()
+        starts, ends = array("q"), array("q")
+        pos, size = 0, len(data)
+        while pos < size:
+            end = data.find(b"\n", pos)
+            end = size if end < 0 else end + 1
+            raw = data[pos:end]
+            if raw.strip():
+                record = parse_line(raw.decode("utf-8", errors="replace"), stats)
+                if record is not None:
+                    builder.add(record)
+                    starts.append(pos)
+                    ends.append(end)
+            pos = end
+        return builder.table(_RawPayload(data, np.frombuffer(starts, dtype=np.int64),
+                                         np.frombuffer(ends, dtype=np.int64)))
+
+    # -- records ------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[dict]:
+        get = self._payload.get
+        for row in self.rows.tolist():
+            yield get(row)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self._payload.get(int(self.rows[key]))
+        return self.take(key)
+
+    def __repr__(self):
+        return f"LogTable({len(self)} records)"
+
+    def records(self) -> List[dict]:
+        return list(self)
+
+    def take(self, selector) -> "LogTable":
+        """Sub-table for a boolean mask, an index array or a slice."""
+        return LogTable(self.rows[selector], self.timestamps[selector],
+                        {name: codes[selector] for name, codes in self.codes.items()},
+                        self.noted[selector], self.dictionaries, self._payload)
+
+    def values(self, column: str) -> list:
+        """Decoded values of a column, in row order."""
+        values = self.dictionaries[column].values
+        return [values[code] for code in self.codes[column].tolist()]
+
+    # -- masks --------------------------------------------------------------
+
+    def mask_in(self, column: str, values: Iterable) -> "np.ndarray":
+        dictionary = self.dictionaries[column]
+        codes = [dictionary.code(v) for v in values]
+        return np.isin(self.codes[column], [c for c in codes if c is not None])
+
+    def mask_between(self, since: Optional[str] = None, until: Optional[str] = None) -> "np.ndarray":
+        """[since, until) on full or prefix ISO timestamps, like `RecordFilter`."""
+        mask = np.ones(len(self), dtype=np.bool_)
+        lo, hi = bound_ns(since), bound_ns(until)
+        if lo is None and hi is None:
+            return mask
+        if lo is not None:
+            mask &= self.timestamps >= lo
+        if hi is not None:
+            mask &= self.timestamps < hi
+        # Timestamps that did not parse (no Z, an offset, missing) compare as
+        # strings, row by row, exactly as RecordFilter does.
+        since = since.rstrip("Z") if since else None
+        until = until.rstrip("Z") if until else None
+        for i in np.flatnonzero(self.timestamps == 0).tolist():
+            ts = (self[i].get("timestamp") or "").rstrip("Z")
+            mask[i] = (not since or ts >= since) and (not until or ts < until)
+        return mask
+
+    def mask_smart(self) -> "np.ndarray":
+        smart = self.dictionaries["level"].lookup(lambda v: v in SMART_LEVELS, np.bool_)
+        return smart[self.codes["level"]] | self.noted
+
+    def scores(self) -> "np.ndarray":
+        """`chunker.score_log` for every row."""
+        lut = self.dictionaries["level"].lookup(
+            lambda v: score_log({"level": v}) if isinstance(v, str) else 1, np.int64)
+        return lut[self.codes["level"]]
+
+    # -- operations ---------------------------------------------------------
+
+    def filter(self, record_filter) -> "LogTable":
+        """Apply a `parallel.RecordFilter` as column masks."""
+        mask = np.ones(len(self), dtype=np.bool_)
+        if record_filter.levels is not None:
+            mask &= self.mask_in("level", record_filter.levels)
+        if record_filter.since or record_filter.until:
+            mask &= self.mask_between(record_filter.since, record_filter.until)
+        if record_filter.trace_id is not None:
+            mask &= self.mask_in("trace_id", [record_filter.trace_id])
+        if record_filter.smart:
+            mask &= self.mask_smart()
+        return self.take(mask)
+
+    def between(self, since: Optional[str] = None, until: Optional[str] = None) -> "LogTable":
+        return self.take(self.mask_between(since, until))
+
+    def smart_filter(self) -> "LogTable":
+        return self.take(self.mask_smart())
+
+    def _groups(self, column: str):
+        """(group per row, first row per group, group sizes), groups in first-seen order."""
+        _, first, inverse, counts = np.unique(self.codes[column], return_index=True,
+                                              return_inverse=True, return_counts=True)
+        rank = np.empty(len(first), dtype=np.int64)
+        order = np.argsort(first, kind="stable")
+        rank[order] = np.arange(len(first))
+        return rank[inverse.reshape(-1)], first[order], counts[order]
+
+    def group_by(self, column: str = "context") -> Dict[object, "LogTable"]:
+        """Sub-tables per value of `column`, in first-seen order."""
+        if not len(self):
+            return {}
+        group, first, counts = self._groups(column)
+        order = np.argsort(group, kind="stable")
+        parts = np.split(order, np.cumsum(counts)[:-1])
+        values = self.dictionaries[column].values
+        return {values[self.codes[column][row]]: self.take(part)
+                for row, part in zip(first.tolist(), parts)}
+
+    def fast_mode(self, threshold: int = 20) -> "LogTable":
+        """
+        `preprocess.fast_mode`: groups of at most `threshold` records are kept
+        whole, larger ones collapse to their middle record. Groups come out
+        in first-seen order.
+        """
+        if not len(self):
+            return self
+        group, _, counts = self._groups("context")
+        keep = counts[group] <= threshold
+        big = np.flatnonzero(counts > threshold)
+        if big.size:
+            order = np.argsort(group, kind="stable")
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            keep[order[starts[big] + counts[big] // 2]] = True
+        kept = np.flatnonzero(keep)
+        return self.take(kept[np.argsort(group[kept], kind="stable")])
+
+    def chunk_scores(self, chunk_size: int) -> "np.ndarray":
+        """`chunker.score_chunk` for each consecutive `chunk_size` rows."""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        return np.add.reduceat(self.scores(), np.arange(0, len(self), chunk_size))
+
+
+def load_table(path, stats: Optional[ReadStats] = None) -> LogTable:
+    return LogTable.from_path(path, stats)
@@ -0,0 +1,176 @@
+# ailogx/utils/downsample.py
+"""
+Error-preserving, stratified downsampling (`summarize --fast`).
+
+Records fall into three groups:
+
+- anchors: errors and decisions (`KEEP_LEVELS`), always kept;
+- context: up to `context` records either side of each anchor, also kept;
+- everything else, stratified by (level, file, line) call site. Each stratum
+  keeps a seeded reservoir, and the reservoirs are drained round-robin until
+  the `target` record count (and `target_tokens`, if given) is reached. A
+  chatty call site therefore cannot crowd out a quiet one.
+
+Anchors and their context are kept even past the target. Whatever is
+dropped is counted per stratum in a `DownsampleReport`, and
+`sampling_summary` records describing the drops are appended to the output
+so the model knows what it is not seeing.
+
+Input is streamed. Memory is bounded by the kept records plus one reservoir
+of at most `target` records per stratum.
+"""
+import json
+import random
+from collections import Counter, deque
+from typing import Callable, Iterable, List, Optional
+
+from ailogx.sampling import SUMMARY_LEVEL
+
+KEEP_LEVELS = frozenset({
+    "error_reasoning", "function_exit_error", "decision_point", "error", "critical",
+})
+
+
+def _stratum(log: dict) -> tuple:
+    return log.get("level"), log.get("file"), log.get("line")
+
+
+class DownsampleReport:
+    """What `downsample` kept and dropped."""
+
+    def __init__(self):
+        self.total = 0
+        self.anchors = 0
+        self.context = 0
+        self.sampled = 0
+        self.dropped = Counter()  # (level, file, line) -> records dropped
+
+    @property
+    def kept(self) -> int:
+        return self.anchors + self.context + self.sampled
+
+    def __str__(self):
+        return (f"kept {self.kept} of {self.total} records ({self.anchors} errors/decisions, "
+                f"{self.context} context, {self.sampled} sampled); dropped "
+                f"{sum(self.dropped.values())} from {len(self.dropped)} level/call-site strata")
+
+    def summary_records(self, limit: int = 20) -> List[dict]:
+        """One `sampling_summary` record per stratum with drops (the `limit` largest, then the rest)."""
+        records = []
+        ranked = self.dropped.most_common()
+        for (level, file, line), count in ranked[:limit]:
+            where = f" from {file}:{line}" if file else ""
+            record = {
+                "level": SUMMARY_LEVEL,
+                "message": f"Dropped {count} {level} records{where}",
+                "suppressed": count,
+                "sampled_level": level,
+                "reason": "downsampled",
+            }
+            if file:
+                record["file"] = file
+                record["line"] = line
+            records.append(record)
+        rest = sum(count for _, count in ranked[limit:])
+        if rest:
+            records.append({
+                "level": SUMMARY_LEVEL,
+                "message": f"Dropped {rest} more records from {len(ranked) - limit} other call sites",
+                "suppressed": rest,
+                "reason": "downsampled",
+            })
+        return records
+
+
+def downsample(logs: Iterable[dict], target: int = 500, target_tokens: Optional[int] = None,
+               context: int = 2, keep_levels=KEEP_LEVELS, seed: int = 0,
+               count_tokens: Optional[Callable[[str], int]] = None,
+               report: Optional[DownsampleReport] = None, summaries: bool = True) -> List[dict]:
+    """
+    Reduce `logs` to about `target` records (and `target_tokens` tokens of
+    JSON, measured with `count_tokens`, default ~4 characters per token),
+    keeping every `keep_levels` record and `context` neighbours on each side.
+    Returns records in their original order, followed by drop summaries
+    unless `summaries` is False. Seeded, so runs are repeatable.
+    """
+    rng = random.Random(seed)
+    report = report if report is not None else DownsampleReport()
+    count_tokens = count_tokens or (lambda text: len(text) // 4 + 1)
+
+    kept = []           # (seq, record): anchors and their context
+    before = deque()    # the last `context` candidates, not yet offered to a stratum
+    after = 0           # records still to keep after the latest anchor
+    strata = {}         # stratum -> [records seen, reservoir of (seq, record)]
+
+    def offer(item):
+        key = _stratum(item[1])
+        stratum = strata.get(key)
+        if stratum is None:
+            stratum = strata[key] = [0, []]
+        stratum[0] += 1
+        reservoir = stratum[1]
+        if len(reservoir) < target:
+            reservoir.append(item)
+        else:
+            j = rng.randrange(stratum[0])
+            if j < target:
+                reservoir[j] = item
+
+    for seq, log in enumerate(logs):
+        report.total += 1
+        if log.get("level") in keep_levels:
+            report.anchors += 1
+            report.context += len(before)
+            kept.extend(before)
+            before.clear()
+            kept.append((seq, log))
+            after = context
+        elif after:
+            after -= 1
+            report.context += 1
+            kept.append((seq, log))
+        else:
+            before.append((seq, log))
+            if len(before) > context:
+                offer(before.popleft())
+    for item in before:
+        offer(item)
+
+    # Round-robin over the strata (first-seen order), one record per turn.
+    room = max(target - len(kept), 0)
+    tokens = sum(count_tokens(json.dumps(log)) for _, log in kept) if target_tokens else 0
+    pools = []
+    for key, (_, reservoir) in strata.items():
+        rng.shuffle(reservoir)
+        pools.append((key, iter(reservoir)))
+    chosen = []
+    taken = Counter()
+    while pools and len(chosen) < room:
+        if target_tokens is not None and tokens >= target_tokens:
+            break
+        remaining = []
+        for key, pool in pools:
+            if len(chosen) >= room:
+                break
+            item = next(pool, None)
+            if item is None:
+                continue
+            remaining.append((key, pool))
+            if target_tokens is not None:
+                cost = count_tokens(json.dumps(item[1]))
+                if tokens + cost > target_tokens:
+                    continue  # too big for what is left; a later one may fit
+                tokens += cost
+            chosen.append(item)
+            taken[key] += 1
+        pools = remaining
+
+    report.sampled += len(chosen)
+    for key, (seen, _) in strata.items():
+        if seen > taken[key]:
+            report.dropped[key] += seen - taken[key]
+
+    result = [log for _, log in sorted(kept + chosen, key=lambda item: item[0])]
+    if summaries:
+        result.extend(report.summary_records())
+    return result
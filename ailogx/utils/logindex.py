@@ -0,0 +1,393 @@
+# ailogx/utils/logindex.py
+"""
+Sidecar offset index for plain JSONL logs (`<log>.idx`).
+
+The index stores, per line: its byte offset, its timestamp (epoch ns) and a
+level code, plus a trace_id -> line posting list sorted by a 64-bit hash of
+the trace id. Lookups mmap both files and decode only the lines they need, so
+finding one trace in a multi-GB log costs a binary search and a handful of
+`json.loads`.
+
+    header    MAGIC | struct _HEADER (version, indexed bytes, inode,
+              sha1 of the first 4 KiB, line count, posting count,
+              block count, end of data) | uint64 block offsets x _MAX_BLOCKS
+    block     struct _BLOCK (first line, lines, postings, end byte)
+              offsets   uint64 x lines
+              stamps    int64  x lines      (0 = no timestamp)
+              levels    uint8  x lines, padded to 8 bytes (0 = none/other)
+              postings  uint64 hash x postings, then uint64 line x postings
+
+Each block covers a contiguous run of lines and has its own sorted postings.
+When the log has only been appended to (same inode, same head, larger size)
+`build_index` parses just the new lines, writes them as a new block after the
+existing data and then updates the header, so readers holding the old map are
+unaffected. A new block absorbs the trailing blocks no more than twice its
+size (merging their already sorted postings), which keeps the block count
+logarithmic; the file is rewritten only once dead space outweighs live data.
+"""
+import argparse
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from ailogx.segment import LEVELS, parse_timestamp
+
+MAGIC = b"ALXIDX1\n"
+VERSION = 2
+INDEX_SUFFIX = ".idx"
+_HEAD_BYTES = 4096
+_MAX_BLOCKS = 64
+_HEADER = struct.Struct("<IQQ20sQQQQ")
+_DIRECTORY = struct.Struct(f"<{_MAX_BLOCKS}Q")
+_BLOCK = struct.Struct("<QQQQ")
+_DATA_START = len(MAGIC) + _HEADER.size + _DIRECTORY.size
+
+LEVEL_CODES = {name: i + 1 for i, name in enumerate(LEVELS)}
+
+
+def index_path_for(log_path) -> Path:
+    return Path(str(log_path) + INDEX_SUFFIX)
+
+
+def trace_hash(trace_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(trace_id.encode(), digest_size=8).digest(), "little")
+
+
+def _head_digest(path, size: int) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(min(size, _HEAD_BYTES))).digest()
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class _Block:
+    """Views over one block of a mapped index."""
+
+    __slots__ = ("first_line", "end", "start", "nbytes", "offsets", "timestamps", "levels",
+                 "hashes", "lines")
+
+    def __init__(self, buf: memoryview, pos: int):
+        self.start = pos
+        self.first_line, n_lines, n_postings, self.end = _BLOCK.unpack_from(buf, pos)
+        pos += _BLOCK.size
+
+        def take(nbytes, fmt):
+            nonlocal pos
+            view = buf[pos:pos + nbytes].cast(fmt)
+            pos += _pad8(nbytes)
+            return view
+
+        self.offsets = take(8 * n_lines, "Q")
+        self.timestamps = take(8 * n_lines, "q")
+        self.levels = take(n_lines, "B")
+        self.hashes = take(8 * n_postings, "Q")
+        self.lines = take(8 * n_postings, "Q")
+        self.nbytes = pos - self.start
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def release(self):
+        for view in (self.offsets, self.timestamps, self.levels, self.hashes, self.lines):
+            view.release()
+
+
+class LogIndex:
+    """A loaded sidecar index plus an mmap of the log it describes."""
+
+    def __init__(self, log_path, index_path=None):
+        self.log_path = Path(log_path)
+        self.index_path = Path(index_path) if index_path else index_path_for(log_path)
+        with open(self.index_path, "rb") as f:
+            self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._index_map)
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{self.index_path} is not an ailogx index")
+        (version, self.indexed_size, self.inode, self.head_digest, self.n_lines,
+         self.n_postings, n_blocks, self.data_end) = _HEADER.unpack_from(buf, len(MAGIC))
+        if version != VERSION:
+            raise ValueError(f"Unsupported index version {version}")
+        if n_blocks > _MAX_BLOCKS or self.data_end > len(buf):
+            raise ValueError(f"{self.index_path} is truncated")
+        directory = _DIRECTORY.unpack_from(buf, len(MAGIC) + _HEADER.size)
+        self.blocks = [_Block(buf, pos) for pos in directory[:n_blocks]]
+        self._starts = [block.first_line for block in self.blocks]
+
+        self._log_file = open(self.log_path, "rb")
+        self._log_map = (mmap.mmap(self._log_file.fileno(), 0, access=mmap.ACCESS_READ)
+                         if self.indexed_size else b"")
+
+    def __len__(self) -> int:
+        return self.n_lines
+
+    def close(self):
+        for block in self.blocks:
+            block.release()
+        self._index_map.close()
+        if isinstance(self._log_map, mmap.mmap):
+            self._log_map.close()
+        self._log_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def line(self, i: int) -> bytes:
+        if not 0 <= i < self.n_lines:
+            raise IndexError(i)
+        block = self.blocks[bisect_right(self._starts, i) - 1]
+        j = i - block.first_line
+        start = block.offsets[j]
+        end = block.offsets[j + 1] if j + 1 < len(block) else block.end
+        return self._log_map[start:end]
+
+    def record(self, i: int) -> Optional[dict]:
+        try:
+            record = json.loads(self.line(i))
+        except ValueError:
+            return None
+        return record if isinstance(record, dict) else None
+
+    def records(self, lines: Iterable[int]) -> Iterator[dict]:
+        for i in lines:
+            record = self.record(i)
+            if record is not None:
+                yield record
+
+    def trace_lines(self, trace_id: str) -> List[int]:
+        """Line numbers whose trace_id hashes like `trace_id` (verify on decode)."""
+        h = trace_hash(trace_id)
+        lines = []
+        for block in self.blocks:
+            hashes = block.hashes
+            i = bisect_left(hashes, h)
+            while i < len(hashes) and hashes[i] == h:
+                lines.append(block.lines[i])
+                i += 1
+        return sorted(lines)
+
+    def iter_trace(self, trace_id: str) -> Iterator[dict]:
+        for record in self.records(self.trace_lines(trace_id)):
+            if record.get("trace_id") == trace_id:
+                yield record
+
+    def iter_lines_where(self, levels: Optional[Iterable[str]] = None,
+                         since: Optional[str] = None, until: Optional[str] = None) -> Iterator[int]:
+        """Line numbers matching a level set and/or [since, until) without decoding lines."""
+        codes = {LEVEL_CODES.get(level, 0) for level in levels} if levels else None
+        lo = bound_ns(since)
+        hi = bound_ns(until)
+        for block in self.blocks:
+            stamps, level_codes = block.timestamps, block.levels
+            for j in range(len(block)):
+                if codes is not None and level_codes[j] not in codes:
+                    continue
+                if lo is not None and stamps[j] < lo:
+                    continue
+                if hi is not None and stamps[j] >= hi:
+                    continue
+                yield block.first_line + j
+
+
+def bound_ns(ts: Optional[str]) -> Optional[int]:
+    """Epoch ns for a full or prefix ISO timestamp ("2025-08-04T06" works)."""
+    if not ts:
+        return None
+    ts = ts.rstrip("Z")
+    full = ts + "0000-01-01T00:00:00"[len(ts):] if len(ts) < 19 else ts
+    parsed = parse_timestamp(full + "Z")
+    if parsed is None:
+        raise ValueError(f"Unrecognised timestamp: {ts}")
+    return parsed[0]
+
+
+def _scan(path, start: int, end: int, first_line: int, offsets, stamps, levels, postings):
+    """Parse complete lines in [start, end) and append their index entries."""
+    line_no = first_line
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            raw = f.readline()
+            if not raw.endswith(b"\n") or pos + len(raw) > end:
+                break
+            offsets.append(pos)
+            pos += len(raw)
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                record = {}
+            parsed = parse_timestamp(record.get("timestamp"))
+            stamps.append(parsed[0] if parsed else 0)
+            levels.append(LEVEL_CODES.get(record.get("level"), 0))
+            trace_id = record.get("trace_id")
+            if isinstance(trace_id, str):
+                postings.append((trace_hash(trace_id), line_no))
+            line_no += 1
+    return pos
+
+
+def _block_bytes(first_line: int, end: int, offsets: bytes, stamps: bytes, levels: bytes,
+                 postings: list) -> bytes:
+    hashes = array("Q", (h for h, _ in postings))
+    lines = array("Q", (line for _, line in postings))
+    parts = [_BLOCK.pack(first_line, len(offsets) // 8, len(postings), end)]
+    for data in (offsets, stamps, levels, hashes.tobytes(), lines.tobytes()):
+        parts.append(data + b"\0" * (_pad8(len(data)) - len(data)))
+    return b"".join(parts)
+
+
+def _header(log_path: Path, indexed: int, n_lines: int, n_postings: int,
+            positions: List[int], data_end: int) -> bytes:
+    return (_HEADER.pack(VERSION, indexed, log_path.stat().st_ino, _head_digest(log_path, indexed),
+                         n_lines, n_postings, len(positions), data_end)
+            + _DIRECTORY.pack(*positions, *[0] * (_MAX_BLOCKS - len(positions))))
+
+
+def _rewrite(log_path: Path, index_path: Path, indexed: int, n_lines: int, n_postings: int,
+             blocks: List[bytes]):
+    positions, pos = [], _DATA_START
+    for data in blocks:
+        positions.append(pos)
+        pos += len(data)
+    tmp = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + _header(log_path, indexed, n_lines, n_postings, positions, pos))
+        for data in blocks:
+            f.write(data)
+    os.replace(tmp, index_path)
+
+
+def _reusable(index: LogIndex, log_path: Path) -> bool:
+    st = log_path.stat()
+    return (index.inode == st.st_ino and st.st_size >= index.indexed_size
+            and _head_digest(log_path, index.indexed_size) == index.head_digest)
+
+
+def _extend(old: LogIndex, log_path: Path, index_path: Path):
+    """Index the lines appended since `old` was written (nothing if none is complete yet)."""
+    offsets, stamps, levels, postings = array("Q"), array("q"), array("B"), []
+    indexed = _scan(log_path, old.indexed_size, log_path.stat().st_size, old.n_lines,
+                    offsets, stamps, levels, postings)
+    if not offsets:
+        return
+    postings.sort()
+
+    kept, tail = list(old.blocks), []
+    size = len(offsets)
+    while kept and (len(kept[-1]) <= 2 * size or len(kept) >= _MAX_BLOCKS):
+        tail.insert(0, kept.pop())
+        size += len(tail[0])
+    if tail:
+        runs = [zip(block.hashes, block.lines) for block in tail]
+        postings = list(heapq.merge(*runs, postings))
+    block = _block_bytes(
+        tail[0].first_line if tail else old.n_lines, indexed,
+        b"".join(b.offsets.tobytes() for b in tail) + offsets.tobytes(),
+        b"".join(b.timestamps.tobytes() for b in tail) + stamps.tobytes(),
+        b"".join(b.levels.tobytes() for b in tail) + levels.tobytes(),
+        postings,
+    )
+    n_lines = old.n_lines + len(offsets)
+    n_postings = sum(len(b.hashes) for b in kept) + len(postings)
+
+    live = sum(b.nbytes for b in kept) + len(block)
+    if old.data_end + len(block) - _DATA_START > 2 * live:
+        _rewrite(log_path, index_path, indexed, n_lines, n_postings,
+                 [old._index_map[b.start:b.start + b.nbytes] for b in kept] + [block])
+        return
+    positions = [b.start for b in kept] + [old.data_end]
+    with open(index_path, "r+b") as f:
+        f.seek(old.data_end)
+        f.write(block)
+        f.flush()
+        f.seek(len(MAGIC))
+        f.write(_header(log_path, indexed, n_lines, n_postings, positions,
+                        old.data_end + len(block)))
+
+
+def build_index(log_path, index_path=None, force: bool = False) -> LogIndex:
+    """
+    Create or refresh the sidecar for `log_path` and return it loaded. An
+    index whose log has only grown is extended; anything else is rebuilt.
+    """
+    log_path = Path(log_path)
+    if log_path.name.endswith(".gz"):
+        raise ValueError("Only uncompressed JSONL files can be indexed")
+    index_path = Path(index_path) if index_path else index_path_for(log_path)
+
+    if not force and index_path.exists():
+        try:
+            old = LogIndex(log_path, index_path)
+        except (OSError, ValueError):
+            old = None
+        if old is not None:
+            if _reusable(old, log_path):
+                if old.indexed_size == log_path.stat().st_size:
+                    return old
+                try:
+                    _extend(old, log_path, index_path)
+                finally:
+                    old.close()
+                return LogIndex(log_path, index_path)
+            old.close()
+
+    offsets, stamps, levels, postings = array("Q"), array("q"), array("B"), []
+    indexed = _scan(log_path, 0, log_path.stat().st_size, 0, offsets, stamps, levels, postings)
+    postings.sort()
+    blocks = [_block_bytes(0, indexed, offsets.tobytes(), stamps.tobytes(), levels.tobytes(),
+                           postings)] if offsets else []
+    _rewrite(log_path, index_path, indexed, len(offsets), len(postings), blocks)
+    return LogIndex(log_path, index_path)
+
+
+def open_index(log_path) -> Optional[LogIndex]:
+    """Refresh and return the sidecar if one exists next to `log_path`, else None."""
+    log_path = Path(log_path)
+    if not log_path.is_file() or not index_path_for(log_path).exists():
+        return None
+    return build_index(log_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write or refresh the sidecar offset index (<log>.idx) for a JSONL log."
+    )
+    parser.add_argument("logfile", help="Uncompressed JSONL log file")
+    parser.add_argument("--force", action="store_true", help="Rebuild from scratch")
+    parser.add_argument("--trace-id", help="Print the records of this trace using the index")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        index = build_index(args.logfile, force=args.force)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    with index:
+        if args.trace_id:
+            for record in index.iter_trace(args.trace_id):
+                print(json.dumps(record))
+        print(f"✅ Indexed {len(index)} lines, {index.n_postings} trace postings "
+              f"in {elapsed:.2f}s -> {index.index_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# ailogx/utils/parallel.py
+"""
+Multi-process JSONL loading.
+
+A plain JSONL file is cut into newline-aligned byte ranges. Each range is
+read, parsed and filtered in a worker process, so only the records that
+survive the `RecordFilter` are pickled back to the parent. Results come back
+in file order (`ordered=True`, with a bounded number of ranges in flight) or
+as each range finishes.
+
+Gzipped files, segments and shard directories cannot be split by byte offset
+and are read serially through `reader.iter_logs` with the same filter.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from ailogx.segment import is_segment
+from ailogx.utils.preprocess import is_smart
+from ailogx.utils.reader import ReadStats, iter_logs, parse_filtered, parse_line
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+class RecordFilter:
+    """
+    Picklable record predicate: any combination of a level set, an ISO-8601
+    time window (`since` inclusive, `until` exclusive; prefixes such as
+    "2025-08-04T06" work), a trace id and `smart_filter`.
+    """
+
+    def __init__(self, levels: Optional[Iterable[str]] = None, since: Optional[str] = None,
+                 until: Optional[str] = None, trace_id: Optional[str] = None,
+                 smart: bool = False):
+        self.levels = frozenset(levels) if levels else None
+        self.since = since.rstrip("Z") if since else None
+        self.until = until.rstrip("Z") if until else None
+        self.trace_id = trace_id
+        self.smart = smart
+
+    @property
+    def fields(self) -> tuple:
+        """Top-level keys this filter reads (for projected reads)."""
+        fields = []
+        if self.levels is not None:
+            fields.append("level")
+        if self.since or self.until:
+            fields.append("timestamp")
+        if self.trace_id is not None:
+            fields.append("trace_id")
+        if self.smart:
+            fields.extend(f for f in is_smart.fields if f not in fields)
+        return tuple(fields)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.levels or self.since or self.until or self.trace_id or self.smart)
+
+    def __call__(self, record: dict) -> bool:
+        if self.levels is not None and record.get("level") not in self.levels:
+            return False
+        if self.since or self.until:
+            ts = (record.get("timestamp") or "").rstrip("Z")
+            if self.since and ts < self.since:
+                return False
+            if self.until and ts >= self.until:
+                return False
+        if self.trace_id is not None and record.get("trace_id") != self.trace_id:
+            return False
+        if self.smart and not is_smart(record):
+            return False
+        return True
+
+
+def split_ranges(path, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Cut a file into (start, end) byte ranges that each end just after a newline."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            end = start + chunk_bytes
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                f.readline()  # move to the end of the line we landed in
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_range(path, start: int, end: int, record_filter: Optional[RecordFilter]):
+    """Worker: parse one byte range. Returns (records kept, records parsed, malformed)."""
+    stats = ReadStats()
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    kept = []
+    fields = record_filter.fields if record_filter is not None else None
+    for raw in data.splitlines():
+        if not raw.strip():
+            continue
+        line = raw.decode("utf-8", errors="replace")
+        if record_filter is None:
+            record = parse_line(line, stats)
+        else:
+            record = parse_filtered(line, stats, record_filter, fields)
+        if record is not None:
+            kept.append(record)
+    return kept, stats.records, stats.malformed
+
+
+def _splittable(path: Path) -> bool:
+    return path.is_file() and not path.name.endswith(".gz") and not is_segment(path)
+
+
+def iter_logs_parallel(path, workers: Optional[int] = None,
+                       record_filter: Optional[RecordFilter] = None, ordered: bool = True,
+                       stats: Optional[ReadStats] = None,
+                       chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[dict]:
+    """
+    Yield the records of `path` that pass `record_filter`, parsed by up to
+    `workers` processes (default: CPU count). Falls back to a serial read for
+    a single worker, a single range, or inputs that cannot be split.
+    """
+    if record_filter is not None and not record_filter.active:
+        record_filter = None
+    if stats is None:
+        stats = ReadStats()
+    path = Path(path)
+    workers = workers or os.cpu_count() or 1
+    ranges = split_ranges(path, chunk_bytes) if _splittable(path) else []
+
+    if workers <= 1 or len(ranges) <= 1:
+        yield from iter_logs(path, stats, where=record_filter)
+        return
+
+    def collect(result):
+        kept, parsed, malformed = result
+        stats.records += parsed
+        stats.malformed += malformed
+        return kept
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        if not ordered:
+            futures = [pool.submit(_parse_range, path, start, end, record_filter)
+                       for start, end in ranges]
+            for future in as_completed(futures):
+                yield from collect(future.result())
+            return
+
+        # Keep a bounded window in flight so a slow consumer does not pull
+        # the whole file into memory.
+        pending = deque()
+        todo = iter(ranges)
+        for start, end in todo:
+            pending.append(pool.submit(_parse_range, path, start, end, record_filter))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            result = pending.popleft().result()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(pool.submit(_parse_range, path, nxt[0], nxt[1], record_filter))
+            yield from collect(result)
+
+
+def load_logs_parallel(path, workers: Optional[int] = None,
+                       record_filter: Optional[RecordFilter] = None) -> List[dict]:
+    return list(iter_logs_parallel(path, workers, record_filter))
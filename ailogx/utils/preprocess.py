@@ -1,19 +1,85 @@
-import re
-import json
-from collections import defaultdict
+import sys
+import random
+
+from ailogx.utils.search import query_keywords, record_tokens
+
+# The iter_* stages take any iterable of records and yield lazily, so they can
+# be chained onto `reader.iter_logs` without holding the whole log in memory.
+# The list-returning functions are kept for existing callers.
+#
+# Given a `columnar.LogTable` instead, smart_filter and fast_mode run as
+# vectorized column operations and return a LogTable.
+
+SMART_LEVELS = frozenset({
+    "error_reasoning", "function_exit_error", "decision_point",
+    "error", "critical", "span_stats"
+})
+
+
+def is_smart(log):
+    return bool(log.get("level") in SMART_LEVELS or log.get("reason") or log.get("summary"))
+
+
+# Keys is_smart reads, so readers can decide on a projection (see reader.iter_logs).
+is_smart.fields = ("level", "reason", "summary")
+
+
+def as_table(logs):
+    """`logs` if it is a columnar LogTable, else None (without importing numpy)."""
+    columnar = sys.modules.get("ailogx.utils.columnar")
+    if columnar is not None and isinstance(logs, columnar.LogTable):
+        return logs
+    return None
+
+
+def iter_smart_filter(logs):
+    table = as_table(logs)
+    if table is not None:
+        return table.smart_filter()
+    return filter(is_smart, logs)
+
 
 def smart_filter(logs):
     """
     Keep only logs that are useful for reasoning and summarization.
     Prioritizes logs with semantic weight (e.g., decisions, errors, reasons).
     """
-    return [
-        log for log in logs
-        if log.get("level") in {
-            "error_reasoning", "function_exit_error", "decision_point",
-            "error", "critical"
-        } or log.get("reason") or log.get("summary")
-    ]
+    table = as_table(logs)
+    if table is not None:
+        return table.smart_filter()
+    return list(iter_smart_filter(logs))
+
+
+def _intent_matcher(intent_string):
+    # Whole words (or word prefixes) of the searchable fields, see
+    # utils.search; a keyword no longer matches inside UUIDs or JSON keys.
+    keywords = query_keywords(intent_string)
+
+    def matches_intent(log):
+        words = set(record_tokens(log))
+        return any(word.startswith(kw) if len(kw) >= 3 else word == kw
+                   for kw in keywords for word in words)
+
+    return matches_intent
+
+
+def iter_intent_filter(logs, intent_string, fallback=None):
+    """
+    Streaming `intent_filter`. If nothing matched by the end of the stream,
+    `fallback` (a zero-argument callable returning a fresh iterable of the
+    original records) is replayed instead; without it nothing is yielded.
+    """
+    matches_intent = _intent_matcher(intent_string)
+    matched = False
+    for log in logs:
+        if matches_intent(log):
+            matched = True
+            yield log
+
+    if not matched:
+        print("⚠️  No logs matched intent keywords, returning original logs.")
+        if fallback is not None:
+            yield from fallback()
 
 
 def intent_filter(logs, intent_string):
@@ -21,45 +87,77 @@ def intent_filter(logs, intent_string):
     Naive keyword matching for user-defined intent string (e.g. "focus on auth errors").
     If no logs match, fallback to original logs and emit warning.
     """
-    keywords = re.findall(r"\w+", intent_string.lower())
+    logs = list(logs)
+    return list(iter_intent_filter(logs, intent_string, fallback=lambda: logs))
 
-    def matches_intent(log):
-        try:
-            text = json.dumps(log).lower()
-            return any(kw in text for kw in keywords)
-        except Exception:
-            return False  # skip logs that can't be serialized
 
-    filtered = [log for log in logs if matches_intent(log)]
+def _group_key(log):
+    return (
+        log.get("context_id")
+        or log.get("group_id")
+        or log.get("file")
+        or "global"
+    )
 
-    if not filtered:
-        print("⚠️  No logs matched intent keywords, returning original logs.")
-        return logs
 
-    return filtered
+def iter_fast_mode(logs, threshold=20, seed=0):
+    """
+    Streaming variant of `fast_mode`. Each group keeps at most `threshold`
+    records; once a group grows past that, it collapses to one
+    representative chosen by reservoir sampling (seeded, so runs are
+    repeatable), since the middle record `fast_mode` picks is not known
+    until the stream ends. Memory is bounded by groups x threshold rather
+    than by the log size. Groups are yielded in first-seen order once the
+    input is exhausted. A `LogTable` is already in memory, so it gets
+    `fast_mode`'s middle-record pick.
+    """
+    table = as_table(logs)
+    if table is not None:
+        yield from table.fast_mode(threshold)
+        return
+    rng = random.Random(seed)
+    groups = {}  # key -> [count, kept records], in first-seen order
+    for log in logs:
+        key = _group_key(log)
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [1, [log]]
+            continue
+        group[0] += 1
+        count, kept = group
+        if count <= threshold:
+            kept.append(log)
+            continue
+        if count == threshold + 1:
+            # Switching to a single reservoir slot; seed it from what we have.
+            kept[:] = [rng.choice(kept)]
+        if rng.randrange(count) == 0:
+            kept[0] = log
+
+    for _, kept in groups.values():
+        yield from kept
 
 
 def fast_mode(logs, threshold=20):
     """
     Downsample logs for performance by selecting 1 representative log per group
     if group is too large. Keeps smaller groups intact.
+
+    The representative is the middle record of the group. `--fast` now
+    uses `ailogx.utils.downsample.downsample`, which keeps every error and
+    decision; this is kept for existing callers.
     """
-    groups = defaultdict(list)
+    table = as_table(logs)
+    if table is not None:
+        return table.fast_mode(threshold)
+    groups = {}  # first-seen order
     for log in logs:
-        group = (
-            log.get("context_id")
-            or log.get("group_id")
-            or log.get("file")
-            or "global"
-        )
-        groups[group].append(log)
+        groups.setdefault(_group_key(log), []).append(log)
 
     result = []
-    for group_id, entries in groups.items():
+    for entries in groups.values():
         if len(entries) > threshold:
-            mid = len(entries) // 2
-            result.append(entries[mid])
+            result.append(entries[len(entries) // 2])
         else:
             result.extend(entries)
-
     return result
@@ -0,0 +1,250 @@
+# ailogx/utils/reader.py
+"""
+Readers for LLMLogger output: plain or gzipped JSONL files, binary `.alxs`
+segments, and directories of per-process shards (see
+`ailogx.sinks.ShardedFileSink`) which are k-way merged by timestamp. A
+segment is merged the same way with the `<stem>.<pid>.alxs` segments that
+forked children of its writer started (see `ailogx.segment.SegmentSink`).
+
+Everything streams: `iter_logs` holds one line per file in memory, so CLIs
+can chain it into the generator stages in `ailogx.utils.preprocess` and
+`chunk_by_tokens` without materializing the whole log. Malformed lines (torn
+writes, non-JSON noise) are skipped and counted in a `ReadStats`.
+
+Filter-first reads: pass `where` (a predicate on a record dict) and the
+`fields` it looks at. Those keys are pulled out of each raw line without a
+full parse (`project_line`), the predicate decides, and only surviving lines pay for a
+full `json.loads`.
+"""
+import gzip
+import heapq
+import json
+import re
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from ailogx.segment import forked_segment_paths, is_segment, iter_segment
+
+LOG_SUFFIXES = (".jsonl", ".jsonl.gz", ".alxs", ".alxs.gz")
+
+_TIMESTAMP = re.compile(r'"timestamp":\s*"([^"]*)"')
+
+# Projection: a key found before the first "{"/"[" of a line is at the top
+# level, and it is a real key (not text inside a string, where quotes are
+# escaped) if its opening quote follows "{", "," or whitespace.
+_KEY_BOUNDARY = frozenset('{, \t')
+_decode_value = json.JSONDecoder().raw_decode
+_scanstring = json.decoder.scanstring
+_quoted_keys = {}  # fields tuple -> ((field, '"field"'), ...)
+
+
+def open_log(path, mode: str = "rt"):
+    """Open a log file, transparently decompressing `.gz`."""
+    path = str(path)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8" if "t" in mode else None)
+    return open(path, mode, encoding="utf-8" if "t" in mode else None)
+
+
+def shard_paths(directory) -> List[Path]:
+    """All log files (rotated archives included) in a shard directory."""
+    directory = Path(directory)
+    return sorted(
+        p for p in directory.iterdir()
+        if p.is_file() and p.name.endswith(LOG_SUFFIXES)
+    )
+
+
+def timestamp_key(line: str) -> str:
+    """
+    Sort key for a raw JSONL line. ISO timestamps sort lexicographically once
+    the trailing "Z" is dropped ("…:09" < "…:09.5").
+    """
+    match = _TIMESTAMP.search(line)
+    if match is None:
+        return ""
+    return match.group(1).rstrip("Z")
+
+
+class ReadStats:
+    """Counters filled in by the readers: records yielded and lines skipped."""
+
+    def __init__(self):
+        self.records = 0
+        self.malformed = 0
+        self.truncated_files = 0
+        self.rejected = 0  # well-formed records dropped by a `where` predicate
+
+    def __repr__(self):
+        return (f"ReadStats(records={self.records}, malformed={self.malformed}, "
+                f"truncated_files={self.truncated_files}, rejected={self.rejected})")
+
+
+def iter_lines(path, stats: Optional[ReadStats] = None) -> Iterator[str]:
+    with open_log(path) as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield line if line.endswith("\n") else line + "\n"
+        except EOFError:
+            # gzip archive cut short (e.g. the process died mid-rotation)
+            if stats is None:
+                raise
+            stats.truncated_files += 1
+
+
+def parse_line(line: str, stats: Optional[ReadStats] = None) -> Optional[dict]:
+    """Decode one JSONL line; returns None (and counts it) if it is not a JSON object."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        record = None
+    if not isinstance(record, dict):
+        if stats is None:
+            raise ValueError(f"Malformed log line: {line[:200]!r}")
+        stats.malformed += 1
+        return None
+    if stats is not None:
+        stats.records += 1
+    return record
+
+
+def project_line(line: str, fields: Iterable[str]) -> Optional[dict]:
+    """
+    Extract the top-level scalar `fields` of a JSON line without decoding it.
+    Keys that do not occur are simply absent. Returns None when the answer is
+    uncertain (a field sits after the first nested object or array, or has a
+    non-scalar value); decode the line fully in that case.
+    """
+    if not (line.startswith("{") and (line.endswith("}\n") or line.endswith("}"))):
+        return None  # not an object (or torn): let json.loads count it as malformed
+    if not isinstance(fields, tuple):
+        fields = tuple(fields)
+    keys = _quoted_keys.get(fields)
+    if keys is None:
+        keys = _quoted_keys[fields] = tuple((f, f'"{f}"') for f in fields)
+    found = {}
+    for f, quoted in keys:
+        i = line.find(quoted)
+        if i == -1:
+            continue  # key absent
+        if line[i - 1] not in _KEY_BOUNDARY or line.find("{", 1, i) != -1 or line.find("[", 0, i) != -1:
+            return None  # after a nested value, or not obviously a key
+        j = i + len(quoted)
+        colon = line.find(":", j)
+        if colon == -1 or (colon != j and line[j:colon].strip()):
+            return None
+        j = colon + 1
+        while line[j] == " ":
+            j += 1
+        first = line[j]
+        try:
+            if first == '"':
+                found[f] = _scanstring(line, j + 1)[0]
+            elif first in "{[":
+                return None  # non-scalar value
+            else:
+                found[f] = _decode_value(line, j)[0]
+        except ValueError:
+            return None
+    return found
+
+
+def parse_filtered(line: str, stats: Optional[ReadStats], where: Callable[[dict], bool],
+                   fields: Iterable[str]) -> Optional[dict]:
+    """`parse_line`, but lines whose projection fails `where` are never fully decoded."""
+    projected = project_line(line, fields)
+    if projected is not None and not where(projected):
+        if stats is not None:
+            stats.records += 1
+            stats.rejected += 1
+        return None
+    record = parse_line(line, stats)
+    if record is None:
+        return None
+    if projected is None and not where(record):
+        if stats is not None:
+            stats.rejected += 1
+        return None
+    return record
+
+
+def iter_merged_lines(paths, stats: Optional[ReadStats] = None) -> Iterator[str]:
+    """
+    Stream the lines of several per-process shards in timestamp order. Each
+    shard is already ordered, so only one line per shard is held in memory.
+    """
+    streams = [
+        ((timestamp_key(line), line) for line in iter_lines(path, stats))
+        for path in paths
+    ]
+    for _, line in heapq.merge(*streams, key=lambda item: item[0]):
+        yield line
+
+
+def _record_key(record: dict) -> str:
+    return (record.get("timestamp") or "").rstrip("Z")
+
+
+def _parse_lines(lines, stats: Optional[ReadStats], where=None, fields=None) -> Iterator[dict]:
+    if where is not None and fields:
+        for line in lines:
+            record = parse_filtered(line, stats, where, fields)
+            if record is not None:
+                yield record
+        return
+    for line in lines:
+        record = parse_line(line, stats)
+        if record is not None and (where is None or where(record)):
+            yield record
+        elif record is not None:
+            stats.rejected += 1
+
+
+def _iter_file(path, stats: Optional[ReadStats] = None, where=None, fields=None) -> Iterator[dict]:
+    if is_segment(path):
+        for record in iter_segment(path):
+            stats.records += 1
+            if where is None or where(record):
+                yield record
+            else:
+                stats.rejected += 1
+    else:
+        yield from _parse_lines(iter_lines(path, stats), stats, where, fields)
+
+
+def iter_logs(path, stats: Optional[ReadStats] = None,
+              where: Optional[Callable[[dict], bool]] = None,
+              fields: Optional[Iterable[str]] = None) -> Iterator[dict]:
+    """
+    Yield records from a JSONL/segment file (optionally `.gz`) or a shard
+    directory. A segment comes merged with its forked children's segments.
+    Malformed lines are skipped and counted in `stats`.
+
+    With `where`, only records it accepts are yielded. If `fields` lists
+    every key `where` reads (defaults to `where.fields` when the predicate
+    has one), JSONL lines are projected and only kept lines are decoded.
+    """
+    if stats is None:
+        stats = ReadStats()
+    if where is not None and fields is None:
+        fields = getattr(where, "fields", None)
+    path = Path(path)
+    if not path.is_dir():
+        forked = forked_segment_paths(path) if is_segment(path) else []
+        if not forked:
+            yield from _iter_file(path, stats, where, fields)
+            return
+        yield from heapq.merge(*(_iter_file(p, stats, where, fields) for p in [path, *forked]),
+                               key=_record_key)
+        return
+    paths = shard_paths(path)
+    if not any(is_segment(p) for p in paths):
+        yield from _parse_lines(iter_merged_lines(paths, stats), stats, where, fields)
+        return
+    yield from heapq.merge(*(_iter_file(p, stats, where, fields) for p in paths),
+                           key=_record_key)
+
+
+def load_logs(path, stats: Optional[ReadStats] = None) -> List[dict]:
+    return list(iter_logs(path, stats))
@@ -0,0 +1,453 @@
+# ailogx/utils/search.py
+"""
+Token inverted index and BM25 ranking for `--intent` queries.
+
+Each record is reduced to the words of its message, reason, summary,
+function, file (last two path parts), level, logger and exception text.
+snake_case and camelCase are split, and UUIDs, hex ids and long numbers are
+dropped. A query keyword matches a whole word, or any word it is a prefix of
+(at a lower weight), so "auth" finds `auth_service.py` and
+"authentication" but never a UUID that happens to contain "a1b".
+
+For a plain JSONL file the index is cached in a sidecar `<log>.search`
+and reused while the log is unchanged (an unterminated final line, still
+being written, is left out and does not invalidate it). When lines were only
+appended (same inode and leading bytes) just those lines are tokenized and
+their postings are merged behind the old ones term by term:
+
+    header    MAGIC | struct _HEADER (version, indexed bytes, inode,
+              sha1 of the first 4 KiB, docs, terms, postings, vocabulary bytes)
+    docs      uint64 line offset x docs, then uint32 length x docs
+    terms     uint64 first posting x (terms + 1), then the sorted
+              vocabulary as "\\n"-joined UTF-8
+    postings  uint32 doc x postings, then uint16 term frequency x postings
+"""
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ailogx.segment import is_segment
+
+MAGIC = b"ALXSRC1\n"
+VERSION = 1
+SEARCH_SUFFIX = ".search"
+_HEAD_BYTES = 4096
+_BUILD_ATTEMPTS = 3
+_HEADER = struct.Struct("<IQQ20sQQQQ")
+
+TEXT_FIELDS = ("message", "reason", "summary", "function", "level", "logger",
+               "exception", "error", "traceback")
+PREFIX_WEIGHT = 0.5  # a keyword that is only a prefix of the word counts half
+K1, B = 1.2, 0.75
+
+_IDS = re.compile(r"[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}"
+                  r"|\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,}\b")
+_WORDS = re.compile(r"[A-Za-z0-9]+")
+_CAMEL = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "about", "all", "any", "at", "for", "focus", "from",
+    "in", "into", "is", "it", "me", "of", "on", "or", "show", "that", "the",
+    "to", "what", "when", "where", "which", "why", "with",
+})
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, lightly stemmed words of `text`, without ids."""
+    tokens = []
+    for word in _WORDS.findall(_IDS.sub(" ", text)):
+        if len(word) > 4 and any(c.isdigit() for c in word):
+            continue  # ids, ports, timestamps: never what a query means
+        for part in _CAMEL.findall(word):
+            tokens.append(_stem(part.lower()))
+    return tokens
+
+
+def _field_texts(record: dict) -> List[str]:
+    parts = []
+    for field in TEXT_FIELDS:
+        value = record.get(field)
+        if value is None:
+            continue
+        parts.append(value if isinstance(value, str) else json.dumps(value))
+    path = record.get("file")
+    if isinstance(path, str):
+        parts.append(" ".join(Path(path).parts[-2:]))
+    return parts
+
+
+def record_text(record: dict) -> str:
+    return " ".join(_field_texts(record))
+
+
+_token_cache: Dict[str, List[str]] = {}
+
+
+def record_tokens(record: dict) -> List[str]:
+    """`tokenize(record_text(record))`, memoized per field value (they repeat a lot)."""
+    tokens = []
+    for text in _field_texts(record):
+        cached = _token_cache.get(text)
+        if cached is None:
+            if len(_token_cache) > 100000:
+                _token_cache.clear()
+            cached = _token_cache[text] = tokenize(text)
+        tokens.extend(cached)
+    return tokens
+
+
+def query_keywords(query: str) -> List[str]:
+    return [t for t in dict.fromkeys(tokenize(query)) if t not in _STOPWORDS]
+
+
+def _head_digest(path, size: int) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(min(size, _HEAD_BYTES))).digest()
+
+
+def _has_newline(path, start: int, end: int) -> bool:
+    """Whether bytes [start, end) of `path` contain a complete line ending."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while start < end:
+            block = f.read(min(end - start, 1 << 16))
+            if not block:
+                return False
+            if b"\n" in block:
+                return True
+            start += len(block)
+    return False
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def search_path_for(log_path) -> Path:
+    return Path(str(log_path) + SEARCH_SUFFIX)
+
+
+def cacheable(log_path) -> bool:
+    """Only plain JSONL files get a sidecar (offsets into gzip are useless)."""
+    path = Path(log_path)
+    return path.is_file() and not path.name.endswith(".gz") and not is_segment(path)
+
+
+class _Postings:
+    """Accumulates documents, then freezes into sorted vocabulary + postings."""
+
+    def __init__(self, first_doc: int = 0):
+        self.terms: Dict[str, Tuple[array, array]] = {}
+        self.lengths = array("I")
+        self.first_doc = first_doc
+
+    def add(self, record: dict):
+        doc = self.first_doc + len(self.lengths)
+        tokens = record_tokens(record)
+        self.lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            entry = self.terms.get(term)
+            if entry is None:
+                entry = self.terms[term] = (array("I"), array("H"))
+            entry[0].append(doc)
+            entry[1].append(min(tf, 0xFFFF))
+
+    def freeze(self):
+        vocab = sorted(self.terms)
+        starts, docs, tfs = array("Q", [0]), array("I"), array("H")
+        for term in vocab:
+            term_docs, term_tfs = self.terms[term]
+            docs.extend(term_docs)
+            tfs.extend(term_tfs)
+            starts.append(len(docs))
+        return vocab, starts, docs, tfs
+
+    def freeze_after(self, base: "SearchIndex"):
+        """Like `freeze`, with `base`'s postings (all for earlier docs) in front."""
+        added = dict(zip(sorted(self.terms), range(len(self.terms))))
+        previous = dict(zip(base.vocab, range(len(base.vocab))))
+        vocab = []
+        starts, docs, tfs = array("Q", [0]), array("I"), array("H")
+        for term in heapq.merge(base.vocab, added):
+            if vocab and vocab[-1] == term:
+                continue
+            vocab.append(term)
+            i = previous.get(term)
+            if i is not None:
+                lo, hi = base.starts[i], base.starts[i + 1]
+                docs.frombytes(base.docs[lo:hi].tobytes())
+                tfs.frombytes(base.tfs[lo:hi].tobytes())
+            if term in added:
+                term_docs, term_tfs = self.terms[term]
+                docs.extend(term_docs)
+                tfs.extend(term_tfs)
+            starts.append(len(docs))
+        return vocab, starts, docs, tfs
+
+
+class SearchIndex:
+    """BM25 over the records of a log. Build with `from_records` or `build_search_index`."""
+
+    def __init__(self, vocab: List[str], starts, docs, tfs, lengths,
+                 fetch: Callable[[int], Optional[dict]], close: Optional[Callable[[], None]] = None,
+                 offsets=None, indexed_size: int = 0):
+        self.vocab = vocab
+        self.starts = starts
+        self.docs = docs
+        self.tfs = tfs
+        self.lengths = lengths
+        self._fetch = fetch
+        total = sum(lengths)
+        self.avg_length = total / len(lengths) if len(lengths) else 0.0
+        self._close = close
+        self.offsets = offsets  # sidecar only: line offset of each doc
+        self.indexed_size = indexed_size
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "SearchIndex":
+        """An in-memory index; doc ids are positions in `records`."""
+        records = records if isinstance(records, list) else list(records)
+        postings = _Postings()
+        for record in records:
+            postings.add(record)
+        vocab, starts, docs, tfs = postings.freeze()
+        return cls(vocab, starts, docs, tfs, postings.lengths, records.__getitem__)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, doc: int) -> Optional[dict]:
+        return self._fetch(doc)
+
+    def expand(self, keyword: str) -> List[Tuple[int, float]]:
+        """(term id, weight) of every vocabulary word `keyword` matches."""
+        i = bisect_left(self.vocab, keyword)
+        matches = []
+        while i < len(self.vocab) and self.vocab[i].startswith(keyword):
+            if self.vocab[i] == keyword:
+                matches.append((i, 1.0))
+            elif len(keyword) >= 3:
+                matches.append((i, PREFIX_WEIGHT))
+            else:
+                break
+            i += 1
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[float, int]]:
+        """(score, doc) pairs, best first; ties keep log order."""
+        n = len(self.lengths)
+        if not n:
+            return []
+        scores: Dict[int, float] = {}
+        lengths, avg = self.lengths, self.avg_length or 1.0
+        for keyword in query_keywords(query):
+            for term, weight in self.expand(keyword):
+                lo, hi = self.starts[term], self.starts[term + 1]
+                idf = math.log(1 + (n - (hi - lo) + 0.5) / (hi - lo + 0.5)) * weight
+                for doc, tf in zip(self.docs[lo:hi], self.tfs[lo:hi]):
+                    norm = tf + K1 * (1 - B + B * lengths[doc] / avg)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / norm
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(score, doc) for doc, score in ranked]
+
+
+def _load(log_path: Path, search_path: Path, scanned: bool = False) -> Optional[SearchIndex]:
+    """
+    The sidecar if it still describes `log_path`, else None. The log may
+    have grown past the indexed bytes by an unterminated final line (or, when
+    `scanned` is set because the sidecar was just built, by anything).
+    """
+    try:
+        with open(search_path, "rb") as f:
+            index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    buf = memoryview(index_map)
+    try:
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError
+        (version, indexed_size, inode, head, n_docs, n_terms,
+         n_postings, vocab_bytes) = _HEADER.unpack_from(buf, len(MAGIC))
+        st = log_path.stat()
+        if (version != VERSION or inode != st.st_ino or indexed_size > st.st_size
+                or _head_digest(log_path, indexed_size) != head):
+            raise ValueError
+        if not scanned and _has_newline(log_path, indexed_size, st.st_size):
+            raise ValueError  # complete lines were appended since
+    except (ValueError, struct.error):
+        buf.release()
+        index_map.close()
+        return None
+
+    pos = len(MAGIC) + _HEADER.size
+    views = []
+
+    def take(nbytes, fmt):
+        nonlocal pos
+        view = buf[pos:pos + nbytes].cast(fmt)
+        views.append(view)
+        pos += _pad8(nbytes)
+        return view
+
+    offsets = take(8 * n_docs, "Q")
+    lengths = take(4 * n_docs, "I")
+    starts = take(8 * (n_terms + 1), "Q")
+    vocab_raw = bytes(buf[pos:pos + vocab_bytes])
+    pos += _pad8(vocab_bytes)
+    docs = take(4 * n_postings, "I")
+    tfs = take(2 * n_postings, "H")
+    vocab = vocab_raw.decode().split("\n") if n_terms else []
+
+    log_file = open(log_path, "rb")
+    log_map = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) if indexed_size else b""
+
+    def fetch(doc: int) -> Optional[dict]:
+        start = offsets[doc]
+        end = log_map.find(b"\n", start)
+        try:
+            record = json.loads(log_map[start:end if end >= 0 else indexed_size])
+        except ValueError:
+            return None
+        return record if isinstance(record, dict) else None
+
+    def close():
+        for view in views:
+            view.release()
+        buf.release()
+        index_map.close()
+        if isinstance(log_map, mmap.mmap):
+            log_map.close()
+        log_file.close()
+
+    return SearchIndex(vocab, starts, docs, tfs, lengths, fetch, close, offsets, indexed_size)
+
+
+def build_search_index(log_path, force: bool = False) -> SearchIndex:
+    """
+    Load the `<log>.search` sidecar, or build it when missing or stale: a
+    sidecar whose log only had lines appended is extended with them, anything
+    else (the log's inode or leading bytes changed) is rebuilt.
+    """
+    log_path = Path(log_path)
+    if not cacheable(log_path):
+        raise ValueError("Only uncompressed JSONL files get a search sidecar")
+    search_path = search_path_for(log_path)
+    if not force:
+        index = _load(log_path, search_path)
+        if index is not None:
+            return index
+
+    for _ in range(_BUILD_ATTEMPTS):
+        base = None if force else _load(log_path, search_path, scanned=True)
+        try:
+            _write_sidecar(log_path, search_path, base)
+        finally:
+            if base is not None:
+                base.close()
+        index = _load(log_path, search_path, scanned=True)
+        if index is not None:
+            return index
+        # the log was replaced or truncated while we were reading it
+    raise ValueError(f"{log_path} kept changing while it was being indexed")
+
+
+def _write_sidecar(log_path: Path, search_path: Path, base: Optional[SearchIndex] = None):
+    """
+    Index the complete lines of `log_path` into `search_path` (atomically
+    replaced). With `base`, a loaded sidecar of the same log, only the lines
+    after its indexed bytes are read.
+    """
+    postings = _Postings(len(base) if base is not None else 0)
+    offsets = array("Q")
+    start = base.indexed_size if base is not None else 0
+    with open(log_path, "rb") as f:
+        f.seek(start)
+        pos = start
+        for raw in f:
+            start, pos = pos, pos + len(raw)
+            if not raw.endswith(b"\n"):
+                pos = start
+                break  # torn final line: not indexed until it is complete
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                offsets.append(start)
+                postings.add(record)
+    lengths = postings.lengths
+    if base is None:
+        vocab, starts, docs, tfs = postings.freeze()
+    else:
+        vocab, starts, docs, tfs = postings.freeze_after(base)
+        offsets = array("Q", base.offsets.tobytes()) + offsets
+        lengths = array("I", base.lengths.tobytes()) + lengths
+    vocab_raw = "\n".join(vocab).encode()
+
+    header = MAGIC + _HEADER.pack(
+        VERSION, pos, log_path.stat().st_ino, _head_digest(log_path, pos),
+        len(offsets), len(vocab), len(docs), len(vocab_raw),
+    )
+    tmp = search_path.with_name(search_path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        for data in (offsets.tobytes(), lengths.tobytes(), starts.tobytes(),
+                     vocab_raw, docs.tobytes(), tfs.tobytes()):
+            f.write(data + b"\0" * (_pad8(len(data)) - len(data)))
+    os.replace(tmp, search_path)
+
+
+def select_relevant(index: SearchIndex, query: str, where: Optional[Callable[[dict], bool]] = None,
+                    top_n: Optional[int] = 200, token_budget: Optional[int] = None,
+                    count_tokens: Optional[Callable[[str], int]] = None) -> List[dict]:
+    """
+    The best-ranked records for `query` that pass `where`, up to `top_n`
+    records and `token_budget` tokens (of their JSON lines, measured with
+    `count_tokens`, default ~4 characters per token), returned in log order.
+    """
+    count_tokens = count_tokens or (lambda text: len(text) // 4 + 1)
+    chosen = []
+    used = 0
+    for _, doc in index.search(query):
+        if top_n is not None and len(chosen) >= top_n:
+            break
+        record = index.record(doc)
+        if record is None or (where is not None and not where(record)):
+            continue
+        cost = count_tokens(json.dumps(record))
+        if token_budget is not None and chosen and used + cost > token_budget:
+            break
+        used += cost
+        chosen.append((doc, record))
+    chosen.sort(key=lambda item: item[0])
+    return [record for _, record in chosen]
@@ -1,6 +1,26 @@
-import tiktoken
+# ailogx/utils/tokenizer.py
+"""
+Token accounting for prompt chunking.
+
+A `TokenCounter` counts tokens for one model:
+
+- OpenAI models (gpt-*, o1/o3/o4) use their tiktoken encoding. The encoder is
+  loaded once per encoding name. Lines are encoded in batches, and tiktoken
+  spreads each batch over `workers` threads.
+- Other models (Anthropic, Ollama/llama/gemma, Groq, xAI), and OpenAI models
+  when tiktoken or its encoding files are unavailable, use `estimate_tokens`.
+  It counts the pieces cl100k's pre-tokenizer would split text into
+  (letter runs, 1-3 digit groups, punctuation runs, extra whitespace) with a
+  few byte counts, and charges long words extra. That is about 12 µs for a
+  typical log line. Use `calibrate` to fit its scale to a real tokenizer on
+  a sample.
+
+Counts are memoized per line, up to `cache_size` distinct lines, so repeated
+lines and template lines are counted once.
+"""
 import json
-from transformers import AutoTokenizer
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional
 
 MODEL_TOKEN_LIMITS = {
     "gpt-4": 8192,
@@ -9,31 +29,165 @@ MODEL_TOKEN_LIMITS = {
     "llama3": 8192,  # Approx, for Ollama
 }
 
+_OPENAI_PREFIXES = ("gpt-", "gpt4", "o1", "o3", "o4", "text-embedding")
+BATCH_SIZE = 1024
+
+
 def count_tokens(text, model="gpt-4"):
     # Dummy token count approximation for now
     return len(text.split())
 
+
+def _class_table() -> bytes:
+    """Byte -> class: a(lpha), 0 (digit), space, . (punctuation), u (non-ASCII)."""
+    table = bytearray(b"u" * 256)
+    for code in range(128):
+        char = chr(code)
+        table[code] = ord("a" if char.isalpha() else "0" if char.isdigit()
+                          else " " if char.isspace() else ".")
+    return bytes(table)
+
+
+_CLASSES = _class_table()
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens for `text` as cl100k would roughly count them, without a vocabulary."""
+    classes = text.encode("utf-8").translate(_CLASSES)
+    count = classes.count
+    head = classes[:1]
+    words = count(b"0a") + count(b".a") + count(b" a") + count(b"ua") + (head == b"a")
+    numbers = count(b"a0") + count(b".0") + count(b" 0") + count(b"u0") + (head == b"0")
+    puncts = count(b"a.") + count(b"0.") + count(b" .") + count(b"u.") + (head == b".")
+    return (words + max(0, count(b"a") - 8 * words) // 6   # long words split up
+            + numbers + (count(b"0") - numbers) // 3        # at most 3 digits per token
+            + puncts + count(b"  ") + count(b"u") // 2)
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str):
+    """The tiktoken encoding `name`, or None if tiktoken or its data is unavailable."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+def encoding_name(model: str) -> Optional[str]:
+    """The tiktoken encoding for an OpenAI model name, or None for other models."""
+    if not model.lower().startswith(_OPENAI_PREFIXES):
+        return None
+    try:
+        import tiktoken
+
+        return tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        return "cl100k_base"
+    except ImportError:
+        return None
+
+
+class TokenCounter:
+    def __init__(self, model: str = "gpt-4", cache_size: int = 100_000,
+                 workers: int = 4, scale: float = 1.0):
+        self.model = model
+        self.cache_size = cache_size
+        self.workers = workers
+        self.scale = scale
+        name = encoding_name(model)
+        self.encoding = _encoding(name) if name else None
+        self._cache = {}
+
+    @property
+    def exact(self) -> bool:
+        """True when counts come from the model's own tokenizer."""
+        return self.encoding is not None
+
+    def _measure(self, texts: List[str]) -> List[int]:
+        if self.encoding is not None:
+            encoded = self.encoding.encode_ordinary_batch(texts, num_threads=self.workers)
+            return [len(tokens) for tokens in encoded]
+        scale = self.scale
+        return [int(estimate_tokens(text) * scale + 0.5) for text in texts]
+
+    def count(self, text: str) -> int:
+        n = self._cache.get(text)
+        if n is None:
+            n = self.count_many([text])[0]
+        return n
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        """Counts for `texts`; only lines not seen before are tokenized, in one batch."""
+        cache = self._cache
+        counts = [cache.get(t) for t in texts]
+        missing = list(dict.fromkeys(t for t, n in zip(texts, counts) if n is None))
+        if missing:
+            measured = dict(zip(missing, self._measure(missing)))
+            counts = [measured[t] if n is None else n for t, n in zip(texts, counts)]
+            if len(cache) + len(measured) > self.cache_size:
+                cache.clear()
+            cache.update(measured)
+        return counts
+
+    __call__ = count
+
+    def calibrate(self, texts: Iterable[str], reference) -> float:
+        """
+        Fit the estimator's scale to `reference` (a callable returning the
+        true token count of a text) over a sample; returns the new scale.
+        Has no effect on counts from a real encoding.
+        """
+        texts = list(texts)
+        estimated = sum(estimate_tokens(t) for t in texts)
+        if estimated:
+            self.scale = sum(reference(t) for t in texts) / estimated
+            self._cache.clear()
+        return self.scale
+
+
+@lru_cache(maxsize=32)
+def counter_for(model: str = "gpt-4") -> TokenCounter:
+    """The shared `TokenCounter` for a model."""
+    return TokenCounter(model)
+
+
 def get_token_count(text: str, model="gpt-4") -> int:
-    enc = tiktoken.encoding_for_model(model) if "gpt" in model else tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
+    return counter_for(model).count(text)
 
-def chunk_by_tokens(logs, model="gpt-4", max_tokens=3000):
-    chunks = []
-    current = []
-    current_tokens = 0
 
+def _batches(logs, size: int) -> Iterator[List[str]]:
+    batch = []
     for log in logs:
-        line = log if isinstance(log, str) else json.dumps(log)
-        tokens = get_token_count(line, model)
+        batch.append(log if isinstance(log, str) else json.dumps(log))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def chunk_by_tokens(logs, model="gpt-4", max_tokens=3000, counter: Optional[TokenCounter] = None):
+    """
+    Yield lists of JSON lines (str) of at most `max_tokens` tokens each.
+    Consumes `logs` lazily, `BATCH_SIZE` lines at a time, so only the
+    current chunk and batch are held in memory. Lines that are already
+    strings are used as they are.
+    """
+    counter = counter or counter_for(model)
+    current = []
+    current_tokens = 0
 
-        if current_tokens + tokens > max_tokens:
-            chunks.append(current)
-            current = [line]
-            current_tokens = tokens
-        else:
-            current.append(line)
-            current_tokens += tokens
+    for batch in _batches(logs, BATCH_SIZE):
+        for line, tokens in zip(batch, counter.count_many(batch)):
+            if current and current_tokens + tokens > max_tokens:
+                yield current
+                current = [line]
+                current_tokens = tokens
+            else:
+                current.append(line)
+                current_tokens += tokens
 
     if current:
-        chunks.append(current)
-    return chunks
+        yield current
@@ -0,0 +1,250 @@
+# ailogx/writer.py
+"""
+Background writer used by LLMLogger in async mode.
+
+Records are handed to a bounded in-memory queue on the calling thread and a
+dedicated daemon thread drains them in batches, flushing whenever a batch is
+full or the flush interval elapses.
+"""
+import atexit
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Callable, List, Optional
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_low_severity")
+
+# Higher rank = more important. Unknown levels are treated like "info".
+SEVERITY_RANK = {
+    "context_info": 0,
+    "expected_behavior": 1,
+    "info": 1,
+    "group_start": 1,
+    "group_end": 1,
+    "function_entry": 1,
+    "function_exit": 1,
+    "function_span": 1,
+    "decision_point": 2,
+    "warning": 2,
+    "sampling_summary": 2,
+    "error_reasoning": 3,
+    "function_exit_error": 3,
+    "error": 3,
+    "critical": 3,
+}
+
+_live_writers = weakref.WeakSet()
+
+
+def _severity(record: dict) -> int:
+    return SEVERITY_RANK.get(record.get("level"), 1)
+
+
+class BackgroundWriter:
+    """
+    Bounded queue + writer thread.
+
+    `write_batch` receives a list of records. It is called from the writer
+    thread, or for records put after `close`, once that thread has finished;
+    calls never overlap, so it does not need to be thread-safe itself.
+
+    `on_tick`, if given, is called on the writer thread at least every
+    `flush_interval` seconds, even when nothing is logged; the records it
+    returns (e.g. periodic summaries) are written with the next batch.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[dict]], None],
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        overflow: str = "block",
+        name: str = "ailogx-writer",
+        on_tick: Optional[Callable[[], List[dict]]] = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {overflow}")
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.name = name
+        self.on_tick = on_tick
+        self.dropped = 0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # serializes write_batch calls
+        self._pending = 0  # records taken off the queue but not yet written
+        self._flush_requested = False
+        self._closed = False
+        self._start()
+        _live_writers.add(self)
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _restart_after_fork(self):
+        # Threads do not survive fork(); the parent still owns whatever it had
+        # queued, so the child starts from an empty queue with a fresh thread.
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending = 0
+        self._flush_requested = False
+        self._start()
+
+    # --- producer side -------------------------------------------------
+
+    def put(self, record: dict):
+        with self._cond:
+            if not self._closed:
+                if len(self._queue) >= self.max_queue and not self._make_room(record):
+                    self.dropped += 1
+                    return
+                self._queue.append(record)
+                if len(self._queue) >= self.batch_size:
+                    self._cond.notify_all()
+                return
+        self._write_late(record)
+
+    def _write_late(self, record: dict):
+        # Records put after close (e.g. from other atexit hooks) are written
+        # on the calling thread, after the writer thread's final batch.
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        with self._write_lock:
+            self.write_batch([record])
+
+    def _make_room(self, record: dict) -> bool:
+        """Apply the overflow policy. Returns False if `record` should be dropped."""
+        if self.overflow == "block":
+            while len(self._queue) >= self.max_queue and not self._closed:
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait()
+            return not self._closed
+
+        if self.overflow == "drop_oldest":
+            self._queue.popleft()
+            self.dropped += 1
+            return True
+
+        # drop_low_severity: evict the oldest record of the lowest severity,
+        # unless the incoming record is itself the least important one.
+        incoming = _severity(record)
+        victim, victim_rank = None, incoming
+        for i, queued in enumerate(self._queue):
+            rank = _severity(queued)
+            if rank < victim_rank:
+                victim, victim_rank = i, rank
+                if rank == 0:
+                    break
+        if victim is None:
+            return False
+        del self._queue[victim]
+        self.dropped += 1
+        return True
+
+    # --- consumer side -------------------------------------------------
+
+    def _take_batch(self) -> List[dict]:
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        self._pending += len(batch)
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                idle = False
+                while not self._queue and not self._closed:
+                    if self.on_tick is None:
+                        self._cond.wait()
+                    elif not self._cond.wait(self.flush_interval):
+                        idle = True  # a quiet interval: only the tick is due
+                        break
+                deadline = time.monotonic() + self.flush_interval
+                while (not idle and len(self._queue) < self.batch_size
+                       and not self._closed and not self._flush_requested):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+                if not self._queue:
+                    self._flush_requested = False
+                closing = self._closed and not self._queue
+                # wake producers blocked on a full queue
+                self._cond.notify_all()
+
+            taken = len(batch)
+            failed = 0
+            try:
+                if self.on_tick is not None:
+                    batch += self.on_tick()
+                if batch:
+                    with self._write_lock:
+                        self.write_batch(batch)
+            except Exception as e:
+                failed = len(batch)
+                print(f"⚠️ ailogx writer failed to write {failed} records: {e}", file=sys.stderr)
+            finally:
+                if taken or failed:
+                    with self._cond:
+                        self._pending -= taken
+                        self.dropped += failed
+                        self._cond.notify_all()
+
+            if closing:
+                return
+
+    # --- lifecycle -----------------------------------------------------
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been written."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while (self._queue or self._pending) and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.1)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Drain the queue and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        _live_writers.discard(self)
+
+
+def _restart_all_after_fork():
+    for writer in list(_live_writers):
+        if not writer._closed:
+            writer._restart_after_fork()
+        else:  # its thread is gone in the child, possibly holding the lock
+            writer._write_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_all_after_fork)
+
+
+@atexit.register
+def _drain_all():
+    for writer in list(_live_writers):
+        writer.close()
@@ -0,0 +1,64 @@
+# scripts/bench_columnar.py
+"""
+Benchmark for the columnar LogTable fast paths.
+
+Scales llm_simulated_logs.jsonl up to --lines lines in a temp directory. It
+loads the file once as a list of dicts and once as a `LogTable`, then times
+smart_filter, fast_mode, a level + time-window RecordFilter and chunk
+prioritization on each. The records kept are checked for equality.
+
+    python -m scripts.bench_columnar --lines 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from ailogx.summarizer.chunker import prioritize_chunks
+from ailogx.utils.columnar import LogTable
+from ailogx.utils.parallel import RecordFilter
+from ailogx.utils.preprocess import fast_mode, smart_filter
+from ailogx.utils.reader import load_logs
+from scripts.bench_projection import SOURCE, scale
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<38} {elapsed:8.3f}s  {len(result):>9}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--source", default=SOURCE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scaled.jsonl")
+        scale(args.source, path, args.lines)
+        print(f"📄 {args.lines} lines, {os.path.getsize(path) / 1e6:.0f} MB\n")
+
+        window = RecordFilter(levels={"error_reasoning", "decision_point"},
+                              since="2025-08-04T06:00", until="2025-08-04T06:30")
+        results = {}
+        for label, load in (("list of dicts", load_logs), ("LogTable", LogTable.from_path)):
+            print(f"{label}:")
+            logs = timed("load", lambda: load(path))
+            results[label] = [
+                timed("smart_filter", lambda: smart_filter(logs)),
+                timed("fast_mode", lambda: fast_mode(logs)),
+                timed("levels + time window", lambda: [r for r in logs if window(r)]
+                      if isinstance(logs, list) else logs.filter(window)),
+                timed("prioritize_chunks(top 20)", lambda: prioritize_chunks(logs, 500, 20)),
+            ]
+        smart, fast, windowed, top = results["LogTable"]
+        expected = results["list of dicts"]
+        assert smart.records() == expected[0] and windowed.records() == expected[2]
+        assert len(fast) == len(expected[1]) and top == expected[3]
+
+
+if __name__ == "__main__":
+    main()
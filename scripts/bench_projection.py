@@ -0,0 +1,84 @@
+# scripts/bench_projection.py
+"""
+Benchmark for filter-first (projected) reads.
+
+Scales llm_simulated_logs.jsonl up to --lines lines (1M by default) in a temp
+directory, then compares today's full decode + filter
+(`smart_filter(load_logs(path))`) against
+`iter_logs(path, where=is_smart)`. The projected read only decodes lines that
+pass the filter.
+
+    python -m scripts.bench_projection --lines 1000000
+    python -m scripts.bench_projection --payload-bytes 4096   # multi-KB payloads
+"""
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+
+from ailogx.utils.parallel import RecordFilter
+from ailogx.utils.preprocess import is_smart, smart_filter
+from ailogx.utils.reader import ReadStats, iter_logs, load_logs
+
+SOURCE = os.path.join(os.path.dirname(__file__), os.pardir, "llm_simulated_logs.jsonl")
+
+
+def scale(source, target, lines, payload_bytes=0):
+    with open(source) as f:
+        sample = [line if line.endswith("\n") else line + "\n" for line in f if line.strip()]
+    if payload_bytes:
+        # Give every record with inputs a large nested `outputs` payload.
+        padded = []
+        for line in sample:
+            record = json.loads(line)
+            if "inputs" in record:
+                record["outputs"] = {"rows": [{"id": i, "value": "x" * 32}
+                                              for i in range(payload_bytes // 48)]}
+            padded.append(json.dumps(record) + "\n")
+        sample = padded
+    with open(target, "w") as out:
+        out.writelines(itertools.islice(itertools.cycle(sample), lines))
+
+
+def timed(label, fn, baseline=None):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    speedup = f"  ({baseline / elapsed:.1f}x)" if baseline else ""
+    print(f"{label:<42} {elapsed:7.2f}s  {len(result):>9} records{speedup}")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--source", default=SOURCE)
+    parser.add_argument("--payload-bytes", type=int, default=0,
+                        help="Add a nested outputs payload of about this size to records with inputs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scaled.jsonl")
+        scale(args.source, path, args.lines, args.payload_bytes)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"📄 {args.lines} lines, {size_mb:.0f} MB\n")
+
+        full, base = timed("load_logs + smart_filter", lambda: smart_filter(load_logs(path)))
+        stats = ReadStats()
+        projected, _ = timed("iter_logs(where=is_smart)",
+                             lambda: list(iter_logs(path, stats, where=is_smart)), base)
+        assert projected == full, "projected read disagrees with the full decode"
+        print(f"{'':<42} decoded {stats.records - stats.rejected} of {stats.records} lines")
+
+        errors = RecordFilter(levels={"error_reasoning", "function_exit_error"})
+        full, base = timed("load_logs + level filter",
+                           lambda: [r for r in load_logs(path) if errors(r)])
+        projected, _ = timed("iter_logs(where=RecordFilter(levels))",
+                             lambda: list(iter_logs(path, where=errors)), base)
+        assert projected == full
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# scripts/bench_prompt_formats.py
+"""
+Prompt tokens per --prompt-format.
+
+Encodes a log in each prompt format (json, compact, table) in 3000-token
+chunks, alone and after template folding. It reports total prompt tokens,
+chunks (one LLM call each) and the saving over json. Tokens are counted with
+tiktoken when the model's encoding can be loaded, otherwise with the
+tokenizer's estimator.
+
+    python -m scripts.bench_prompt_formats llm_simulated_logs.jsonl
+"""
+import argparse
+import time
+
+from ailogx.formatters.compact import FORMATS, iter_prompt_chunks
+from ailogx.summarizer.templates import TemplateMiner, compress_records
+from ailogx.utils.reader import load_logs
+from ailogx.utils.tokenizer import TokenCounter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("logfile", nargs="?", default="llm_simulated_logs.jsonl")
+    parser.add_argument("--model", default="gpt-4")
+    parser.add_argument("--max-tokens", type=int, default=3000)
+    args = parser.parse_args()
+
+    counter = TokenCounter(args.model)
+    logs = load_logs(args.logfile)
+    print(f"📄 {len(logs)} records, tokens counted with "
+          f"{'tiktoken' if counter.exact else 'the estimator'} for {args.model}")
+
+    inputs = [("records", logs), ("templates", compress_records(logs, TemplateMiner()))]
+    for label, records in inputs:
+        baseline = None
+        for fmt in FORMATS:
+            start = time.perf_counter()
+            chunks = list(iter_prompt_chunks(records, fmt, max_tokens=args.max_tokens, counter=counter))
+            elapsed = time.perf_counter() - start
+            tokens = sum(counter.count(chunk) for chunk in chunks)
+            baseline = baseline or tokens
+            print(f"  {label:<10} {fmt:<8} {tokens:>10} tokens  {len(chunks):>5} chunks  "
+                  f"{baseline / max(tokens, 1):>5.2f}x  ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
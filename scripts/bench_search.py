@@ -0,0 +1,59 @@
+# scripts/bench_search.py
+"""
+Benchmark for ranked intent search.
+
+Scales llm_simulated_logs.jsonl up to --lines lines in a temp directory, then
+times the old keyword scan (`json.dumps(log).lower()` per record) against
+building the `<log>.search` sidecar, reopening it, and ranked queries.
+
+    python -m scripts.bench_search --lines 1000000 --query "layer error"
+"""
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+
+from ailogx.utils.reader import iter_logs
+from ailogx.utils.search import build_search_index, select_relevant
+from scripts.bench_projection import SOURCE, scale
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<40} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def keyword_scan(path, query):
+    keywords = re.findall(r"\w+", query.lower())
+    return [log for log in iter_logs(path) if any(kw in json.dumps(log).lower() for kw in keywords)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--source", default=SOURCE)
+    parser.add_argument("--query", default="decision failed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scaled.jsonl")
+        scale(args.source, path, args.lines)
+        print(f"📄 {args.lines} lines, {os.path.getsize(path) / 1e6:.0f} MB\n")
+
+        matched = timed("keyword scan (old intent_filter)", lambda: keyword_scan(path, args.query))
+        print(f"  {'':<40} {len(matched)} unranked records")
+        timed("build sidecar", lambda: build_search_index(path).close())
+        index = timed("open cached sidecar", lambda: build_search_index(path))
+        with index:
+            ranked = timed("rank all matches", lambda: index.search(args.query))
+            top = timed("top 200 within 12k tokens", lambda: select_relevant(
+                index, args.query, top_n=200, token_budget=12000))
+        print(f"  {'':<40} {len(ranked)} matches, {len(top)} selected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# scripts/bench_serialization.py
+"""
+Microbenchmark for LLMLogger record serialization.
+
+Compares the original per-record path (datetime.utcnow().isoformat() + a full
+json.dumps of every field) against the RecordEncoder/TimestampCache path, with
+both the stdlib and orjson backends when available.
+
+    python -m scripts.bench_serialization --records 200000
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+
+from ailogx.serialization import RecordEncoder, TimestampCache, orjson
+
+NAME = "bench"
+CONTEXT_ID = str(uuid.uuid4())
+CALLER = {"file": "/srv/app/services/payments/processor.py", "line": 125, "function": "simulate_layer"}
+
+
+def legacy(n):
+    out = []
+    for i in range(n):
+        entry = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "level": "context_info",
+            "logger": NAME,
+            "message": "Entering layer 3",
+            "context_id": CONTEXT_ID,
+            "trace_id": CONTEXT_ID,
+            **CALLER,
+            "inputs": {"depth": i},
+        }
+        out.append(json.dumps(entry) + "\n")
+    return out
+
+
+def fast(n, backend, resolution):
+    clock = TimestampCache(resolution)
+    encoder = RecordEncoder({"logger": NAME, "context_id": CONTEXT_ID, "trace_id": CONTEXT_ID},
+                            backend=backend)
+    encode = encoder.encode
+    out = []
+    for i in range(n):
+        entry = {
+            "timestamp": clock.now(),
+            "level": "context_info",
+            "message": "Entering layer 3",
+            **CALLER,
+            "inputs": {"depth": i},
+        }
+        out.append(encode(entry))
+    return out
+
+
+def run(label, fn, n, repeat):
+    best = min(_timed(fn, n) for _ in range(repeat))
+    rate = n / best
+    print(f"{label:<32} {rate:>12,.0f} records/sec")
+    return rate
+
+
+def _timed(fn, n):
+    start = time.perf_counter()
+    fn(n)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    baseline = run("legacy (utcnow + json.dumps)", legacy, args.records, args.repeat)
+    variants = [("encoder stdlib, us", "stdlib", "us"), ("encoder stdlib, ms", "stdlib", "ms")]
+    if orjson is not None:
+        variants += [("encoder orjson, us", "orjson", "us"), ("encoder orjson, ms", "orjson", "ms")]
+    for label, backend, resolution in variants:
+        rate = run(label, lambda n: fast(n, backend, resolution), args.records, args.repeat)
+        print(f"{'':<32} {rate / baseline:>11.2f}x vs legacy")
+
+
+if __name__ == "__main__":
+    main()
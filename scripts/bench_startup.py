@@ -0,0 +1,69 @@
+# scripts/bench_startup.py
+"""
+CLI startup time.
+
+Runs each command in a fresh interpreter `--runs` times. For each one it
+prints the median wall time and the heavy dependencies (SDKs, networkx,
+numpy, tiktoken, ...) that the import pulled in. With `--budget-ms` it exits
+with status 1 if any median is over budget, for use in CI.
+
+    python -m scripts.bench_startup --runs 5 --budget-ms 1000
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = [
+    ("import ailogx", ["-c", "import ailogx"]),
+    ("ailogx-summarize --help", ["-m", "ailogx.summarize", "--help"]),
+    ("ailogx-chat --help", ["-m", "ailogx.cli.chat", "--help"]),
+    ("ailogx-index --help", ["-m", "ailogx.utils.logindex", "--help"]),
+]
+HEAVY = {"networkx", "numpy", "tiktoken", "transformers", "openai", "anthropic",
+         "groq", "ollama", "rich", "requests"}
+_MODULES = ("import sys, json, runpy; sys.argv = ['x', '--help']\n"
+            "try:\n    runpy.run_module({module!r}, run_name='__main__')\n"
+            "except SystemExit:\n    pass\n"
+            "print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}})))")
+
+
+def wall_ms(args) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def heavy_imports(args) -> list:
+    if args[0] == "-m":
+        code = _MODULES.format(module=args[1])
+    else:
+        code = args[1] + "\nimport sys, json; print(json.dumps(sorted({m.split('.')[0] for m in sys.modules})))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return sorted(set(json.loads(out.stdout.strip().splitlines()[-1])) & HEAVY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    baseline = statistics.median(wall_ms(["-c", "pass"]) for _ in range(args.runs))
+    print(f"🐍 bare interpreter: {baseline:.0f} ms")
+    over = []
+    for label, command in COMMANDS:
+        median = statistics.median(wall_ms(command) for _ in range(args.runs))
+        heavy = heavy_imports(command)
+        print(f"  {label:<28} {median:>6.0f} ms  heavy imports: {', '.join(heavy) or 'none'}")
+        if args.budget_ms is not None and median > args.budget_ms:
+            over.append(label)
+    if over:
+        print(f"❌ Over the {args.budget_ms:.0f} ms budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
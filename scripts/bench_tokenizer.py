@@ -0,0 +1,82 @@
+# scripts/bench_tokenizer.py
+"""
+Token counting throughput for chunk_by_tokens.
+
+Chunks the records of a log (repeated `--repeat` times) with the old per-line
+path and with `TokenCounter` (one cached encoder, batched threads, memoized
+lines). The old path looks up the tiktoken encoder for every line. It also
+times the vocabulary-free estimator used for non-OpenAI models, and compares
+its totals with tiktoken's cl100k_base and with ~4 characters per token.
+The tiktoken rows are skipped when the encoding cannot be loaded (no network
+and no cached encoding files).
+
+    python -m scripts.bench_tokenizer llm_simulated_logs.jsonl --repeat 20
+"""
+import argparse
+import json
+import time
+
+from ailogx.utils.reader import load_logs
+from ailogx.utils.tokenizer import TokenCounter, chunk_by_tokens
+
+
+def legacy_count(text: str, model: str = "gpt-4") -> int:
+    import tiktoken
+
+    enc = tiktoken.encoding_for_model(model) if "gpt" in model else tiktoken.get_encoding("cl100k_base")
+    return len(enc.encode(text))
+
+
+def legacy_chunks(logs, max_tokens=3000):
+    chunks = current = 0
+    for log in logs:
+        tokens = legacy_count(json.dumps(log))
+        if current and current + tokens > max_tokens:
+            chunks += 1
+            current = 0
+        current += tokens
+    return chunks + (1 if current else 0)
+
+
+def timed(label, fn, records):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<38} {elapsed:>7.2f}s  {elapsed / records * 1e6:>6.1f}µs/record  {result}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("logfile", nargs="?", default="llm_simulated_logs.jsonl")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    logs = load_logs(args.logfile) * args.repeat
+    lines = [json.dumps(log) for log in logs]
+    exact = TokenCounter("gpt-4")
+    print(f"📄 {len(logs)} records; tiktoken cl100k_base {'available' if exact.exact else 'unavailable'}")
+
+    if exact.exact:
+        timed("old: per-line encoder lookup", lambda: f"{legacy_chunks(logs)} chunks", len(logs))
+        timed("TokenCounter (tiktoken, batched)",
+              lambda: f"{len(list(chunk_by_tokens(logs, counter=TokenCounter('gpt-4'))))} chunks", len(logs))
+    timed("TokenCounter (estimator)",
+          lambda: f"{len(list(chunk_by_tokens(logs, counter=TokenCounter('llama3'))))} chunks", len(logs))
+    timed("TokenCounter (estimator, JSON lines)",
+          lambda: f"{len(list(chunk_by_tokens(lines, counter=TokenCounter('llama3'))))} chunks", len(logs))
+
+    unique = lines[:len(lines) // args.repeat]
+    estimated = sum(TokenCounter("llama3").count_many(unique))
+    quarter = sum(len(line) // 4 + 1 for line in unique)
+    print(f"🔢 tokens in one copy: estimator {estimated}, ~4 chars/token {quarter}", end="")
+    if exact.exact:
+        true = sum(exact.count_many(unique))
+        print(f", cl100k {true} (estimator {estimated / true - 1:+.1%}, "
+              f"chars/4 {quarter / true - 1:+.1%})")
+    else:
+        print()
+
+
+if __name__ == "__main__":
+    main()
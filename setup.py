@@ -18,12 +18,17 @@ setup(
         "openai",
         "ollama",
         "anthropic",
-        "transformers",
     ],
+    extras_require={
+        "fast": ["orjson"],
+        "columnar": ["numpy"],
+    },
     entry_points={
         "console_scripts": [
             'ailogx-chat=ailogx.cli.chat:main',
-            "ailogx-summarize=ailogx.summarize:main"
+            "ailogx-summarize=ailogx.summarize:main",
+            "ailogx-merge=ailogx.cli.merge:main",
+            "ailogx-index=ailogx.utils.logindex:main",
         ]
 
     },